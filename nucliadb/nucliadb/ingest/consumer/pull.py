@@ -19,7 +19,8 @@
 #
 import asyncio
 import base64
-from typing import List, Optional
+import heapq
+from typing import List, Optional, Set
 
 import aiohttp
 import nats
@@ -36,11 +37,11 @@ from nucliadb.ingest.orm.exceptions import (
     SequenceOrderViolation,
 )
 from nucliadb.ingest.orm.processor import Processor
+from nucliadb.ingest.orm.utils import KeyLocks
 from nucliadb.sentry import SENTRY
 from nucliadb_telemetry.jetstream import JetStreamContextTelemetry
 from nucliadb_telemetry.utils import get_telemetry
 from nucliadb_utils.audit.audit import AuditStorage
-from nucliadb_utils.cache import KB_COUNTER_CACHE
 from nucliadb_utils.cache.utility import Cache
 from nucliadb_utils.exceptions import ShardsNotFound
 from nucliadb_utils.storages.storage import Storage
@@ -50,6 +51,52 @@ if SENTRY:
     from sentry_sdk import capture_exception
 
 
+# Finished messages kept waiting for a lower pending one
+MAX_FINISHED_SEQIDS = 10_000
+
+
+class SeqidWatermark:
+    """
+    Keeps track of the messages of a partition that are processed out of order.
+    `seqid` is the highest seqid for which every message received up to it has
+    finished, so it is safe to restart consuming the partition from there.
+    """
+
+    def __init__(
+        self, seqid: Optional[int] = None, max_finished: int = MAX_FINISHED_SEQIDS
+    ):
+        self.seqid = seqid
+        self.max_finished = max_finished
+        self.pending: Set[int] = set()
+        self.finished: List[int] = []
+
+    def start(self, seqid: int):
+        self.pending.add(seqid)
+
+    def finish(self, seqid: int) -> bool:
+        """
+        Returns True if the watermark moved forward
+        """
+        self.pending.discard(seqid)
+        heapq.heappush(self.finished, seqid)
+        if len(self.finished) > self.max_finished and self.pending:
+            # A message that never finishes, like one NATS stopped redelivering,
+            # would otherwise block the watermark forever
+            stalled = min(self.pending)
+            self.pending.discard(stalled)
+            logger.error(f"Moving the seqid watermark past stalled message {stalled}")
+        lowest_pending = min(self.pending) if self.pending else None
+        moved = False
+        while self.finished and (
+            lowest_pending is None or self.finished[0] < lowest_pending
+        ):
+            finished = heapq.heappop(self.finished)
+            if self.seqid is None or finished > self.seqid:
+                self.seqid = finished
+                moved = True
+        return moved
+
+
 class PullWorker:
     subscriptions: List[Subscription]
 
@@ -73,6 +120,7 @@ class PullWorker:
         nats_servers: Optional[List[str]] = None,
         creds: Optional[str] = None,
         local_subscriber: bool = False,
+        max_concurrency: int = 1,
     ):
         self.driver = driver
         self.partition = partition
@@ -102,7 +150,28 @@ class PullWorker:
         self.subscriptions = []
 
         self.lock = asyncio.Lock()
-        self.processor = Processor(driver, storage, audit, cache, partition)
+
+        # With max_concurrency > 1 messages of different resources are processed
+        # concurrently, and the partition seqid is stored by the worker only up
+        # to the lowest contiguous finished message
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.running: Set[int] = set()
+        self.tasks: Set[asyncio.Task] = set()
+        self.resource_locks = KeyLocks()
+        self.watermark = SeqidWatermark()
+        self.watermark_lock = asyncio.Lock()
+        self.stored_seqid: Optional[int] = None
+        self.stopping = False
+
+        self.processor = Processor(
+            driver,
+            storage,
+            audit,
+            cache,
+            partition,
+            commit_seqid=max_concurrency == 1,
+        )
 
     async def disconnected_cb(self):
         logger.info("Got disconnected from NATS!")
@@ -154,6 +223,8 @@ class PullWorker:
                     self.js = jetstream
 
                 last_seqid = await self.processor.driver.last_seqid(self.partition)
+                self.watermark = SeqidWatermark(last_seqid)
+                self.stored_seqid = last_seqid
                 if last_seqid is None:
                     last_seqid = 1
 
@@ -167,7 +238,7 @@ class PullWorker:
                         deliver_policy=nats.js.api.DeliverPolicy.BY_START_SEQUENCE,
                         opt_start_seq=last_seqid,
                         ack_policy=nats.js.api.AckPolicy.EXPLICIT,
-                        max_ack_pending=1,
+                        max_ack_pending=self.max_concurrency,
                         max_deliver=10000,
                         ack_wait=self.ack_wait,
                         idle_heartbeat=5.0,
@@ -181,12 +252,15 @@ class PullWorker:
         self.initialized = True
 
     async def finalize(self):
+        self.stopping = True
         for subscription in self.subscriptions:
             try:
                 await subscription.drain()
             except nats.errors.ConnectionClosedError:
                 pass
         self.subscriptions = []
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
         if self.nats_subscriber and self.nc is not None:
             try:
                 await self.nc.drain()
@@ -201,80 +275,147 @@ class PullWorker:
         logger.debug(
             f"Message received: subject:{subject}, seqid: {seqid}, reply: {reply}"
         )
-        message_source = "<msg source not set>"
 
-        async with self.lock:
+        if self.max_concurrency == 1:
+            async with self.lock:
+                await self.handle_message(msg, seqid)
+            return
+
+        if seqid in self.running:
+            # Redelivered by NATS while we are still working on it, the running
+            # task will ack it once finished
+            logger.debug(f"Message {seqid} is already being processed, skipping")
+            return
+
+        pb = BrokerMessage()
+        pb.ParseFromString(msg.data)
+
+        # Blocking here keeps NATS from pushing more messages than we can handle
+        await self.semaphore.acquire()
+        self.running.add(seqid)
+        self.watermark.start(seqid)
+        task = asyncio.create_task(self.handle_concurrent_message(msg, seqid, pb))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def handle_concurrent_message(self, msg: Msg, seqid: int, pb: BrokerMessage):
+        # Messages of the same resource are processed in order, as tasks are
+        # created in delivery order and the resource lock is FIFO. A failing
+        # message is retried while holding the lock, so the next messages of
+        # the resource are never applied before it
+        try:
+            async with self.resource_locks.lock(f"{pb.kbid}/{pb.uuid}"):
+                while True:
+                    try:
+                        await self.handle_message(msg, seqid, pb)
+                        break
+                    except Exception:
+                        if self.stopping:
+                            # Not ACKd: NATS will redeliver it and the
+                            # watermark was not moved past it
+                            return
+                    try:
+                        # Keep NATS from redelivering it meanwhile
+                        await msg.in_progress()
+                    except Exception:
+                        logger.warning(f"Could not extend ack wait of {seqid}")
+        finally:
+            self.running.discard(seqid)
+            self.semaphore.release()
+
+        if self.watermark.finish(seqid):
+            await self.store_watermark()
+
+    async def store_watermark(self):
+        async with self.watermark_lock:
+            seqid = self.watermark.seqid
+            if seqid is None or (
+                self.stored_seqid is not None and seqid <= self.stored_seqid
+            ):
+                return
             try:
+                await self.driver.set_last_seqid(self.partition, seqid)
+            except Exception:
+                # Will be stored the next time the watermark moves forward
+                logger.exception(
+                    f"Could not store seqid {seqid} for partition {self.partition}"
+                )
+            else:
+                self.stored_seqid = seqid
+
+    async def handle_message(
+        self, msg: Msg, seqid: int, pb: Optional[BrokerMessage] = None
+    ):
+        message_source = "<msg source not set>"
+
+        try:
+            if pb is None:
                 pb = BrokerMessage()
                 pb.ParseFromString(msg.data)
-                if pb.source == pb.MessageSource.PROCESSOR:
-                    message_source = "processing"
-                elif pb.source == pb.MessageSource.WRITER:
-                    message_source = "writer"
-                if pb.HasField("audit"):
-                    time = pb.audit.when.ToDatetime().isoformat()
-                else:
-                    time = ""
+            if pb.source == pb.MessageSource.PROCESSOR:
+                message_source = "processing"
+            elif pb.source == pb.MessageSource.WRITER:
+                message_source = "writer"
+            if pb.HasField("audit"):
+                time = pb.audit.when.ToDatetime().isoformat()
+            else:
+                time = ""
 
-                logger.debug(
-                    f"Received {message_source} on {pb.kbid}/{pb.uuid} seq {seqid} at {time}"
-                )
+            logger.debug(
+                f"Received {message_source} on {pb.kbid}/{pb.uuid} seq {seqid} at {time}"
+            )
 
-                try:
-                    await self.processor.process(pb, seqid, self.partition)
-                except SequenceOrderViolation as err:
-                    logger.error(
-                        f"Old txn: DISCARD (nucliadb seqid: {seqid}, partition: {self.partition}). \
-                             Current seqid: {err.last_seqid}"
-                    )
-                else:
-                    message_type_name = pb.MessageType.Name(pb.type)
-                    logger.info(
-                        f"Successfully processed {message_type_name} message from \
-                            {message_source}. kb: {pb.kbid}, resource: {pb.uuid}, \
-                                nucliadb seqid: {seqid}, partition: {self.partition} as {time}"
-                    )
-                    if self.cache is not None:
-                        await self.cache.delete(
-                            KB_COUNTER_CACHE.format(kbid=pb.kbid), invalidate=True
-                        )
-            except DeadletteredError as e:
-                # Messages that have been sent to deadletter at some point
-                # We don't want to process it again so it's ack'd
-                if SENTRY:
-                    capture_exception(e)
-                logger.info(
-                    f"An error happend while processing a message from {message_source}. "
-                    f"A copy of the message has been stored on {self.processor.storage.deadletter_bucket}. "
-                    f"Check sentry for more details: {str(e)}"
-                )
-                await msg.ack()
-            except (ShardsNotFound,) as e:
-                # Any messages that for some unexpected inconsistency have failed and won't be tried again
-                # as we cannot do anything about it
-                # - ShardsNotFound: /kb/{id}/shards key or the whole /kb/{kbid} is missing
-                if SENTRY:
-                    capture_exception(e)
-                logger.info(
-                    f"An error happend while processing a message from {message_source}. "
-                    f"This message has been dropped and won't be retried again"
-                    f"Check sentry for more details: {str(e)}"
+            try:
+                await self.processor.process(pb, seqid, self.partition)
+            except SequenceOrderViolation as err:
+                logger.error(
+                    f"Old txn: DISCARD (nucliadb seqid: {seqid}, partition: {self.partition}). \
+                         Current seqid: {err.last_seqid}"
                 )
-                await msg.ack()
-            except Exception as e:
-                # Unhandled exceptions that need to be retried after a small delay
-                if SENTRY:
-                    capture_exception(e)
+            else:
+                message_type_name = pb.MessageType.Name(pb.type)
                 logger.info(
-                    f"An error happend while processing a message from {message_source}. "
-                    "Message has not been ACKd and will be retried. "
-                    f"Check sentry for more details: {str(e)}"
+                    f"Successfully processed {message_type_name} message from \
+                        {message_source}. kb: {pb.kbid}, resource: {pb.uuid}, \
+                            nucliadb seqid: {seqid}, partition: {self.partition} as {time}"
                 )
-                await asyncio.sleep(2)
-                raise e
-            else:
-                # Successful processing
-                await msg.ack()
+        except DeadletteredError as e:
+            # Messages that have been sent to deadletter at some point
+            # We don't want to process it again so it's ack'd
+            if SENTRY:
+                capture_exception(e)
+            logger.info(
+                f"An error happend while processing a message from {message_source}. "
+                f"A copy of the message has been stored on {self.processor.storage.deadletter_bucket}. "
+                f"Check sentry for more details: {str(e)}"
+            )
+            await msg.ack()
+        except (ShardsNotFound,) as e:
+            # Any messages that for some unexpected inconsistency have failed and won't be tried again
+            # as we cannot do anything about it
+            # - ShardsNotFound: /kb/{id}/shards key or the whole /kb/{kbid} is missing
+            if SENTRY:
+                capture_exception(e)
+            logger.info(
+                f"An error happend while processing a message from {message_source}. "
+                f"This message has been dropped and won't be retried again"
+                f"Check sentry for more details: {str(e)}"
+            )
+            await msg.ack()
+        except Exception as e:
+            # Unhandled exceptions that need to be retried after a small delay
+            if SENTRY:
+                capture_exception(e)
+            logger.info(
+                f"An error happend while processing a message from {message_source}. "
+                "Message has not been ACKd and will be retried. "
+                f"Check sentry for more details: {str(e)}"
+            )
+            await asyncio.sleep(2)
+            raise e
+        else:
+            # Successful processing
+            await msg.ack()
 
     async def loop(self):
         while self.initialized is False:
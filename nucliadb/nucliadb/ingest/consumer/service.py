@@ -137,6 +137,7 @@ class ConsumerService:
                 nats_servers=self.nats_url,
                 local_subscriber=self.local_subscriber,
                 service_name=service_name,
+                max_concurrency=settings.partition_concurrency,
             )
             self.pull_workers_task[partition] = asyncio.create_task(
                 self.pull_workers[partition].loop()
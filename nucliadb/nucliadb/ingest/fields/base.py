@@ -105,6 +105,21 @@ class Field:
     def storage(self) -> Storage:
         return self.resource.storage
 
+    async def upload_pb(self, sf: StorageField, payload: Any):
+        blobs = self.resource.blobs
+        if blobs is None:
+            await self.storage.upload_pb(sf, payload)
+        else:
+            blobs.upload_pb(sf, payload)
+
+    async def download_pb(self, sf: StorageField, PBKlass: Type):
+        await self.wait_blob(sf)
+        return await self.storage.download_pb(sf, PBKlass)
+
+    async def wait_blob(self, sf: StorageField):
+        if self.resource.blobs is not None:
+            await self.resource.blobs.wait(sf.key)
+
     async def db_get_value(self):
         if self.value is None:
             payload = await self.resource.txn.get(
@@ -208,9 +223,10 @@ class Field:
         if actual_payload is None:
             # Its first extracted text
             if payload.HasField("file"):
+                await self.wait_blob(sf)
                 await self.storage.normalize_binary(payload.file, sf)
             else:
-                await self.storage.upload_pb(sf, payload.body)
+                await self.upload_pb(sf, payload.body)
                 self.extracted_text = payload.body
         else:
             if payload.HasField("file"):
@@ -227,7 +243,7 @@ class Field:
                     del actual_payload.split_text[key]
             if payload.body.text != "":
                 actual_payload.text = payload.body.text
-            await self.storage.upload_pb(sf, actual_payload)
+            await self.upload_pb(sf, actual_payload)
             self.extracted_text = actual_payload
 
     async def get_extracted_text(self, force=False) -> Optional[ExtractedText]:
@@ -235,7 +251,7 @@ class Field:
             sf: StorageField = self.storage.file_extracted(
                 self.kbid, self.uuid, self.type, self.id, FIELD_TEXT
             )
-            payload = await self.storage.download_pb(sf, ExtractedText)
+            payload = await self.download_pb(sf, ExtractedText)
             if payload is not None:
                 self.extracted_text = payload
         return self.extracted_text
@@ -271,10 +287,11 @@ class Field:
         if actual_payload is None:
             # Its first extracted text
             if payload.HasField("file"):
+                await self.wait_blob(sf)
                 await self.storage.normalize_binary(payload.file, sf)
-                vo = await self.storage.download_pb(sf, VectorObject)
+                vo = await self.download_pb(sf, VectorObject)
             else:
-                await self.storage.upload_pb(sf, payload.vectors)
+                await self.upload_pb(sf, payload.vectors)
                 vo = payload.vectors
                 self.extracted_vectors = payload.vectors
         else:
@@ -295,7 +312,7 @@ class Field:
             if len(payload.vectors.vectors.vectors) > 0:
                 replace_field = True
                 actual_payload.vectors.CopyFrom(payload.vectors.vectors)
-            await self.storage.upload_pb(sf, actual_payload)
+            await self.upload_pb(sf, actual_payload)
             self.extracted_vectors = actual_payload
         return vo, replace_field, replace_splits
 
@@ -304,7 +321,7 @@ class Field:
             sf: StorageField = self.storage.file_extracted(
                 self.kbid, self.uuid, self.type, self.id, FIELD_VECTORS
             )
-            payload = await self.storage.download_pb(sf, VectorObject)
+            payload = await self.download_pb(sf, VectorObject)
             if payload is not None:
                 self.extracted_vectors = payload
         return self.extracted_vectors
@@ -343,7 +360,7 @@ class Field:
                         del actual_payload.vectors[vectorset].vectors[vector_to_delete]
         else:
             actual_payload = user_vectors.vectors
-        await self.storage.upload_pb(sf, actual_payload)
+        await self.upload_pb(sf, actual_payload)
         self.extracted_user_vectors = actual_payload
         return actual_payload, vectors_to_delete
 
@@ -352,7 +369,7 @@ class Field:
             sf: StorageField = self.storage.file_extracted(
                 self.kbid, self.uuid, self.type, self.id, USER_FIELD_VECTORS
             )
-            payload = await self.storage.download_pb(sf, UserVectorSet)
+            payload = await self.download_pb(sf, UserVectorSet)
             if payload is not None:
                 self.extracted_user_vectors = payload
         return self.extracted_user_vectors
@@ -408,7 +425,7 @@ class Field:
         replace_splits = {}
         if actual_payload is None:
             # Its first metadata
-            await self.storage.upload_pb(sf, payload.metadata)
+            await self.upload_pb(sf, payload.metadata)
             self.computed_metadata = payload.metadata
         else:
             # We know its payload.metadata
@@ -424,7 +441,7 @@ class Field:
             if payload.metadata.metadata:
                 actual_payload.metadata.CopyFrom(payload.metadata.metadata)
                 replace_field = [f"{x.start}-{x.end}" for x in metadata.paragraphs]
-            await self.storage.upload_pb(sf, actual_payload)
+            await self.upload_pb(sf, actual_payload)
             self.computed_metadata = actual_payload
 
         return self.computed_metadata, replace_field, replace_splits
@@ -436,7 +453,7 @@ class Field:
             sf: StorageField = self.storage.file_extracted(
                 self.kbid, self.uuid, self.type, self.id, FIELD_METADATA
             )
-            payload = await self.storage.download_pb(sf, FieldComputedMetadata)
+            payload = await self.download_pb(sf, FieldComputedMetadata)
             if payload is not None:
                 self.computed_metadata = payload
         return self.computed_metadata
@@ -476,7 +493,7 @@ class Field:
 
         if actual_payload is None:
             # Its first metadata
-            await self.storage.upload_pb(sf, new_payload)
+            await self.upload_pb(sf, new_payload)
             self.large_computed_metadata = new_payload
         else:
             for key, value in new_payload.split_metadata.items():
@@ -487,7 +504,7 @@ class Field:
                     del actual_payload.split_metadata[key]
             if new_payload.metadata:
                 actual_payload.metadata.CopyFrom(new_payload.metadata)
-            await self.storage.upload_pb(sf, actual_payload)
+            await self.upload_pb(sf, actual_payload)
             self.large_computed_metadata = actual_payload
 
         return self.large_computed_metadata
@@ -499,7 +516,7 @@ class Field:
             sf: StorageField = self.storage.file_extracted(
                 self.kbid, self.uuid, self.type, self.id, FIELD_LARGE_METADATA
             )
-            payload = await self.storage.download_pb(
+            payload = await self.download_pb(
                 sf,
                 LargeComputedMetadata,
             )
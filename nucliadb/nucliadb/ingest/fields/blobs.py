@@ -0,0 +1,71 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+from typing import Any, Dict, Optional
+
+from nucliadb_utils.storages.storage import Storage, StorageField
+
+
+class BlobWriteBuffer:
+    """
+    Write-behind buffer for the protobuf blobs of a resource. Uploads run in
+    the background with bounded concurrency and must be flushed before
+    committing the transaction. Reading a key waits for its pending upload.
+    """
+
+    def __init__(self, storage: Storage, concurrency: int):
+        self.storage = storage
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending: Dict[str, asyncio.Task] = {}
+
+    def upload_pb(self, sf: StorageField, payload: Any):
+        # Serialized right away, so later changes to payload are not uploaded
+        data = payload.SerializeToString()
+        previous = self.pending.get(sf.key)
+        self.pending[sf.key] = asyncio.create_task(self._upload(sf, data, previous))
+
+    async def _upload(
+        self, sf: StorageField, data: bytes, previous: Optional[asyncio.Task]
+    ):
+        if previous is not None:
+            # Writes to the same key are applied in order
+            await previous
+        async with self.semaphore:
+            await self.storage.uploadbytes(sf.bucket, sf.key, data)
+
+    async def wait(self, key: str):
+        task = self.pending.get(key)
+        if task is not None:
+            await task
+
+    async def flush(self):
+        pending = list(self.pending.values())
+        self.pending.clear()
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def cancel(self):
+        pending = list(self.pending.values())
+        self.pending.clear()
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -105,7 +105,7 @@ class File(Field):
         sf: StorageField = self.storage.file_extracted(
             self.kbid, self.uuid, self.type, self.id, FILE_METADATA
         )
-        await self.storage.upload_pb(sf, file_extracted_data)
+        await self.upload_pb(sf, file_extracted_data)
         self.file_extracted_data = file_extracted_data
 
     async def get_file_extracted_data(self) -> Optional[FileExtractedData]:
@@ -113,9 +113,7 @@ class File(Field):
             sf: StorageField = self.storage.file_extracted(
                 self.kbid, self.uuid, self.type, self.id, FILE_METADATA
             )
-            self.file_extracted_data = await self.storage.download_pb(
-                sf, FileExtractedData
-            )
+            self.file_extracted_data = await self.download_pb(sf, FileExtractedData)
         return self.file_extracted_data
 
     async def get_file_extracted_data_cf(self) -> Optional[CloudFile]:
@@ -79,7 +79,7 @@ class Link(Field):
         sf: StorageField = self.storage.file_extracted(
             self.kbid, self.uuid, self.type, self.id, LINK_METADATA
         )
-        await self.storage.upload_pb(sf, link_extracted_data)
+        await self.upload_pb(sf, link_extracted_data)
         self.link_extracted_data = link_extracted_data
 
     async def get_link_extracted_data(self) -> Optional[LinkExtractedData]:
@@ -87,9 +87,7 @@ class Link(Field):
             sf: StorageField = self.storage.file_extracted(
                 self.kbid, self.uuid, self.type, self.id, LINK_METADATA
             )
-            self.link_extracted_data = await self.storage.download_pb(
-                sf, LinkExtractedData
-            )
+            self.link_extracted_data = await self.download_pb(sf, LinkExtractedData)
         return self.link_extracted_data
 
     async def get_link_extracted_data_cf(self) -> Optional[CloudFile]:
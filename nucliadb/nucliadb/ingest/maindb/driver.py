@@ -19,8 +19,11 @@
 #
 from __future__ import annotations
 
+from bisect import bisect_right
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, List, Optional
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from nucliadb.ingest.maindb.exceptions import InvalidCursor
 
 TXNID = "/internal/worker/{worker}"
 DEFAULT_SCAN_LIMIT = 10
@@ -42,7 +45,10 @@ class Transaction:
     ):
         raise NotImplementedError()
 
-    async def batch_get(self, keys: List[str]):
+    async def batch_get(self, keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Returns the values of `keys` in the same order, None for missing keys
+        """
         raise NotImplementedError()
 
     async def get(self, key: str) -> Optional[bytes]:
@@ -51,6 +57,10 @@ class Transaction:
     async def set(self, key: str, value: bytes):
         raise NotImplementedError()
 
+    async def batch_set(self, items: Dict[str, bytes]):
+        for key, value in items.items():
+            await self.set(key, value)
+
     async def delete(self, key: str):
         raise NotImplementedError()
 
@@ -59,6 +69,25 @@ class Transaction:
     ) -> AsyncGenerator[str, None]:
         raise NotImplementedError()
 
+    async def scan_page(
+        self, match: str, cursor: Optional[str] = None, count: int = DEFAULT_SCAN_LIMIT
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Returns up to `count` keys starting with `match` and the cursor to
+        get the next ones, None once there are no more keys. Raises
+        InvalidCursor if the cursor was not returned by this driver.
+
+        This implementation sorts all the matching keys on every call,
+        drivers should resume their scans from the cursor instead.
+        """
+        if cursor is not None and not cursor.startswith(match):
+            raise InvalidCursor(cursor)
+        keys = sorted([key async for key in self.keys(match, count=-1)])
+        if cursor is not None:
+            keys = keys[bisect_right(keys, cursor) :]
+        page = keys[:count]
+        return page, page[-1] if len(keys) > count else None
+
 
 class Driver:
     initialized = False
@@ -73,6 +102,11 @@ class Driver:
         else:
             return int(last_seq)
 
+    async def set_last_seqid(self, worker: str, seqid: int):
+        txn = await self.begin()
+        await txn.set(TXNID.format(worker=worker), f"{seqid}".encode())
+        await txn.commit(resource=False)
+
     async def initialize(self):
         raise NotImplementedError()
 
@@ -19,3 +19,7 @@
 #
 class NoWorkerCommit(Exception):
     pass
+
+
+class InvalidCursor(Exception):
+    pass
@@ -17,9 +17,10 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
+import asyncio
 import glob
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 from nucliadb.ingest.maindb.driver import (
     DEFAULT_BATCH_SCAN_LIMIT,
@@ -41,7 +42,7 @@ except ImportError:  # pragma: no cover
 class LocalTransaction(Transaction):
     modified_keys: Dict[str, bytes]
     visited_keys: Dict[str, bytes]
-    deleted_keys: List[str]
+    deleted_keys: Set[str]
 
     def __init__(self, url: str, driver: Driver):
         self.url = url
@@ -49,7 +50,7 @@ class LocalTransaction(Transaction):
         self.driver = driver
         self.modified_keys = {}
         self.visited_keys = {}
-        self.deleted_keys = []
+        self.deleted_keys = set()
 
     def clean(self):
         self.modified_keys.clear()
@@ -100,14 +101,14 @@ class LocalTransaction(Transaction):
             self.clean()
             return
 
-        not_to_check = []
+        not_to_check = set()
         count = 0
         for key, value in self.modified_keys.items():
             await self.save(key, value)
             count += 1
         for key in self.deleted_keys:
             await self.remove(key)
-            not_to_check.append(count)
+            not_to_check.add(count)
             count += 1
         if resource:
             if worker is None or tid is None:
@@ -121,26 +122,27 @@ class LocalTransaction(Transaction):
         self.clean()
         self.open = False
 
-    async def batch_get(self, keys: List[str]):
-        results = []
+    async def batch_get(self, keys: List[str]) -> List[Optional[bytes]]:
+        results: Dict[str, Optional[bytes]] = {}
+        missing: List[str] = []
         for key in keys:
             if key in self.deleted_keys:
-                raise KeyError(f"Not found {key}")
-
-            if key in self.modified_keys:
-                results.append(self.modified_keys[key])
-                keys.remove(key)
-
-            if key in self.visited_keys:
-                results.append(self.visited_keys[key])
-                keys.remove(key)
-
-        if len(keys) > 0:
-            for key in keys:
-                obj = await self.get(key)
-                if obj:
-                    results.append(obj)
-        return results
+                results[key] = None
+            elif key in self.modified_keys:
+                results[key] = self.modified_keys[key]
+            elif key in self.visited_keys:
+                results[key] = self.visited_keys[key]
+            else:
+                missing.append(key)
+
+        if len(missing) > 0:
+            missing = list(dict.fromkeys(missing))
+            objs = await asyncio.gather(*[self.read(key) for key in missing])
+            for key, obj in zip(missing, objs):
+                if obj is not None:
+                    self.visited_keys[key] = obj
+                results[key] = obj
+        return [results[key] for key in keys]
 
     async def get(self, key: str) -> Optional[bytes]:
         if key in self.deleted_keys:
@@ -159,23 +161,20 @@ class LocalTransaction(Transaction):
             return obj
 
     async def set(self, key: str, value: bytes):
-        if key in self.deleted_keys:
-            self.deleted_keys.remove(key)
-
-        if key in self.visited_keys:
-            del self.visited_keys[key]
-
+        self.deleted_keys.discard(key)
+        self.visited_keys.pop(key, None)
         self.modified_keys[key] = value
 
-    async def delete(self, key: str):
-        if key not in self.deleted_keys:
-            self.deleted_keys.append(key)
-
-        if key in self.visited_keys:
-            del self.visited_keys[key]
+    async def batch_set(self, items: Dict[str, bytes]):
+        self.deleted_keys.difference_update(items.keys())
+        for key in items.keys():
+            self.visited_keys.pop(key, None)
+        self.modified_keys.update(items)
 
-        if key in self.modified_keys:
-            del self.modified_keys[key]
+    async def delete(self, key: str):
+        self.deleted_keys.add(key)
+        self.visited_keys.pop(key, None)
+        self.modified_keys.pop(key, None)
 
     async def keys(
         self, match: str, count: int = DEFAULT_SCAN_LIMIT, include_start: bool = True
@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from nucliadb.ingest.maindb.driver import (
     DEFAULT_BATCH_SCAN_LIMIT,
@@ -26,7 +26,7 @@ from nucliadb.ingest.maindb.driver import (
     Driver,
     Transaction,
 )
-from nucliadb.ingest.maindb.exceptions import NoWorkerCommit
+from nucliadb.ingest.maindb.exceptions import InvalidCursor, NoWorkerCommit
 
 try:
     from redis import asyncio as aioredis
@@ -39,14 +39,14 @@ except ImportError:  # pragma: no cover
 class RedisTransaction(Transaction):
     modified_keys: Dict[str, bytes]
     visited_keys: Dict[str, bytes]
-    deleted_keys: List[str]
+    deleted_keys: Set[str]
 
     def __init__(self, redis: Any, driver: Driver):
         self.redis = redis
         self.driver = driver
         self.modified_keys = {}
         self.visited_keys = {}
-        self.deleted_keys = []
+        self.deleted_keys = set()
         self.open = True
 
     def clean(self):
@@ -68,7 +68,7 @@ class RedisTransaction(Transaction):
             self.clean()
             return
 
-        not_to_check = []
+        not_to_check = set()
         async with self.redis.pipeline(transaction=True) as pipe:
             count = 0
             for key, value in self.modified_keys.items():
@@ -76,7 +76,7 @@ class RedisTransaction(Transaction):
                 count += 1
             for key in self.deleted_keys:
                 pipe = pipe.delete(key.encode())
-                not_to_check.append(count)
+                not_to_check.add(count)
                 count += 1
             if resource:
                 if worker is None or tid is None:
@@ -96,25 +96,27 @@ class RedisTransaction(Transaction):
         self.clean()
         self.open = False
 
-    async def batch_get(self, keys: List[str]):
-        results = []
+    async def batch_get(self, keys: List[str]) -> List[Optional[bytes]]:
+        results: Dict[str, Optional[bytes]] = {}
+        missing: List[str] = []
         for key in keys:
             if key in self.deleted_keys:
-                raise KeyError(f"Not found {key}")
-
-            if key in self.modified_keys:
-                results.append(self.modified_keys[key])
-                keys.remove(key)
-
-            if key in self.visited_keys:
-                results.append(self.visited_keys[key])
-                keys.remove(key)
-
-        if len(keys) > 0:
-            bytes_keys: List[bytes] = [x.encode() for x in keys]
+                results[key] = None
+            elif key in self.modified_keys:
+                results[key] = self.modified_keys[key]
+            elif key in self.visited_keys:
+                results[key] = self.visited_keys[key]
+            else:
+                missing.append(key)
+
+        if len(missing) > 0:
+            missing = list(dict.fromkeys(missing))
+            bytes_keys: List[bytes] = [x.encode() for x in missing]
             objs = await self.redis.mget(bytes_keys)
-            results.extend(objs)
-        return results
+            for key, obj in zip(missing, objs):
+                self.visited_keys[key] = obj
+                results[key] = obj
+        return [results[key] for key in keys]
 
     async def get(self, key: str) -> Optional[bytes]:
         if key in self.deleted_keys:
@@ -132,23 +134,20 @@ class RedisTransaction(Transaction):
             return obj
 
     async def set(self, key: str, value: bytes):
-        if key in self.deleted_keys:
-            self.deleted_keys.remove(key)
-
-        if key in self.visited_keys:
-            del self.visited_keys[key]
-
+        self.deleted_keys.discard(key)
+        self.visited_keys.pop(key, None)
         self.modified_keys[key] = value
 
-    async def delete(self, key: str):
-        if key not in self.deleted_keys:
-            self.deleted_keys.append(key)
-
-        if key in self.visited_keys:
-            del self.visited_keys[key]
+    async def batch_set(self, items: Dict[str, bytes]):
+        self.deleted_keys.difference_update(items.keys())
+        for key in items.keys():
+            self.visited_keys.pop(key, None)
+        self.modified_keys.update(items)
 
-        if key in self.modified_keys:
-            del self.modified_keys[key]
+    async def delete(self, key: str):
+        self.deleted_keys.add(key)
+        self.visited_keys.pop(key, None)
+        self.modified_keys.pop(key, None)
 
     async def keys(
         self, match: str, count: int = DEFAULT_SCAN_LIMIT, include_start: bool = True
@@ -179,6 +178,45 @@ class RedisTransaction(Transaction):
                 if match in new_key:
                     yield new_key
 
+    async def scan_page(
+        self, match: str, cursor: Optional[str] = None, count: int = DEFAULT_SCAN_LIMIT
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        The cursor is the redis SCAN cursor of the batch we were reading
+        and the last key of that batch we returned. SCAN is always asked
+        with the same count, so a batch can be read again. If that key is
+        no longer in the batch, the whole batch is returned again: SCAN may
+        return a key twice anyway, but it must not skip any.
+        """
+        scan_cursor, last_key = 0, ""
+        if cursor is not None:
+            scan, separator, last_key = cursor.partition(":")
+            if not separator or not scan.isdigit():
+                raise InvalidCursor(cursor)
+            scan_cursor = int(scan)
+        keys: List[str] = []
+        async with self.redis.client() as conn:
+            while True:
+                next_cursor, raw_batch = await conn.scan(
+                    cursor=scan_cursor,
+                    match=match.encode() + b"*",
+                    count=DEFAULT_BATCH_SCAN_LIMIT,
+                )
+                batch = [key.decode() for key in raw_batch]
+                if last_key in batch:
+                    batch = batch[batch.index(last_key) + 1 :]
+                last_key = ""
+                missing = count - len(keys)
+                if len(batch) > missing:
+                    keys.extend(batch[:missing])
+                    return keys, f"{scan_cursor}:{keys[-1]}"
+                keys.extend(batch)
+                scan_cursor = next_cursor
+                if scan_cursor == 0:
+                    return keys, None
+                if len(keys) == count:
+                    return keys, f"{scan_cursor}:"
+
 
 class RedisDriver(Driver):
     redis = None
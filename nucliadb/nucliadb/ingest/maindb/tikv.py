@@ -19,7 +19,7 @@
 #
 from __future__ import annotations
 
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Tuple
 
 from nucliadb.ingest.maindb.driver import (
     DEFAULT_BATCH_SCAN_LIMIT,
@@ -28,7 +28,7 @@ from nucliadb.ingest.maindb.driver import (
     Driver,
     Transaction,
 )
-from nucliadb.ingest.maindb.exceptions import NoWorkerCommit
+from nucliadb.ingest.maindb.exceptions import InvalidCursor, NoWorkerCommit
 
 try:
     from tikv_client.asynchronous import TransactionClient  # type: ignore
@@ -68,9 +68,11 @@ class TiKVTransaction(Transaction):
         await self.txn.commit()
         self.open = False
 
-    async def batch_get(self, keys: List[str]):
+    async def batch_get(self, keys: List[str]) -> List[Optional[bytes]]:
         bytes_keys: List[bytes] = [x.encode() for x in keys]
-        return await self.txn.batch_get(bytes_keys)
+        # TiKV only returns the (key, value) pairs that were found
+        found = dict(await self.txn.batch_get(bytes_keys))
+        return [found.get(key) for key in bytes_keys]
 
     async def get(self, key: str) -> Optional[bytes]:
         return await self.txn.get(key.encode())
@@ -127,6 +129,36 @@ class TiKVTransaction(Transaction):
         finally:
             await txn.rollback()
 
+    async def scan_page(
+        self, match: str, cursor: Optional[str] = None, count: int = DEFAULT_SCAN_LIMIT
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Keys are sorted, so the cursor is the last returned key
+        """
+        if cursor is not None and not cursor.startswith(match):
+            raise InvalidCursor(cursor)
+        assert self.driver.tikv is not None
+        txn = await self.driver.tikv.begin(pessimistic=False)
+        try:
+            # Ask for one more key to know if it is the last page
+            keys = await txn.scan_keys(
+                start=(cursor or match).encode(),
+                end=None,
+                limit=count + 1,
+                include_start=cursor is None,
+            )
+        finally:
+            await txn.rollback()
+        page = []
+        for key in keys:
+            str_key = key.decode()
+            if not str_key.startswith(match):
+                break
+            page.append(str_key)
+        if len(page) > count:
+            return page[:count], page[count - 1]
+        return page, None
+
 
 class TiKVDriver(Driver):
     tikv = None
@@ -18,7 +18,17 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 from datetime import datetime
-from typing import AsyncGenerator, AsyncIterator, Optional, Sequence, Tuple, Union
+from functools import partial
+from typing import (
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from uuid import uuid4
 
 from grpc import StatusCode
@@ -57,6 +67,7 @@ from nucliadb.ingest.orm.synonyms import Synonyms
 from nucliadb.ingest.orm.utils import (
     compute_paragraph_key,
     get_basic,
+    get_basics,
     get_node_klass,
     set_basic,
 )
@@ -64,7 +75,7 @@ from nucliadb_utils.cache.utility import Cache
 from nucliadb_utils.exceptions import ShardsNotFound
 from nucliadb_utils.settings import indexing_settings
 from nucliadb_utils.storages.storage import Storage
-from nucliadb_utils.utilities import get_audit, get_storage
+from nucliadb_utils.utilities import get_audit, get_cache, get_storage
 
 KB_RESOURCE = "/kbs/{kbid}/r/{uuid}"
 
@@ -76,6 +87,11 @@ KB_WIDGETS = "/kbs/{kbid}/widgets"
 KB_WIDGETS_WIDGET = "/kbs/{kbid}/widgets/{id}"
 KB_VECTORSET = "/kbs/{kbid}/vectorsets"
 KB_RESOURCE_SHARD = "/kbs/{kbid}/r/{uuid}/shard"
+# Each partition updates its own resources counter, the KB count is their sum
+KB_RESOURCES_COUNTER_BASE = "/kbs/{kbid}/counters/resources/"
+KB_RESOURCES_COUNTER = KB_RESOURCES_COUNTER_BASE + "{partition}"
+# Set when the KB is created, or when the counter is backfilled for old KBs
+KB_RESOURCES_COUNTER_ORIGIN = KB_RESOURCES_COUNTER_BASE + "origin"
 KB_SLUGS_BASE = "/kbslugs/"
 KB_SLUGS = KB_SLUGS_BASE + "{slug}"
 
@@ -99,7 +115,11 @@ class KnowledgeBox:
 
     async def get_config(self) -> Optional[KnowledgeBoxConfig]:
         if self._config is None:
-            payload = await self.txn.get(KB_UUID.format(kbid=self.kbid))
+            key = KB_UUID.format(kbid=self.kbid)
+            if self.cache is not None:
+                payload = await self.cache.get_or_load(key, partial(self.txn.get, key))
+            else:
+                payload = await self.txn.get(key)
             if payload is not None:
                 response = KnowledgeBoxConfig()
                 response.ParseFromString(payload)
@@ -218,6 +238,7 @@ class KnowledgeBox:
             ),
             config.SerializeToString(),
         )
+        await txn.set(KB_RESOURCES_COUNTER_ORIGIN.format(kbid=uuid), b"0")
         # Create Storage
         storage = await get_storage(service_name=SERVICE_NAME)
 
@@ -448,6 +469,7 @@ class KnowledgeBox:
 
         await txn.commit(resource=False)
         await cls.delete_all_kb_keys(driver, kbid)
+        await invalidate_kb_cache(kbid)
 
     @classmethod
     async def delete_all_kb_keys(
@@ -513,6 +535,30 @@ class KnowledgeBox:
         else:
             return None
 
+    async def get_many(self, uuids: List[str]) -> Dict[str, Resource]:
+        """
+        Load several resources with a single maindb round trip. Resources
+        that do not exist are not included in the result.
+        """
+        if len(uuids) == 0:
+            return {}
+        raw_basics = await get_basics(self.txn, self.kbid, uuids)
+        config = await self.get_config()
+        disable_vectors = config.disable_vectors if config is not None else True
+        resources = {}
+        for uuid, raw_basic in zip(uuids, raw_basics):
+            if not raw_basic:
+                continue
+            resources[uuid] = Resource(
+                txn=self.txn,
+                storage=self.storage,
+                kb=self,
+                uuid=uuid,
+                basic=Resource.parse_basic(raw_basic),
+                disable_vectors=disable_vectors,
+            )
+        return resources
+
     async def delete_resource(self, uuid: str):
         raw_basic = await get_basic(self.txn, self.kbid, uuid)
         if raw_basic:
@@ -546,6 +592,61 @@ class KnowledgeBox:
         else:
             return None
 
+    @classmethod
+    async def update_resources_counter(
+        cls, txn: Transaction, kbid: str, partition: str, delta: int
+    ):
+        """
+        Only the consumer of a partition updates its counter, so it does not
+        conflict with other partitions. The update is a read-modify-write:
+        callers must serialise the updates of the same KB and partition.
+        """
+        key = KB_RESOURCES_COUNTER.format(kbid=kbid, partition=partition)
+        value = await txn.get(key)
+        count = int(value) if value else 0
+        await txn.set(key, str(count + delta).encode())
+
+    @classmethod
+    async def get_resources_count(cls, txn: Transaction, kbid: str) -> Optional[int]:
+        """
+        Returns None if the KB has no resources counter yet
+        """
+        keys = [
+            key
+            async for key in txn.keys(
+                match=KB_RESOURCES_COUNTER_BASE.format(kbid=kbid), count=-1
+            )
+        ]
+        if KB_RESOURCES_COUNTER_ORIGIN.format(kbid=kbid) not in keys:
+            return None
+        values = await txn.batch_get(keys)
+        return sum(int(value) for value in values if value)
+
+    @classmethod
+    async def backfill_resources_counter(cls, txn: Transaction, kbid: str) -> int:
+        """
+        Counts the resources of a KB created before the resources counter
+        existed, and sets the counter origin so the sum matches it.
+        """
+        count = 0
+        async for _ in txn.keys(
+            match=KB_RESOURCE_SLUG_BASE.format(kbid=kbid), count=-1
+        ):
+            count += 1
+        keys = [
+            key
+            async for key in txn.keys(
+                match=KB_RESOURCES_COUNTER_BASE.format(kbid=kbid), count=-1
+            )
+        ]
+        values = await txn.batch_get(keys)
+        partitions = sum(int(value) for value in values if value)
+        await txn.set(
+            KB_RESOURCES_COUNTER_ORIGIN.format(kbid=kbid),
+            str(count - partitions).encode(),
+        )
+        return count
+
     async def get_resource_uuid_by_slug(self, slug: str) -> Optional[str]:
         uuid = await self.txn.get(KB_RESOURCE_SLUG.format(kbid=self.kbid, slug=slug))
         if uuid is not None:
@@ -603,6 +704,19 @@ class KnowledgeBox:
                 )
 
 
+async def invalidate_kb_cache(kbid: str):
+    """
+    Evicts the KB shards and config from the cache of every service. Call
+    it once the changes are committed, otherwise the old values could be
+    cached again.
+    """
+    cache = await get_cache()
+    if cache is not None:
+        await cache.mdelete(
+            [KB_SHARDS.format(kbid=kbid), KB_UUID.format(kbid=kbid)], invalidate=True
+        )
+
+
 def chunker(seq: Sequence, size: int):
     return (seq[pos : pos + size] for pos in range(0, len(seq), size))
 
@@ -19,8 +19,11 @@
 #
 import asyncio
 import random
-from typing import Any, Awaitable, Callable, List, Optional, Tuple
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
+from lru import LRU  # type: ignore
 from nucliadb_protos.writer_pb2 import ShardObject
 from nucliadb_protos.writer_pb2 import Shards as PBShards
 from sentry_sdk import capture_exception
@@ -28,22 +31,98 @@ from sentry_sdk import capture_exception
 from nucliadb.ingest.maindb.driver import Driver
 from nucliadb.ingest.orm import NODE_CLUSTER, NODES
 from nucliadb.ingest.orm.exceptions import NodeError, ShardNotFound
+from nucliadb.ingest.orm.knowledgebox import KB_RESOURCE_SHARD
 from nucliadb.ingest.orm.node import Node
 from nucliadb.sentry import SENTRY
 from nucliadb_utils.exceptions import ShardsNotFound
 from nucliadb_utils.keys import KB_SHARDS
 
+# Weight of the last observation on the per node moving averages
+NODE_STATS_ALPHA = 0.2
+# How much a node cost grows with its error rate
+NODE_ERROR_PENALTY = 10.0
+# Seconds for the stats of a node that is not queried anymore to get halfway
+# back to the mean of all the nodes
+NODE_STATS_HALF_LIFE = 30.0
+
+# Number of resource shard ids kept in memory, and for how many seconds
+RESOURCE_SHARDS_CACHE_SIZE = 10000
+RESOURCE_SHARDS_CACHE_TTL = 60.0
+
+
+@dataclass
+class NodeStats:
+    latency: float = 0.0
+    error_rate: float = 0.0
+    updated: float = field(default_factory=time.monotonic)
+
+    def observe(self, latency: float, error: bool = False):
+        self.latency += NODE_STATS_ALPHA * (latency - self.latency)
+        self.error_rate += NODE_STATS_ALPHA * (float(error) - self.error_rate)
+        self.updated = time.monotonic()
+
+
+NODE_STATS: Dict[str, NodeStats] = {}
+
+
+def observe_node(node_id: str, latency: float, error: bool = False):
+    """
+    Records the latency and outcome of a request to a node, used to route
+    reads away from slow or failing nodes.
+    """
+    NODE_STATS.setdefault(node_id, NodeStats()).observe(latency, error)
+
+
+def mean_latency() -> float:
+    latencies = [stats.latency for stats in NODE_STATS.values()]
+    if len(latencies) == 0 or sum(latencies) == 0:
+        return 1.0
+    return sum(latencies) / len(latencies)
+
+
+def node_cost(node_id: str, node: Node, mean: Optional[float] = None) -> float:
+    # Nodes without observations cost the mean latency, so the load they report
+    # decides. The stats of a node decay toward the mean while it is not
+    # queried, so a latency spike does not keep it away forever.
+    if mean is None:
+        mean = mean_latency()
+    latency, error_rate = mean, 0.0
+    stats = NODE_STATS.get(node_id)
+    if stats is not None:
+        age = time.monotonic() - stats.updated
+        weight = 0.5 ** (age / NODE_STATS_HALF_LIFE)
+        latency = mean + weight * (stats.latency - mean)
+        error_rate = weight * stats.error_rate
+    return (
+        latency
+        * (1 + max(node.load_score, 0.0))
+        * (1 + NODE_ERROR_PENALTY * error_rate)
+    )
+
 
 class NodesManager:
     def __init__(self, driver: Driver, cache):
         self.driver = driver
         self.cache = cache
+        # A resource keeps its shard while it exists, but a resource deleted and
+        # created again with the same uuid may get another one. Ingest does not
+        # tell us about deletions, so entries expire after a while.
+        self.resource_shards = LRU(RESOURCE_SHARDS_CACHE_SIZE)
 
     async def get_shards_by_kbid_inner(self, kbid: str) -> PBShards:
         key = KB_SHARDS.format(kbid=kbid)
-        txn = await self.driver.begin()
-        payload = await txn.get(key)
-        await txn.abort()
+
+        async def load() -> Optional[bytes]:
+            txn = await self.driver.begin()
+            payload = await txn.get(key)
+            await txn.abort()
+            return payload
+
+        if self.cache is not None:
+            # Ingest invalidates it whenever the KB shards change
+            payload = await self.cache.get_or_load(key, load)
+        else:
+            payload = await load()
         if payload is None:
             # could be None because /shards doesn't exist, or beacause the whole KB does not exist.
             # In any case, this should not happen
@@ -57,36 +136,83 @@ class NodesManager:
         shards = await self.get_shards_by_kbid_inner(kbid)
         return [x for x in shards.shards]
 
+    async def get_resource_shard_id(self, kbid: str, rid: str) -> Optional[str]:
+        cached = self.resource_shards.get((kbid, rid))
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        txn = await self.driver.begin()
+        payload = await txn.get(KB_RESOURCE_SHARD.format(kbid=kbid, uuid=rid))
+        await txn.abort()
+        if payload is None:
+            return None
+        shard_id = payload.decode()
+        self.resource_shards[(kbid, rid)] = (
+            shard_id,
+            time.monotonic() + RESOURCE_SHARDS_CACHE_TTL,
+        )
+        return shard_id
+
+    async def get_shards_by_rid(self, kbid: str, rid: str) -> List[ShardObject]:
+        """
+        Shard groups to query for data of a single resource: the one the
+        resource was indexed in, or all of them if it is not known.
+        """
+        shard_groups = await self.get_shards_by_kbid(kbid)
+        shard_id = await self.get_resource_shard_id(kbid, rid)
+        if shard_id is not None:
+            owner = [shard for shard in shard_groups if shard.shard == shard_id]
+            if len(owner) > 0:
+                return owner
+        return shard_groups
+
     def choose_node(
         self, shard: ShardObject, shards: Optional[List[str]] = None
     ) -> Tuple[Node, Optional[str], str]:
+        replicas = self.choose_nodes(shard, shards)
+        if len(replicas) == 0:
+            raise KeyError("Could not find a node to query")
+        return replicas[0]
+
+    def choose_nodes(
+        self, shard: ShardObject, shards: Optional[List[str]] = None
+    ) -> List[Tuple[Node, Optional[str], str]]:
+        """
+        Returns all the available replicas of the shard group, in the order
+        they should be queried.
+
+        The first replica is the cheapest of two random ones (power of two
+        choices), according to the load reported by the node and the
+        observed latency and error rate, which decay toward the mean of all
+        the nodes while a node is not queried. The rest follow by increasing
+        cost.
+        """
         shards = shards or []
 
         if NODE_CLUSTER.local_node:
-            return (
-                NODE_CLUSTER.get_local_node(),
-                shard.replicas[0].shard.id,
-                shard.replicas[0].node,
-            )
-        nodes = [x for x in range(len(shard.replicas))]
-        random.shuffle(nodes)
-        node_obj = None
-        shard_id = None
-        for node in nodes:
-            node_id = shard.replicas[node].node
+            return [
+                (
+                    NODE_CLUSTER.get_local_node(),
+                    shard.replicas[0].shard.id,
+                    shard.replicas[0].node,
+                )
+            ]
+        replicas: List[Tuple[Node, Optional[str], str]] = []
+        for replica in shard.replicas:
+            node_id = replica.node
             if node_id in NODES:
-                node_obj = NODES[node_id]
-                shard_id = shard.replicas[node].shard.id
+                shard_id = replica.shard.id
                 if len(shards) > 0 and shard_id not in shards:
-                    node_obj = None
-                    shard_id = None
-                else:
-                    break
-
-        if node_obj is None or node_id is None:
-            raise KeyError("Could not find a node to query")
-
-        return node_obj, shard_id, node_id
+                    continue
+                replicas.append((NODES[node_id], shard_id, node_id))
+
+        random.shuffle(replicas)
+        mean = mean_latency()
+        replicas.sort(key=lambda x: node_cost(x[2], x[0], mean))
+        if len(replicas) > 2:
+            # Pick the cheapest of two random replicas as the first one
+            first, second = random.sample(range(len(replicas)), 2)
+            replicas.insert(0, replicas.pop(min(first, second)))
+        return replicas
 
     async def apply_for_all_shards(
         self,
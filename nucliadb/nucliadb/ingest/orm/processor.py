@@ -40,10 +40,10 @@ from nucliadb.ingest.orm.exceptions import (
     KnowledgeBoxNotFound,
     SequenceOrderViolation,
 )
-from nucliadb.ingest.orm.knowledgebox import KnowledgeBox
+from nucliadb.ingest.orm.knowledgebox import KnowledgeBox, invalidate_kb_cache
 from nucliadb.ingest.orm.resource import Resource
 from nucliadb.ingest.orm.shard import Shard, ShardCounter
-from nucliadb.ingest.orm.utils import get_node_klass
+from nucliadb.ingest.orm.utils import KeyLocks, get_node_klass
 from nucliadb.ingest.settings import settings
 from nucliadb.sentry import SENTRY
 from nucliadb_utils.audit.audit import AuditStorage
@@ -87,6 +87,7 @@ class Processor:
         audit: Optional[AuditStorage] = None,
         cache: Optional[Cache] = None,
         partition: Optional[str] = None,
+        commit_seqid: bool = True,
     ):
         self.messages = {}
         self.driver = driver
@@ -94,6 +95,15 @@ class Processor:
         self.audit = audit
         self.partition = partition
         self.cache = cache
+        # When False, the caller is responsible for storing the partition seqid
+        self.commit_seqid = commit_seqid
+        # Messages of different resources may be processed concurrently, but
+        # the keys shared by all the resources of a KB are updated one at a time
+        self.kb_locks = KeyLocks()
+
+    def txid(self, seqid: int) -> int:
+        # -1 tells the driver not to store the seqid on commit
+        return seqid if self.commit_seqid else -1
 
     async def initialize(self):
         await self.driver.initialize()
@@ -352,7 +362,9 @@ class Processor:
                 )
                 raise exc
         if txn.open:
-            await txn.commit(partition, seqid)
+            await self.commit_with_resources_counter(
+                txn, message.kbid, partition, seqid, -1 if shard_id is not None else 0
+            )
         await self.notify_commit(
             partition, seqid, message.multiid, message.kbid, message.uuid
         )
@@ -370,7 +382,7 @@ class Processor:
         kbid = messages[0].kbid
         if not await KnowledgeBox.exist_kb(txn, kbid):
             logger.warning(f"KB {kbid} is deleted: skiping txn")
-            await txn.commit(partition, seqid)
+            await txn.commit(partition, self.txid(seqid))
             return None
 
         multi = messages[0].multiid
@@ -406,15 +418,10 @@ class Processor:
                 if shard_id is not None:
                     shard = await kb.get_resource_shard(shard_id, node_klass)
 
+                new_resource = shard is None
                 if shard is None:
                     # Its a new resource
-                    # Check if we have enough resource to create a new shard
-                    shard = await node_klass.actual_shard(txn, kbid)
-                    if shard is None:
-                        similarity = await kb.get_similarity()
-                        shard = await node_klass.create_shard_by_kbid(
-                            txn, kbid, similarity=similarity
-                        )
+                    shard = await self.get_or_create_kb_shard(kb)
                     await kb.set_resource_shard_id(uuid, shard.sharduuid)
 
                 if shard is not None:
@@ -423,15 +430,16 @@ class Processor:
                         counter is not None
                         and counter.fields > settings.max_node_fields
                     ):
-                        similarity = await kb.get_similarity()
-                        shard = await node_klass.create_shard_by_kbid(
-                            txn, kbid, similarity=similarity
+                        await self.get_or_create_kb_shard(
+                            kb, full_shard=shard.sharduuid
                         )
 
                 else:
                     raise AttributeError("Shard is not available")
 
-                await txn.commit(partition, seqid)
+                await self.commit_with_resources_counter(
+                    txn, kbid, partition, seqid, 1 if new_resource else 0
+                )
 
                 # Slug may have conflicts as its not partitioned properly. We make it as short as possible
                 txn = await self.driver.begin()
@@ -473,6 +481,46 @@ class Processor:
             counter=counter,
         )
 
+    async def get_or_create_kb_shard(
+        self, kb: KnowledgeBox, full_shard: Optional[str] = None
+    ) -> Shard:
+        """
+        Returns the shard new resources of the KB go to, creating one if the
+        KB has none yet or if the current one is still `full_shard`.
+
+        The KB shards are read and written in their own transaction under the
+        KB lock, so concurrent messages don't overwrite each other's shards.
+        """
+        node_klass = get_node_klass()
+        async with self.kb_locks.lock(kb.kbid):
+            async with self.driver.transaction() as txn:
+                shard = await node_klass.actual_shard(txn, kb.kbid)
+                if shard is not None and shard.sharduuid != full_shard:
+                    return shard
+                similarity = await kb.get_similarity()
+                shard = await node_klass.create_shard_by_kbid(
+                    txn, kb.kbid, similarity=similarity
+                )
+                await txn.commit(resource=False)
+        await invalidate_kb_cache(kb.kbid)
+        return shard
+
+    async def commit_with_resources_counter(
+        self, txn: Transaction, kbid: str, partition: str, seqid: int, delta: int
+    ):
+        """
+        Commits the resource changes together with the update of the KB
+        resources counter, so a crash in between can't lose it. Only this
+        partition updates its counter, and its read-modify-write is serialised
+        with the other messages of the KB under the KB lock.
+        """
+        if delta == 0:
+            await txn.commit(partition, self.txid(seqid))
+            return
+        async with self.kb_locks.lock(kbid):
+            await KnowledgeBox.update_resources_counter(txn, kbid, partition, delta)
+            await txn.commit(partition, self.txid(seqid))
+
     async def autocommit(self, message: BrokerMessage, seqid: int, partition: str):
         return await self.txn([message], seqid, partition)
 
@@ -671,6 +719,7 @@ class Processor:
             await txn.abort()
             raise e
         await txn.commit(resource=False)
+        await invalidate_kb_cache(kbid)
         return uuid
 
     async def list_kb(self, prefix: str):
@@ -687,6 +736,7 @@ class Processor:
             await txn.abort()
             raise exc
         await txn.commit(resource=False)
+        await invalidate_kb_cache(uuid)
         return uuid
 
     async def notify(self, channel, payload: bytes):
@@ -19,11 +19,25 @@
 #
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple, Type
+import asyncio
+from operator import methodcaller
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
 
 from nucliadb_protos.resources_pb2 import Basic as PBBasic
 from nucliadb_protos.resources_pb2 import Conversation as PBConversation
 from nucliadb_protos.resources_pb2 import (
+    ExtractedText,
     ExtractedTextWrapper,
     ExtractedVectorsWrapper,
     FieldClassifications,
@@ -52,6 +66,7 @@ from nucliadb_protos.utils_pb2 import Relation as PBRelation
 from nucliadb_protos.writer_pb2 import BrokerMessage
 
 from nucliadb.ingest.fields.base import Field
+from nucliadb.ingest.fields.blobs import BlobWriteBuffer
 from nucliadb.ingest.fields.conversation import Conversation
 from nucliadb.ingest.fields.date import Datetime
 from nucliadb.ingest.fields.file import File
@@ -63,12 +78,16 @@ from nucliadb.ingest.fields.text import Text
 from nucliadb.ingest.maindb.driver import Transaction
 from nucliadb.ingest.orm.brain import FilePagePositions, ResourceBrain
 from nucliadb.ingest.orm.utils import get_basic, set_basic
+from nucliadb.ingest.settings import settings
 from nucliadb_models.common import CloudLink
 from nucliadb_utils.storages.storage import Storage
 
 if TYPE_CHECKING:  # pragma: no cover
     from nucliadb.ingest.orm.knowledgebox import KnowledgeBox
 
+# Loads some data of a field, see load_fields_data
+FieldLoader = Callable[[Field], Awaitable[Any]]
+
 KB_RESOURCE_ORIGIN = "/kbs/{kbid}/r/{uuid}/origin"
 KB_RESOURCE_METADATA = "/kbs/{kbid}/r/{uuid}/metadata"
 KB_RESOURCE_RELATIONS = "/kbs/{kbid}/r/{uuid}/relations"
@@ -128,6 +147,7 @@ class Resource:
         self.basic = basic
         self.disable_vectors = disable_vectors
         self._previous_status: Optional[Metadata.Status.ValueType] = None
+        self.blobs: Optional[BlobWriteBuffer] = None
 
     @property
     def indexer(self) -> ResourceBrain:
@@ -295,17 +315,24 @@ class Resource:
         if basic is not None:
             brain.set_global_tags(basic, self.uuid, origin)
         fields = await self.get_fields(force=True)
-        for (type_id, field_id), field in fields.items():
-            fieldid = FieldID(field_type=type_id, field=field_id)  # type: ignore
-            await self.compute_global_text_field(fieldid, brain)
+        loaders: Dict[str, FieldLoader] = {
+            "text": methodcaller("get_extracted_text"),
+            "metadata": methodcaller("get_field_metadata"),
+            "page_positions": get_page_positions,
+        }
+        if self.disable_vectors is False:
+            loaders["vectors"] = methodcaller("get_vectors")
+            loaders["user_vectors"] = methodcaller("get_user_vectors")
+        fields_data = await load_fields_data(fields, loaders)
 
-            field_metadata = await field.get_field_metadata()
+        # The brain is assembled once all the field data is downloaded
+        for (type_id, field_id), data in fields_data.items():
+            fieldid = FieldID(field_type=type_id, field=field_id)  # type: ignore
             field_key = self.generate_field_id(fieldid)
-            if field_metadata is not None:
-                page_positions: Optional[FilePagePositions] = None
-                if type_id == FieldType.FILE and isinstance(field, File):
-                    page_positions = await get_file_page_positions(field)
+            apply_field_text(brain, field_key, data["text"])
 
+            field_metadata = data["metadata"]
+            if field_metadata is not None:
                 user_field_metadata = None
                 if basic is not None:
                     user_field_metadata = next(
@@ -322,26 +349,25 @@ class Resource:
                     field_metadata,
                     replace_field=[],
                     replace_splits={},
-                    page_positions=page_positions,
-                    extracted_text=await field.get_extracted_text(),
+                    page_positions=data["page_positions"],
+                    extracted_text=data["text"],
                     basic_user_field_metadata=user_field_metadata,
                 )
 
             if self.disable_vectors is False:
-                vo = await field.get_vectors()
+                vo = data["vectors"]
                 if vo is not None:
                     brain.apply_field_vectors(field_key, vo, False, [])
 
-                vu = await field.get_user_vectors()
+                vu = data["user_vectors"]
                 if vu is not None:
                     vectors_to_delete = {}  # type: ignore
                     brain.apply_user_vectors(field_key, vu, vectors_to_delete)  # type: ignore
         return brain
 
-    async def generate_field_vectors(
-        self, bm: BrokerMessage, type_id: int, field_id: str, field: Field
+    def generate_field_vectors(
+        self, bm: BrokerMessage, type_id: int, field_id: str, vo: Optional[Any]
     ):
-        vo = await field.get_vectors()
         if vo is None:
             return
         evw = ExtractedVectorsWrapper()
@@ -350,10 +376,9 @@ class Resource:
         evw.vectors.CopyFrom(vo)
         bm.field_vectors.append(evw)
 
-    async def generate_user_vectors(
-        self, bm: BrokerMessage, type_id: int, field_id: str, field: Field
+    def generate_user_vectors(
+        self, bm: BrokerMessage, type_id: int, field_id: str, uv: Optional[Any]
     ):
-        uv = await field.get_user_vectors()
         if uv is None:
             return
         uvw = UserVectorsWrapper()
@@ -362,10 +387,9 @@ class Resource:
         uvw.vectors.CopyFrom(uv)
         bm.user_vectors.append(uvw)
 
-    async def generate_field_large_computed_metadata(
-        self, bm: BrokerMessage, type_id: int, field_id: str, field: Field
+    def generate_field_large_computed_metadata(
+        self, bm: BrokerMessage, type_id: int, field_id: str, lcm: Optional[Any]
     ):
-        lcm = await field.get_large_field_metadata()
         if lcm is None:
             return
         lcmw = LargeComputedMetadataWrapper()
@@ -374,18 +398,17 @@ class Resource:
         lcmw.real.CopyFrom(lcm)
         bm.field_large_metadata.append(lcmw)
 
-    async def generate_field_computed_metadata(
+    def generate_field_computed_metadata(
         self,
         bm: BrokerMessage,
         type_id: int,
         field_id: str,
-        field: Field,
+        field_metadata: Optional[Any],
     ):
         fcmw = FieldComputedMetadataWrapper()
         fcmw.field.field = field_id
         fcmw.field.field_type = type_id  # type: ignore
 
-        field_metadata = await field.get_field_metadata()
         if field_metadata is not None:
             fcmw.metadata.CopyFrom(field_metadata)
             fcmw.field.field = field_id
@@ -393,45 +416,41 @@ class Resource:
             bm.field_metadata.append(fcmw)
             # Make sure cloud files are removed for exporting
 
-    async def generate_extracted_text(
-        self, bm: BrokerMessage, type_id: int, field_id: str, field: Field
+    def generate_extracted_text(
+        self,
+        bm: BrokerMessage,
+        type_id: int,
+        field_id: str,
+        extracted_text: Optional[ExtractedText],
     ):
         etw = ExtractedTextWrapper()
         etw.field.field = field_id
         etw.field.field_type = type_id  # type: ignore
-        extracted_text = await field.get_extracted_text()
         if extracted_text is not None:
             etw.body.CopyFrom(extracted_text)
             bm.extracted_text.append(etw)
 
-    async def generate_field(
+    def generate_field(
         self,
         bm: BrokerMessage,
         type_id: int,
         field_id: str,
-        field: Field,
+        value: Any,
     ):
         # Used for exporting a field
         if type_id == FieldType.TEXT:
-            value = await field.get_value()
             bm.texts[field_id].CopyFrom(value)
         elif type_id == FieldType.LINK:
-            value = await field.get_value()
             bm.links[field_id].CopyFrom(value)
         elif type_id == FieldType.FILE:
-            value = await field.get_value()
             bm.files[field_id].CopyFrom(value)
         elif type_id == FieldType.CONVERSATION:
-            value = await field.get_value()
             bm.conversations[field_id].CopyFrom(value)
         elif type_id == FieldType.KEYWORDSET:
-            value = await field.get_value()
             bm.keywordsets[field_id].CopyFrom(value)
         elif type_id == FieldType.DATETIME:
-            value = await field.get_value()
             bm.datetimes[field_id].CopyFrom(value)
         elif type_id == FieldType.LAYOUT:
-            value = await field.get_value()
             bm.layouts[field_id].CopyFrom(value)
 
     async def generate_broker_message(self) -> BrokerMessage:
@@ -454,45 +473,57 @@ class Resource:
                 bm.relations.append(relation)
 
         fields = await self.get_fields(force=True)
-        for (type_id, field_id), field in fields.items():
+        fields_data = await load_fields_data(
+            fields,
+            {
+                "value": methodcaller("get_value"),
+                "text": methodcaller("get_extracted_text"),
+                "metadata": methodcaller("get_field_metadata"),
+                "extracted_data": get_extracted_data,
+                "vectors": methodcaller("get_vectors"),
+                "user_vectors": methodcaller("get_user_vectors"),
+                "large_metadata": methodcaller("get_large_field_metadata"),
+            },
+        )
+        for (type_id, field_id), data in fields_data.items():
             # Value
-            await self.generate_field(bm, type_id, field_id, field)
+            self.generate_field(bm, type_id, field_id, data["value"])
 
             # Extracted text
-            await self.generate_extracted_text(bm, type_id, field_id, field)
+            self.generate_extracted_text(bm, type_id, field_id, data["text"])
 
             # Field Computed Metadata
-            await self.generate_field_computed_metadata(bm, type_id, field_id, field)
-
-            if type_id == FieldType.FILE and isinstance(field, File):
-                field_extracted_data = await field.get_file_extracted_data()
-                if field_extracted_data is not None:
-                    bm.file_extracted_data.append(field_extracted_data)
+            self.generate_field_computed_metadata(
+                bm, type_id, field_id, data["metadata"]
+            )
 
-            elif type_id == FieldType.LINK and isinstance(field, Link):
-                link_extracted_data = await field.get_link_extracted_data()
-                if link_extracted_data is not None:
-                    bm.link_extracted_data.append(link_extracted_data)
+            if data["extracted_data"] is not None:
+                if type_id == FieldType.FILE:
+                    bm.file_extracted_data.append(data["extracted_data"])
+                elif type_id == FieldType.LINK:
+                    bm.link_extracted_data.append(data["extracted_data"])
 
             # Field vectors
-            await self.generate_field_vectors(bm, type_id, field_id, field)
+            self.generate_field_vectors(bm, type_id, field_id, data["vectors"])
 
             # User vectors
-            await self.generate_user_vectors(bm, type_id, field_id, field)
+            self.generate_user_vectors(bm, type_id, field_id, data["user_vectors"])
 
             # Large metadata
-            await self.generate_field_large_computed_metadata(
-                bm, type_id, field_id, field
+            self.generate_field_large_computed_metadata(
+                bm, type_id, field_id, data["large_metadata"]
             )
 
         return bm
 
     # Fields
     async def get_fields(self, force: bool = False) -> Dict[Tuple[int, str], Field]:
-        # Get all fields
+        # Get all fields, loading the values of the new ones concurrently
+        missing = {}
         for type, field in await self.get_fields_ids(force=force):
             if (type, field) not in self.fields:
-                self.fields[(type, field)] = await self.get_field(field, type)
+                missing[(type, field)] = await self.get_field(field, type, load=False)
+        await load_fields_data(missing, {"value": methodcaller("get_value")})
         return self.fields
 
     async def get_fields_ids(self, force: bool = False) -> List[Tuple[int, str]]:
@@ -590,6 +621,21 @@ class Resource:
             await self.delete_field(fieldid.field_type, fieldid.field)
 
     async def apply_extracted(self, message: BrokerMessage):
+        # Field blobs are uploaded concurrently while the message is applied
+        blobs = self.blobs = BlobWriteBuffer(
+            self.storage, settings.blob_upload_concurrency
+        )
+        try:
+            await self._apply_extracted(message)
+        except Exception:
+            await blobs.cancel()
+            raise
+        else:
+            await blobs.flush()
+        finally:
+            self.blobs = None
+
+    async def _apply_extracted(self, message: BrokerMessage):
         errors = False
         field_obj: Field
         basic_modified = False
@@ -788,11 +834,14 @@ class Resource:
 
         brain.set_processing_status(basic=basic, previous_status=self._previous_status)
         brain.set_global_tags(basic=basic, origin=origin, uuid=self.uuid)
-        for type, field in await self.get_fields_ids(force=True):
-            fieldobj = await self.get_field(field, type, load=False)
+        fields = await self.get_fields_objects()
+        fields_data = await load_fields_data(
+            fields,
+            {"metadata": methodcaller("get_field_metadata"), "value": get_keywordset},
+        )
+        for (type, field), data in fields_data.items():
             fieldid = FieldID(field_type=type, field=field)  # type: ignore
             fieldkey = self.generate_field_id(fieldid)
-            extracted_metadata = await fieldobj.get_field_metadata()
             valid_user_field_metadata = None
             for user_field_metadata in basic.fieldmetadata:
                 if (
@@ -803,31 +852,36 @@ class Resource:
                     break
             brain.apply_field_tags_globally(
                 fieldkey,
-                extracted_metadata,
+                data["metadata"],
                 self.uuid,
                 basic.usermetadata,
                 valid_user_field_metadata,
             )
             if type == FieldType.KEYWORDSET:
-                field_data = await fieldobj.db_get_value()
-                brain.process_keywordset_fields(fieldkey, field_data)
+                brain.process_keywordset_fields(fieldkey, data["value"])
 
     async def compute_global_text(self):
         # For each extracted
+        fields = await self.get_fields_objects()
+        fields_data = await load_fields_data(
+            fields, {"text": methodcaller("get_extracted_text")}
+        )
+        for field_key, data in fields_data.items():
+            type, field = field_key
+            fieldid = FieldID(field_type=type, field=field)  # type: ignore
+            apply_field_text(
+                self.indexer, self.generate_field_id(fieldid), data["text"]
+            )
+
+    async def get_fields_objects(self) -> Dict[Tuple[int, str], Field]:
+        """
+        Field objects of all the fields of the resource, without loading
+        their values.
+        """
+        fields = {}
         for type, field in await self.get_fields_ids(force=True):
-            fieldid = FieldID(field_type=type, field=field)
-            await self.compute_global_text_field(fieldid, self.indexer)
-
-    async def compute_global_text_field(self, fieldid: FieldID, brain: ResourceBrain):
-        fieldobj = await self.get_field(fieldid.field, fieldid.field_type, load=False)
-        fieldkey = self.generate_field_id(fieldid)
-        extracted_text = await fieldobj.get_extracted_text()
-        if extracted_text is None:
-            return
-        field_text = extracted_text.text
-        for _, split in extracted_text.split_text.items():
-            field_text += f" {split} "
-        brain.apply_field_text(fieldkey, field_text)
+            fields[(type, field)] = await self.get_field(field, type, load=False)
+        return fields
 
     async def get_all(self):
         if self.basic is None:
@@ -1142,6 +1196,63 @@ class Resource:
         return pb_resource
 
 
+async def load_fields_data(
+    fields: Dict[Tuple[int, str], Field], loaders: Dict[str, FieldLoader]
+) -> Dict[Tuple[int, str], Dict[str, Any]]:
+    """
+    Run every loader on every field concurrently, at most
+    `field_load_concurrency` at once, and return their results by field and
+    loader name. Each loader is usually a blob storage or maindb read.
+    """
+    semaphore = asyncio.Semaphore(settings.field_load_concurrency)
+
+    async def load(loader: FieldLoader, field: Field) -> Any:
+        async with semaphore:
+            return await loader(field)
+
+    keys = [(field_key, name) for field_key in fields for name in loaders]
+    results = await asyncio.gather(
+        *[load(loaders[name], fields[field_key]) for field_key, name in keys]
+    )
+    fields_data: Dict[Tuple[int, str], Dict[str, Any]] = {
+        field_key: {} for field_key in fields
+    }
+    for (field_key, name), result in zip(keys, results):
+        fields_data[field_key][name] = result
+    return fields_data
+
+
+def apply_field_text(
+    brain: ResourceBrain, fieldkey: str, extracted_text: Optional[ExtractedText]
+):
+    if extracted_text is None:
+        return
+    field_text = extracted_text.text
+    for _, split in extracted_text.split_text.items():
+        field_text += f" {split} "
+    brain.apply_field_text(fieldkey, field_text)
+
+
+async def get_page_positions(field: Field) -> Optional[FilePagePositions]:
+    if isinstance(field, File):
+        return await get_file_page_positions(field)
+    return None
+
+
+async def get_extracted_data(field: Field) -> Optional[Any]:
+    if isinstance(field, File):
+        return await field.get_file_extracted_data()
+    if isinstance(field, Link):
+        return await field.get_link_extracted_data()
+    return None
+
+
+async def get_keywordset(field: Field) -> Optional[Any]:
+    if isinstance(field, Keywordset):
+        return await field.db_get_value()
+    return None
+
+
 async def get_file_page_positions(field: File) -> FilePagePositions:
     positions: FilePagePositions = {}
     file_extracted_data = await field.get_file_extracted_data()
@@ -19,6 +19,8 @@
 #
 from __future__ import annotations
 
+import asyncio
+import time
 import uuid
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -36,10 +38,12 @@ from nucliadb_protos.writer_pb2 import ShardObject as PBShard
 from nucliadb.ingest import SERVICE_NAME  # type: ignore
 from nucliadb.ingest.orm import NODES
 from nucliadb.ingest.orm.abc import AbstractShard, ShardCounter
+from nucliadb.ingest.settings import settings
 from nucliadb.sentry import SENTRY
 from nucliadb_utils.utilities import get_indexing, get_storage
 
 SHARDS = LRU(100)
+COUNTERS = LRU(1000)  # sharduuid -> (expiration, ShardCounter)
 
 
 class Shard(AbstractShard):
@@ -63,6 +67,7 @@ class Shard(AbstractShard):
     async def delete_resource(self, uuid: str, txid: int):
         indexing = get_indexing()
 
+        indexpbs = []
         for replica_id, node_id in self.indexing_replicas():
             indexpb: IndexMessage = IndexMessage()
             indexpb.node = node_id
@@ -70,7 +75,8 @@ class Shard(AbstractShard):
             indexpb.txid = txid
             indexpb.resource = uuid
             indexpb.typemessage = IndexMessage.TypeMessage.DELETION
-            await indexing.index(indexpb, node_id)
+            indexpbs.append(indexpb)
+        await asyncio.gather(*[indexing.index(pb, pb.node) for pb in indexpbs])
 
     async def add_resource(
         self, resource: PBBrainResource, txid: int, reindex_id: Optional[str] = None
@@ -83,32 +89,67 @@ class Shard(AbstractShard):
         storage = await get_storage(service_name=SERVICE_NAME)
         indexing = get_indexing()
 
-        indexpb: IndexMessage
-
-        shard_counter: Optional[ShardCounter] = None
+        replicas = self.indexing_replicas()
+        if len(replicas) == 0:
+            return None
 
-        for replica_id, node_id in self.indexing_replicas():
-            resource.shard_id = resource.resource.shard_id = replica_id
-            if reindex_id is not None:
-                indexpb = await storage.reindexing(
-                    resource, node_id, replica_id, reindex_id
-                )
-            else:
-                indexpb = await storage.indexing(resource, node_id, replica_id, txid)
+        # The brain is serialized and uploaded only once. The rest of replicas
+        # get a storage side copy of it, nodes take the shard from the IndexMessage
+        replica_id, node_id = replicas[0]
+        resource.shard_id = resource.resource.shard_id = replica_id
+        indexpb: IndexMessage
+        if reindex_id is not None:
+            indexpb = await storage.reindexing(
+                resource, node_id, replica_id, reindex_id
+            )
+        else:
+            indexpb = await storage.indexing(resource, node_id, replica_id, txid)
+
+        indexpbs = [indexpb]
+        indexpbs.extend(
+            await asyncio.gather(
+                *[
+                    storage.copy_indexing(indexpb, node_id, replica_id)
+                    for replica_id, node_id in replicas[1:]
+                ]
+            )
+        )
+
+        _, shard_counter = await asyncio.gather(
+            asyncio.gather(*[indexing.index(pb, pb.node) for pb in indexpbs]),
+            self.get_counter(),
+        )
+        return shard_counter
 
-            await indexing.index(indexpb, node_id)
+    async def get_counter(self) -> Optional[ShardCounter]:
+        """
+        Counters are refreshed from the first replica that answers at most once
+        every `shard_counter_ttl` seconds. Indexing is asynchronous, so they
+        were already behind the latest writes anyway.
+        """
+        cached = COUNTERS.get(self.sharduuid)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
 
+        for shardreplica in self.shard.replicas:
             try:
-                counter: Counter = await NODES[node_id].sidecar.GetCount(ShardId(id=replica_id))  # type: ignore
-                shard_counter = ShardCounter(
-                    shard=self.sharduuid,
-                    fields=counter.resources,
-                    paragraphs=counter.paragraphs,
-                )
+                counter: Counter = await NODES[shardreplica.node].sidecar.GetCount(ShardId(id=shardreplica.shard.id))  # type: ignore
             except Exception as exc:
                 if SENTRY:
                     sentry_sdk.capture_exception(exc)
-        return shard_counter
+                continue
+            shard_counter = ShardCounter(
+                shard=self.sharduuid,
+                fields=counter.resources,
+                paragraphs=counter.paragraphs,
+            )
+            COUNTERS[self.sharduuid] = (
+                time.monotonic() + settings.shard_counter_ttl,
+                shard_counter,
+            )
+            return shard_counter
+
+        return cached[1] if cached is not None else None
 
     async def clean_and_upgrade(self) -> Dict[str, PBShardCleaned]:
         replicas_cleaned: Dict[str, PBShardCleaned] = {}
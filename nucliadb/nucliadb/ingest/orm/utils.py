@@ -17,8 +17,10 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import urllib.parse
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
 
 from nucliadb_protos.resources_pb2 import (
     Basic,
@@ -70,6 +72,16 @@ async def get_basic(txn: Transaction, kbid: str, uuid: str) -> Optional[bytes]:
     return raw_basic
 
 
+async def get_basics(
+    txn: Transaction, kbid: str, uuids: List[str]
+) -> List[Optional[bytes]]:
+    if ingest_settings.driver == "local":
+        key = KB_RESOURCE_BASIC_FS
+    else:
+        key = KB_RESOURCE_BASIC
+    return await txn.batch_get([key.format(kbid=kbid, uuid=uuid) for uuid in uuids])
+
+
 def set_title(writer: BrokerMessage, toprocess: PushPayload, title: str):
     title = urllib.parse.unquote(title)
     writer.basic.title = title
@@ -92,3 +104,26 @@ def set_title(writer: BrokerMessage, toprocess: PushPayload, title: str):
 
 def compute_paragraph_key(rid: str, paragraph_key: str) -> str:
     return paragraph_key.replace("N_RID", rid)
+
+
+class KeyLocks:
+    """
+    One lock per key, dropped once nobody is holding or waiting for it
+    """
+
+    def __init__(self):
+        self.locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def lock(self, key: str):
+        lock, users = self.locks.get(key, (asyncio.Lock(), 0))
+        self.locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self.locks[key]
+            if users == 1:
+                del self.locks[key]
+            else:
+                self.locks[key] = (lock, users - 1)
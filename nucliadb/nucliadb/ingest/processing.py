@@ -17,12 +17,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
+import asyncio
 import base64
 import datetime
 import uuid
 from contextlib import AsyncExitStack
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 import aiohttp
 import jwt  # type: ignore
@@ -42,6 +43,9 @@ else:
     SourceValue = int
 
 
+BATCH_PUSH_CONCURRENCY = 10
+
+
 class Source(SourceValue, Enum):  # type: ignore
     HTTP = 0
     INGEST = 1
@@ -368,3 +372,21 @@ class ProcessingEngine:
         return ProcessingInfo(
             seqid=seqid, account_seq=account_seq, queue=QueueType(queue_type)
         )
+
+    async def send_batch_to_process(
+        self, items: List[PushPayload]
+    ) -> List[Union[ProcessingInfo, Exception]]:
+        """
+        Pushes all the payloads sharing the same session, each one with the
+        partition it was created with. Results are in the same order, with
+        the exception raised in place of the ones that could not be pushed.
+        """
+        semaphore = asyncio.Semaphore(BATCH_PUSH_CONCURRENCY)
+
+        async def push(item: PushPayload) -> ProcessingInfo:
+            async with semaphore:
+                return await self.send_to_process(item, item.partition)
+
+        return await asyncio.gather(
+            *[push(item) for item in items], return_exceptions=True
+        )
@@ -0,0 +1,339 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+import hashlib
+import logging
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import pydantic
+import pydantic_argparse
+from sentry_sdk import capture_exception
+
+from nucliadb.ingest import SERVICE_NAME, logger
+from nucliadb.ingest.maindb.driver import Driver, Transaction
+from nucliadb.ingest.orm.abc import AbstractShard, ShardCounter
+from nucliadb.ingest.orm.brain import ResourceBrain
+from nucliadb.ingest.orm.knowledgebox import KnowledgeBox, chunker
+from nucliadb.ingest.orm.processor import Processor
+from nucliadb.ingest.orm.resource import KB_RESOURCE_SLUG, KB_RESOURCE_SLUG_BASE
+from nucliadb.ingest.orm.utils import get_node_klass
+from nucliadb.ingest.settings import settings
+from nucliadb.ingest.utils import get_driver
+from nucliadb.sentry import SENTRY, set_sentry
+from nucliadb_utils.settings import running_settings
+from nucliadb_utils.utilities import get_cache, get_storage
+
+KB_REINDEX = "/kbs/{kbid}/reindex"
+KB_RESOURCE_INDEX_HASH = "/kbs/{kbid}/r/{uuid}/indexhash"
+
+# Slug keys read from maindb at once when listing the resources
+LIST_BATCH_SIZE = 500
+
+INDEXED = "indexed"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class ReindexCheckpoint(pydantic.BaseModel):
+    """
+    Progress of a knowledgebox reindex, stored in maindb after every chunk.
+    Resources are processed in uuid order, so `last` is enough to resume.
+    """
+
+    reindex_vectors: bool = True
+    total: int = 0
+    last: Optional[str] = None
+    indexed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    finished: bool = False
+
+    @property
+    def processed(self) -> int:
+        return self.indexed + self.skipped + self.failed
+
+
+class NodeRateLimiter:
+    """
+    Spaces out the indexing operations sent to every node so none of them
+    gets more than `rate` operations per second. A rate of 0 disables it.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot: Dict[str, float] = {}
+
+    async def wait(self, node_id: str):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self.next_slot.get(node_id, now))
+        self.next_slot[node_id] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def get_resource_shard(
+    proc: Processor, kbobj: KnowledgeBox, rid: str
+) -> AbstractShard:
+    """
+    Shard of the resource, assigning it to the current shard of the
+    knowledgebox (or a new one) if it had none.
+    """
+    shard_id = await kbobj.get_resource_shard_id(rid)
+    shard: Optional[AbstractShard] = None
+    if shard_id is not None:
+        shard = await kbobj.get_resource_shard(shard_id, get_node_klass())
+
+    if shard is None:
+        # Its a new resource
+        shard = await proc.get_or_create_kb_shard(kbobj)
+        await kbobj.set_resource_shard_id(rid, shard.sharduuid)
+    return shard
+
+
+def is_full(counter: Optional[ShardCounter]) -> bool:
+    return counter is not None and counter.fields > settings.max_node_fields
+
+
+async def add_resource_to_shard(
+    proc: Processor, kbobj: KnowledgeBox, shard: AbstractShard, brain: ResourceBrain
+):
+    counter = await shard.add_resource(brain.brain, 0, uuid.uuid4().hex)
+    if is_full(counter):
+        await proc.get_or_create_kb_shard(kbobj, full_shard=shard.sharduuid)
+
+
+def get_index_hash(brain: ResourceBrain) -> str:
+    return hashlib.sha256(brain.brain.SerializeToString(deterministic=True)).hexdigest()
+
+
+class KnowledgeBoxReindexer:
+    """
+    Reindexes every resource of a knowledgebox with bounded concurrency,
+    checkpointing its progress in maindb so an interrupted run resumes where
+    it stopped. Resources whose index message did not change since this job
+    last indexed them are skipped unless `force` is set.
+    """
+
+    def __init__(
+        self,
+        driver: Driver,
+        kbid: str,
+        reindex_vectors: bool = True,
+        force: bool = False,
+        restart: bool = False,
+        concurrency: Optional[int] = None,
+        node_rate: Optional[float] = None,
+    ):
+        self.driver = driver
+        self.kbid = kbid
+        self.reindex_vectors = reindex_vectors
+        self.force = force
+        self.restart = restart
+        self.concurrency = concurrency or settings.reindex_concurrency
+        self.limiter = NodeRateLimiter(
+            settings.reindex_node_rate if node_rate is None else node_rate
+        )
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def get_checkpoint(self) -> Optional[ReindexCheckpoint]:
+        txn = await self.driver.begin()
+        try:
+            payload = await txn.get(KB_REINDEX.format(kbid=self.kbid))
+        finally:
+            await txn.abort()
+        if payload is None:
+            return None
+        return ReindexCheckpoint.parse_raw(payload)
+
+    async def set_checkpoint(self, checkpoint: ReindexCheckpoint):
+        async with self.driver.transaction() as txn:
+            await txn.set(KB_REINDEX.format(kbid=self.kbid), checkpoint.json().encode())
+            await txn.commit(resource=False)
+
+    async def list_resources(self) -> List[str]:
+        txn = await self.driver.begin()
+        try:
+            base = KB_RESOURCE_SLUG_BASE.format(kbid=self.kbid)
+            keys = [
+                KB_RESOURCE_SLUG.format(kbid=self.kbid, slug=key.split("/")[-1])
+                async for key in txn.keys(base, count=-1)
+            ]
+            uuids = []
+            for batch in chunker(keys, LIST_BATCH_SIZE):
+                for rid in await txn.batch_get(batch):
+                    if rid is not None:
+                        uuids.append(rid.decode())
+        finally:
+            await txn.abort()
+        return sorted(uuids)
+
+    async def get_kb(self, txn: Transaction) -> KnowledgeBox:
+        storage = await get_storage(service_name=SERVICE_NAME)
+        cache = await get_cache()
+        return KnowledgeBox(txn, storage, cache, self.kbid)
+
+    async def run(self) -> ReindexCheckpoint:
+        checkpoint = await self.get_checkpoint()
+        if (
+            checkpoint is None
+            or checkpoint.finished
+            or self.restart
+            or checkpoint.reindex_vectors != self.reindex_vectors
+        ):
+            checkpoint = ReindexCheckpoint(reindex_vectors=self.reindex_vectors)
+        else:
+            logger.info(
+                f"Resuming reindex of {self.kbid} after {checkpoint.processed} resources"
+            )
+
+        uuids = await self.list_resources()
+        last = checkpoint.last
+        todo = [rid for rid in uuids if last is None or rid > last]
+        checkpoint.total = checkpoint.processed + len(todo)
+
+        # Shards are created the way ingest does, in their own transaction
+        # under the KB lock of the processor
+        storage = await get_storage(service_name=SERVICE_NAME)
+        proc = Processor(self.driver, storage)
+        for chunk in chunker(todo, self.concurrency * 4):
+            results = await asyncio.gather(
+                *[self.reindex_resource(proc, rid) for rid in chunk]
+            )
+            for result in results:
+                setattr(checkpoint, result, getattr(checkpoint, result) + 1)
+            checkpoint.last = chunk[-1]
+            await self.set_checkpoint(checkpoint)
+            logger.info(
+                f"Reindexing {self.kbid}: {checkpoint.processed}/{checkpoint.total} "
+                f"({checkpoint.indexed} indexed, {checkpoint.skipped} skipped, "
+                f"{checkpoint.failed} failed)"
+            )
+
+        checkpoint.finished = True
+        await self.set_checkpoint(checkpoint)
+        return checkpoint
+
+    async def reindex_resource(self, proc: Processor, rid: str) -> str:
+        async with self.semaphore:
+            try:
+                # Every resource has its own transaction, they run concurrently
+                async with self.driver.transaction() as txn:
+                    kbobj = await self.get_kb(txn)
+                    result = await self._reindex_resource(proc, txn, kbobj, rid)
+                    if result == INDEXED:
+                        await txn.commit(resource=False)
+                    return result
+            except Exception as exc:
+                if SENTRY:
+                    capture_exception(exc)
+                logger.exception(f"Error reindexing resource {self.kbid}/{rid}")
+                return FAILED
+
+    async def _reindex_resource(
+        self, proc: Processor, txn: Transaction, kbobj: KnowledgeBox, rid: str
+    ) -> str:
+        resobj = await kbobj.get(rid)
+        if resobj is None:
+            # Deleted since we listed it
+            return SKIPPED
+        resobj.disable_vectors = not self.reindex_vectors
+        brain = await resobj.generate_index_message()
+
+        index_hash = get_index_hash(brain)
+        hash_key = KB_RESOURCE_INDEX_HASH.format(kbid=self.kbid, uuid=rid)
+        if not self.force:
+            stored_hash = await txn.get(hash_key)
+            if stored_hash is not None and stored_hash.decode() == index_hash:
+                return SKIPPED
+
+        shard = await get_resource_shard(proc, kbobj, rid)
+        for replica in shard.shard.replicas:
+            await self.limiter.wait(replica.node)
+        await add_resource_to_shard(proc, kbobj, shard, brain)
+        await txn.set(hash_key, index_hash.encode())
+        return INDEXED
+
+
+class ReindexArguments(pydantic.BaseModel):
+    kbid: str = pydantic.Field(description="Knowledgebox to reindex")
+    reindex_vectors: bool = pydantic.Field(True, description="Reindex the vectors")
+    force: bool = pydantic.Field(
+        False, description="Reindex resources whose index did not change"
+    )
+    restart: bool = pydantic.Field(
+        False, description="Ignore the checkpoint of a previous run"
+    )
+    concurrency: int = pydantic.Field(
+        settings.reindex_concurrency, description="Resources reindexed at once"
+    )
+    node_rate: float = pydantic.Field(
+        settings.reindex_node_rate,
+        description="Max indexing operations per second on every node (0 disables it)",
+    )
+
+
+async def main(args: ReindexArguments) -> ReindexCheckpoint:
+    from nucliadb.ingest.app import start_indexing_utility, stop_indexing_utility
+
+    await start_indexing_utility(SERVICE_NAME)
+    driver = await get_driver()
+    storage = await get_storage(service_name=SERVICE_NAME)
+    try:
+        reindexer = KnowledgeBoxReindexer(
+            driver,
+            args.kbid,
+            reindex_vectors=args.reindex_vectors,
+            force=args.force,
+            restart=args.restart,
+            concurrency=args.concurrency,
+            node_rate=args.node_rate,
+        )
+        return await reindexer.run()
+    finally:
+        await storage.finalize()
+        await stop_indexing_utility()
+
+
+def run() -> int:
+    if running_settings.sentry_url and SENTRY:
+        set_sentry(
+            running_settings.sentry_url,
+            running_settings.running_environment,
+            running_settings.logging_integration,
+        )
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s.%(msecs)02d] [%(levelname)s] - %(name)s - %(message)s",
+        stream=sys.stderr,
+    )
+
+    parser = pydantic_argparse.ArgumentParser(
+        model=ReindexArguments,
+        prog="NucliaDB reindex",
+        description="Reindex all the resources of a knowledgebox",
+    )
+    checkpoint = asyncio.run(main(parser.parse_typed_args()))
+    return 0 if checkpoint.failed == 0 else 1
@@ -18,7 +18,8 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
-from typing import List, Optional
+from operator import methodcaller
+from typing import Any, Dict, List, Optional
 
 import nucliadb_models as models
 from nucliadb.ingest.fields.base import Field
@@ -27,7 +28,9 @@ from nucliadb.ingest.fields.file import File
 from nucliadb.ingest.fields.link import Link
 from nucliadb.ingest.maindb.driver import Transaction
 from nucliadb.ingest.orm.knowledgebox import KnowledgeBox
+from nucliadb.ingest.orm.resource import FieldLoader
 from nucliadb.ingest.orm.resource import Resource as ORMResource
+from nucliadb.ingest.orm.resource import get_extracted_data, load_fields_data
 from nucliadb.ingest.utils import get_driver
 from nucliadb_models.common import FIELD_TYPES_MAP, FieldTypeName
 from nucliadb_models.resource import (
@@ -57,17 +60,54 @@ from nucliadb_models.vectors import UserVectorSet
 from nucliadb_utils.utilities import get_cache, get_storage
 
 
+def extracted_data_loaders(
+    wanted_extracted_data: List[ExtractedDataTypeName],
+) -> Dict[str, FieldLoader]:
+    loaders: Dict[str, FieldLoader] = {}
+    if ExtractedDataTypeName.TEXT in wanted_extracted_data:
+        loaders["text"] = methodcaller("get_extracted_text")
+    if (
+        ExtractedDataTypeName.METADATA in wanted_extracted_data
+        or ExtractedDataTypeName.SHORTENED_METADATA in wanted_extracted_data
+    ):
+        loaders["metadata"] = methodcaller("get_field_metadata")
+    if ExtractedDataTypeName.LARGE_METADATA in wanted_extracted_data:
+        loaders["large_metadata"] = methodcaller("get_large_field_metadata")
+    if ExtractedDataTypeName.VECTOR in wanted_extracted_data:
+        loaders["vectors"] = methodcaller("get_vectors")
+    if ExtractedDataTypeName.USERVECTORS in wanted_extracted_data:
+        loaders["user_vectors"] = methodcaller("get_user_vectors")
+    if (
+        ExtractedDataTypeName.FILE in wanted_extracted_data
+        or ExtractedDataTypeName.LINK in wanted_extracted_data
+    ):
+        loaders["extracted_data"] = get_extracted_data
+    return loaders
+
+
 async def set_resource_field_extracted_data(
     field: Field,
     field_data: ExtractedDataType,
     field_type_name: FieldTypeName,
     wanted_extracted_data: List[ExtractedDataTypeName],
+    data: Optional[Dict[str, Any]] = None,
 ) -> None:
+    """
+    `data` holds the field data already loaded with `extracted_data_loaders`,
+    otherwise it is loaded here.
+    """
     if field_data is None:
         return
 
+    if data is None:
+        loaded = await load_fields_data(
+            {(field.type, field.id): field},
+            extracted_data_loaders(wanted_extracted_data),
+        )
+        data = loaded[(field.type, field.id)]
+
     if ExtractedDataTypeName.TEXT in wanted_extracted_data:
-        data_et = await field.get_extracted_text()
+        data_et = data["text"]
         if data_et is not None:
             field_data.text = models.ExtractedText.from_message(data_et)
 
@@ -76,7 +116,7 @@ async def set_resource_field_extracted_data(
         ExtractedDataTypeName.SHORTENED_METADATA in wanted_extracted_data
     )
     if metadata_wanted or shortened_metadata_wanted:
-        data_fcm = await field.get_field_metadata()
+        data_fcm = data["metadata"]
 
         if data_fcm is not None:
             field_data.metadata = models.FieldComputedMetadata.from_message(
@@ -84,19 +124,19 @@ async def set_resource_field_extracted_data(
             )
 
     if ExtractedDataTypeName.LARGE_METADATA in wanted_extracted_data:
-        data_lcm = await field.get_large_field_metadata()
+        data_lcm = data["large_metadata"]
         if data_lcm is not None:
             field_data.large_metadata = models.LargeComputedMetadata.from_message(
                 data_lcm
             )
 
     if ExtractedDataTypeName.VECTOR in wanted_extracted_data:
-        data_vec = await field.get_vectors()
+        data_vec = data["vectors"]
         if data_vec is not None:
             field_data.vectors = models.VectorObject.from_message(data_vec)
 
     if ExtractedDataTypeName.USERVECTORS in wanted_extracted_data:
-        user_data_vec = await field.get_user_vectors()
+        user_data_vec = data["user_vectors"]
         if user_data_vec is not None:
             field_data.uservectors = UserVectorSet.from_message(user_data_vec)
 
@@ -105,7 +145,7 @@ async def set_resource_field_extracted_data(
         and isinstance(field_data, FileFieldExtractedData)
         and ExtractedDataTypeName.FILE in wanted_extracted_data
     ):
-        data_fed = await field.get_file_extracted_data()
+        data_fed = data["extracted_data"]
         if data_fed is not None:
             field_data.file = models.FileExtractedData.from_message(data_fed)
 
@@ -114,11 +154,17 @@ async def set_resource_field_extracted_data(
         and isinstance(field_data, LinkFieldExtractedData)
         and ExtractedDataTypeName.LINK in wanted_extracted_data
     ):
-        data_led = await field.get_link_extracted_data()
+        data_led = data["extracted_data"]
         if data_led is not None:
             field_data.link = models.LinkExtractedData.from_message(data_led)
 
 
+async def get_serialized_value(field: Field) -> Any:
+    if isinstance(field, Conversation):
+        return await field.get_metadata()
+    return await field.get_value()
+
+
 async def serialize(
     kbid: str,
     rid: Optional[str],
@@ -211,14 +257,27 @@ async def serialize(
     if field_type_filter and (include_values or include_extracted_data):
         await orm_resource.get_fields()
         resource.data = ResourceData()
-        for (field_type, field_id), field in orm_resource.fields.items():
+        include_value = ResourceProperties.VALUES in show
+        loaders: Dict[str, FieldLoader] = {}
+        if include_value:
+            loaders["value"] = get_serialized_value
+        if include_errors:
+            loaders["error"] = methodcaller("get_error")
+        if include_extracted_data:
+            loaders.update(extracted_data_loaders(extracted))
+        fields = {
+            field_key: field
+            for field_key, field in orm_resource.fields.items()
+            if FIELD_TYPES_MAP[field_key[0]] in field_type_filter
+        }
+        # All the field data is read concurrently before serializing it
+        fields_data = await load_fields_data(fields, loaders)
+
+        for (field_type, field_id), field in fields.items():
             field_type_name = FIELD_TYPES_MAP[field_type]
-            if field_type_name not in field_type_filter:
-                continue
-
-            include_value = ResourceProperties.VALUES in show
+            data = fields_data[(field_type, field_id)]
             if include_value:
-                value = await field.get_value()
+                value = data["value"]
 
             if field_type_name is FieldTypeName.TEXT:
                 if resource.data.texts is None:
@@ -230,7 +289,7 @@ async def serialize(
                         value
                     )
                 if include_errors:
-                    error = await field.get_error()
+                    error = data["error"]
                     if error is not None:
                         resource.data.texts[field.id].error = Error(
                             body=error.error, code=error.code
@@ -242,6 +301,7 @@ async def serialize(
                         resource.data.texts[field.id].extracted,
                         field_type_name,
                         extracted,
+                        data,
                     )
 
             if field_type_name is FieldTypeName.FILE:
@@ -255,7 +315,7 @@ async def serialize(
                     )
 
                 if include_errors:
-                    error = await field.get_error()
+                    error = data["error"]
                     if error is not None:
                         resource.data.files[field.id].error = Error(
                             body=error.error, code=error.code
@@ -268,6 +328,7 @@ async def serialize(
                         resource.data.files[field.id].extracted,
                         field_type_name,
                         extracted,
+                        data,
                     )
 
             if field_type_name is FieldTypeName.LINK:
@@ -281,7 +342,7 @@ async def serialize(
                     )
 
                 if include_errors:
-                    error = await field.get_error()
+                    error = data["error"]
                     if error is not None:
                         resource.data.links[field.id].error = Error(
                             body=error.error, code=error.code
@@ -294,6 +355,7 @@ async def serialize(
                         resource.data.links[field.id].extracted,
                         field_type_name,
                         extracted,
+                        data,
                     )
 
             if field_type_name is FieldTypeName.LAYOUT:
@@ -306,7 +368,7 @@ async def serialize(
                         field.id
                     ].value = models.FieldLayout.from_message(value)
                 if include_errors:
-                    error = await field.get_error()
+                    error = data["error"]
                     if error is not None:
                         resource.data.layouts[field.id].error = Error(
                             body=error.error, code=error.code
@@ -320,6 +382,7 @@ async def serialize(
                         resource.data.layouts[field.id].extracted,
                         field_type_name,
                         extracted,
+                        data,
                     )
 
             if field_type_name is FieldTypeName.CONVERSATION:
@@ -328,13 +391,12 @@ async def serialize(
                 if field.id not in resource.data.conversations:
                     resource.data.conversations[field.id] = ConversationFieldData()
                 if include_errors:
-                    error = await field.get_error()
+                    error = data["error"]
                     if error is not None:
                         resource.data.conversations[field.id].error = Error(
                             body=error.error, code=error.code
                         )
                 if include_value and isinstance(field, Conversation):
-                    value = await field.get_metadata()
                     resource.data.conversations[
                         field.id
                     ].value = models.FieldConversation.from_message(value)
@@ -347,6 +409,7 @@ async def serialize(
                         resource.data.conversations[field.id].extracted,
                         field_type_name,
                         extracted,
+                        data,
                     )
 
             if field_type_name is FieldTypeName.DATETIME:
@@ -355,7 +418,7 @@ async def serialize(
                 if field.id not in resource.data.datetimes:
                     resource.data.datetimes[field.id] = DatetimeFieldData()
                 if include_errors:
-                    error = await field.get_error()
+                    error = data["error"]
                     if error is not None:
                         resource.data.datetimes[field.id].error = Error(
                             body=error.error, code=error.code
@@ -373,6 +436,7 @@ async def serialize(
                         resource.data.datetimes[field.id].extracted,
                         field_type_name,
                         extracted,
+                        data,
                     )
 
             if field_type_name is FieldTypeName.KEYWORDSET:
@@ -381,7 +445,7 @@ async def serialize(
                 if field.id not in resource.data.keywordsets:
                     resource.data.keywordsets[field.id] = KeywordsetFieldData()
                 if include_errors:
-                    error = await field.get_error()
+                    error = data["error"]
                     if error is not None:
                         resource.data.keywordsets[field.id].error = Error(
                             body=error.error, code=error.code
@@ -399,6 +463,7 @@ async def serialize(
                         resource.data.keywordsets[field.id].extracted,
                         field_type_name,
                         extracted,
+                        data,
                     )
     await txn.abort()
     return resource
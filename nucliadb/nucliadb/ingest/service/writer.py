@@ -17,7 +17,6 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
-import uuid
 from io import BytesIO
 from typing import AsyncIterator, Optional
 
@@ -98,16 +97,16 @@ from nucliadb.ingest.orm.entities import EntitiesManager
 from nucliadb.ingest.orm.exceptions import KnowledgeBoxConflict, KnowledgeBoxNotFound
 from nucliadb.ingest.orm.knowledgebox import KnowledgeBox as KnowledgeBoxORM
 from nucliadb.ingest.orm.knowledgebox import KnowledgeBox as KnowledgeBoxObj
+from nucliadb.ingest.orm.knowledgebox import invalidate_kb_cache
 from nucliadb.ingest.orm.node import Node
 from nucliadb.ingest.orm.processor import Processor
 from nucliadb.ingest.orm.resource import Resource as ResourceORM
-from nucliadb.ingest.orm.shard import Shard
 from nucliadb.ingest.orm.utils import get_node_klass
+from nucliadb.ingest.reindex import add_resource_to_shard, get_resource_shard
 from nucliadb.ingest.settings import settings
 from nucliadb.ingest.utils import get_driver
 from nucliadb.sentry import SENTRY
 from nucliadb_protos import writer_pb2_grpc
-from nucliadb_utils.cache import KB_COUNTER_CACHE
 from nucliadb_utils.keys import KB_SHARDS
 from nucliadb_utils.storages.storage import Storage, StorageField
 from nucliadb_utils.utilities import (
@@ -165,6 +164,7 @@ class WriterServicer(writer_pb2_grpc.WriterServicer):
             key = KB_SHARDS.format(kbid=request.uuid)
             await txn.set(key, updated_shards.SerializeToString())
             await txn.commit(resource=False)
+            await invalidate_kb_cache(request.uuid)
             return CleanedKnowledgeBoxResponse()
         except Exception as e:
             if SENTRY:
@@ -272,7 +272,6 @@ class WriterServicer(writer_pb2_grpc.WriterServicer):
         self, request_stream: AsyncIterator[BrokerMessage], context=None
     ):
         response = OpStatusWriter()
-        cache = await get_cache()
         async for message in request_stream:
             try:
                 await self.proc.process(
@@ -284,10 +283,6 @@ class WriterServicer(writer_pb2_grpc.WriterServicer):
                 break
             response.status = OpStatusWriter.Status.OK
             logger.info(f"Processed {message.uuid}")
-            if cache is not None:
-                await cache.delete(
-                    KB_COUNTER_CACHE.format(kbid=message.kbid), invalidate=True
-                )
         return response
 
     async def SetLabels(self, request: SetLabelsRequest, context=None) -> OpStatusWriter:  # type: ignore
@@ -774,34 +769,10 @@ class WriterServicer(writer_pb2_grpc.WriterServicer):
             resobj.disable_vectors = not request.reindex_vectors
 
             brain = await resobj.generate_index_message()
-            shard_id = await kbobj.get_resource_shard_id(request.rid)
-            shard: Optional[Shard] = None
-            node_klass = get_node_klass()
-            if shard_id is not None:
-                shard = await kbobj.get_resource_shard(shard_id, node_klass)
-
-            if shard is None:
-                # Its a new resource
-                # Check if we have enough resource to create a new shard
-                shard = await node_klass.actual_shard(txn, request.kbid)
-                if shard is None:
-                    similarity = await kbobj.get_similarity()
-                    shard = await node_klass.create_shard_by_kbid(
-                        txn, request.kbid, similarity=similarity
-                    )
-
-                await kbobj.set_resource_shard_id(request.rid, shard.sharduuid)
-
-            if shard is not None:
-                logger.info("Calling shard.add_resource")
-                counter = await shard.add_resource(brain.brain, 0, uuid.uuid4().hex)
-                logger.info("Finished shard.add_resource")
-
-                if counter is not None and counter.fields > settings.max_node_fields:
-                    similarity = await kbobj.get_similarity()
-                    shard = await node_klass.create_shard_by_kbid(
-                        txn, request.kbid, similarity=similarity
-                    )
+            shard = await get_resource_shard(self.proc, kbobj, request.rid)
+            logger.info("Calling shard.add_resource")
+            await add_resource_to_shard(self.proc, kbobj, shard, brain)
+            logger.info("Finished shard.add_resource")
 
             response = IndexStatus()
             await txn.abort()
@@ -890,6 +861,7 @@ class WriterServicer(writer_pb2_grpc.WriterServicer):
                 txn, request.kbid, request.node, request.replica.id
             )
             await txn.commit(resource=False)
+            await invalidate_kb_cache(request.kbid)
             response.success = True
         except Exception as e:
             event_id: Optional[str] = None
@@ -910,6 +882,7 @@ class WriterServicer(writer_pb2_grpc.WriterServicer):
             txn = await self.proc.driver.begin()
             await node_klass.delete_shadow_shard(txn, request.kbid, request.replica.id)
             await txn.commit(resource=False)
+            await invalidate_kb_cache(request.kbid)
             response.success = True
         except Exception as exc:
             event_id: Optional[str] = None
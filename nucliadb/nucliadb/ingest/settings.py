@@ -39,6 +39,9 @@ class Settings(BaseSettings):
 
     pull_time: int = 100
 
+    # Messages of different resources processed concurrently on each partition
+    partition_concurrency: int = 1
+
     replica_number: int = -1
     total_replicas: int = 1
     nuclia_partitions: int = 50
@@ -73,6 +76,20 @@ class Settings(BaseSettings):
     max_node_fields: int = 200000
     max_node_shards: int = 600
 
+    # Knowledgebox reindex job: resources reindexed at once and max indexing
+    # operations per second sent to every node (0 disables the limit)
+    reindex_concurrency: int = 10
+    reindex_node_rate: float = 20.0
+
+    # Concurrent blob uploads while applying a processed message
+    blob_upload_concurrency: int = 10
+
+    # Concurrent field data reads (mostly blob downloads) of a resource
+    field_load_concurrency: int = 20
+
+    # Seconds shard counters are cached after asking the node sidecar
+    shard_counter_ttl: float = 10.0
+
     local_reader_threads = 5
     local_writer_threads = 5
 
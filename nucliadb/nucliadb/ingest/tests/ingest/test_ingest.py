@@ -17,6 +17,7 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
+import asyncio
 import base64
 import traceback
 import uuid
@@ -50,6 +51,7 @@ from nucliadb_protos.writer_pb2 import BrokerMessage
 from nucliadb.ingest import SERVICE_NAME
 from nucliadb.ingest.orm.knowledgebox import KnowledgeBox
 from nucliadb.ingest.orm.resource import Resource
+from nucliadb.ingest.orm.utils import get_node_klass
 from nucliadb_utils.audit.stream import StreamAuditStorage
 from nucliadb_utils.storages.storage import Storage
 from nucliadb_utils.utilities import Utility, get_indexing, get_storage, set_utility
@@ -609,3 +611,38 @@ async def test_ingest_txn_missing_kb(
         ), f"Processing should not fail due to a missing Knowledgebox:\n\n{str(traceback.format_exc())}"
 
     await txn.abort()
+
+
+@pytest.mark.asyncio
+async def test_ingest_concurrent_resources_share_kb_shard(
+    local_files,
+    gcs_storage: Storage,
+    txn,
+    cache,
+    fake_node,
+    processor,
+    redis_driver,
+    knowledgebox_ingest,
+):
+    kbid = knowledgebox_ingest
+    messages = [
+        make_message(kbid, str(uuid4()), slug=f"resource-{i}") for i in range(2)
+    ]
+    await asyncio.gather(
+        *[
+            processor.process(message=message, seqid=seqid, transaction_check=False)
+            for seqid, message in enumerate(messages, start=1)
+        ]
+    )
+
+    kb_shards = await get_node_klass().get_all_shards(txn, kbid)
+    assert kb_shards is not None
+    assert len(kb_shards.shards) == 1
+
+    kb_obj = KnowledgeBox(txn, gcs_storage, cache, kbid=kbid)
+    for message in messages:
+        shard_id = await kb_obj.get_resource_shard_id(message.uuid)
+        assert shard_id == kb_shards.shards[0].shard
+    assert await KnowledgeBox.get_resources_count(txn, kbid) == 2
+
+    await txn.abort()
@@ -19,6 +19,7 @@
 #
 import pytest
 
+from nucliadb.ingest.maindb.exceptions import InvalidCursor
 from nucliadb.ingest.maindb.redis import RedisDriver
 from nucliadb.ingest.maindb.tikv import TiKVDriver
 
@@ -69,8 +70,34 @@ async def driver_basic(driver):
     assert result == b"My title"
 
     result = await txn.batch_get(
-        ["/kbs/kb1/r/uuid1/text", "/internal/kbs/kb1/shards/shard1"]
+        [
+            "/internal/kbs/kb1/shards/shard1",
+            "/i/do/not/exist",
+            "/kbs/kb1/r/uuid1/text",
+        ]
     )
+    assert result == [b"node1", None, b"My title"]
+    await txn.abort()
+
+    # Bulk writes are seen by the transaction and committed
+    txn = await driver.begin()
+    await txn.delete("/kbs/kb1/r/uuid2/text")
+    await txn.batch_set(
+        {"/kbs/kb1/r/uuid2/text": b"Second", "/kbs/kb1/r/uuid3/text": b"Third"}
+    )
+    result = await txn.batch_get(
+        ["/kbs/kb1/r/uuid3/text", "/kbs/kb1/r/uuid2/text", "/kbs/kb1/r/uuid3/text"]
+    )
+    assert result == [b"Third", b"Second", b"Third"]
+    await txn.commit(resource=False)
+
+    txn = await driver.begin()
+    result = await txn.batch_get(["/kbs/kb1/r/uuid2/text", "/kbs/kb1/r/uuid3/text"])
+    assert result == [b"Second", b"Third"]
+    # Keys deleted in the transaction are missing
+    await txn.delete("/kbs/kb1/r/uuid2/text")
+    result = await txn.batch_get(["/kbs/kb1/r/uuid2/text", "/kbs/kb1/r/uuid3/text"])
+    assert result == [None, b"Third"]
     await txn.abort()
 
     current_internal_kbs_keys = set()
@@ -133,6 +160,8 @@ async def driver_basic(driver):
 
     await _test_keys_async_generator(driver)
 
+    await _test_scan_page(driver)
+
     await _test_transaction_context_manager(driver)
 
     await driver.finalize()
@@ -152,6 +181,28 @@ async def _test_keys_async_generator(driver):
     await txn.abort()
 
 
+async def _test_scan_page(driver):
+    txn = await driver.begin()
+    for i in range(7):
+        await txn.set(f"/pages/{i}", str(i).encode())
+    await txn.commit(resource=False)
+
+    txn = await driver.begin()
+    keys = []
+    cursor = None
+    while True:
+        page, cursor = await txn.scan_page("/pages/", cursor, count=3)
+        assert len(page) <= 3
+        keys.extend(page)
+        if cursor is None:
+            break
+    assert set(keys) == {f"/pages/{i}" for i in range(7)}
+
+    with pytest.raises(InvalidCursor):
+        await txn.scan_page("/pages/", "not a cursor", count=3)
+    await txn.abort()
+
+
 async def _test_transaction_context_manager(driver):
     # It should abort the transaction if there are uncommited changes
     async with driver.transaction() as txn:
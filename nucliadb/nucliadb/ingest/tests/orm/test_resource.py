@@ -17,12 +17,14 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
-from unittest.mock import AsyncMock
+import asyncio
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 from nucliadb_protos.resources_pb2 import FileExtractedData, PagePositions
 
-from nucliadb.ingest.orm.resource import get_file_page_positions
+from nucliadb.ingest.orm.resource import get_file_page_positions, load_fields_data
+from nucliadb.ingest.settings import settings
 
 
 @pytest.mark.asyncio
@@ -35,3 +37,25 @@ async def test_get_file_page_positions():
         get_file_extracted_data=AsyncMock(return_value=extracted_data)
     )
     assert await get_file_page_positions(file_field) == {0: (0, 10), 1: (11, 20)}
+
+
+@pytest.mark.asyncio
+async def test_load_fields_data_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "field_load_concurrency", 2)
+    running = 0
+    max_running = 0
+
+    async def loader(field):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return field.id
+
+    fields = {(1, f"field{index}"): Mock(id=f"field{index}") for index in range(5)}
+    fields_data = await load_fields_data(fields, {"a": loader, "b": loader})
+
+    assert max_running == 2
+    assert list(fields_data.keys()) == list(fields.keys())
+    assert fields_data[(1, "field3")] == {"a": "field3", "b": "field3"}
@@ -18,19 +18,26 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
-import json
-
 import pytest
 from nucliadb_protos.writer_pb2 import BrokerMessage, OpStatusWriter
 
+from nucliadb.ingest.orm.knowledgebox import KnowledgeBox
 from nucliadb.ingest.tests.fixtures import IngestFixture
+from nucliadb.ingest.utils import get_driver
 from nucliadb_protos import knowledgebox_pb2, writer_pb2_grpc
-from nucliadb_utils.cache import KB_COUNTER_CACHE
-from nucliadb_utils.utilities import get_cache
+
+
+async def get_resources_count(kbid: str):
+    driver = await get_driver()
+    txn = await driver.begin()
+    try:
+        return await KnowledgeBox.get_resources_count(txn, kbid)
+    finally:
+        await txn.abort()
 
 
 @pytest.mark.asyncio
-async def test_process_message_clears_counters_cache(grpc_servicer: IngestFixture):
+async def test_process_message_updates_resources_counter(grpc_servicer: IngestFixture):
     stub = writer_pb2_grpc.WriterStub(grpc_servicer.channel)
 
     # Create a new KB
@@ -39,24 +46,7 @@ async def test_process_message_clears_counters_cache(grpc_servicer: IngestFixtur
     result: knowledgebox_pb2.NewKnowledgeBoxResponse = await stub.NewKnowledgeBox(pb)  # type: ignore
     assert result.status == knowledgebox_pb2.KnowledgeBoxResponseStatus.OK
     kbid = result.uuid
-
-    # Set some values in the KB counters cache
-    cache = await get_cache()
-    assert cache is not None
-    kb_counters_key = KB_COUNTER_CACHE.format(kbid=kbid)
-    await cache.set(
-        kb_counters_key,
-        json.dumps(
-            {
-                "resources": 100,
-                "paragraphs": 100,
-                "fields": 100,
-                "sentences": 100,
-                "shards": [],
-            }
-        ),
-    )
-    assert await cache.get(kb_counters_key)
+    assert await get_resources_count(kbid) == 0
 
     # Create a BM to process
     bm = BrokerMessage()
@@ -65,9 +55,17 @@ async def test_process_message_clears_counters_cache(grpc_servicer: IngestFixtur
     bm.kbid = kbid
     bm.texts["text1"].body = "My text1"
 
-    # Check that the cache is currently empty
     resp = await stub.ProcessMessage([bm])  # type: ignore
     assert resp.status == OpStatusWriter.Status.OK
+    assert await get_resources_count(kbid) == 1
 
-    # Check that KB counters cache is empty
-    assert await cache.get(kb_counters_key) is None
+    # Modifying the resource does not count it again
+    bm.texts["text2"].body = "My text2"
+    resp = await stub.ProcessMessage([bm])  # type: ignore
+    assert resp.status == OpStatusWriter.Status.OK
+    assert await get_resources_count(kbid) == 1
+
+    delete = BrokerMessage(kbid=kbid, uuid="test1", type=BrokerMessage.DELETE)
+    resp = await stub.ProcessMessage([delete])  # type: ignore
+    assert resp.status == OpStatusWriter.Status.OK
+    assert await get_resources_count(kbid) == 0
@@ -24,6 +24,7 @@ from nucliadb_protos.resources_pb2 import ExtractedVectorsWrapper, FieldType
 from nucliadb_protos.utils_pb2 import Vector
 from nucliadb_protos.writer_pb2 import BrokerMessage, IndexResource
 
+from nucliadb.ingest.reindex import KnowledgeBoxReindexer
 from nucliadb_protos import knowledgebox_pb2, writer_pb2_grpc
 
 
@@ -60,3 +61,39 @@ async def test_reindex_resource(grpc_servicer, fake_node):
     # Reindex it along with its vectors
     req = IndexResource(kbid=kb_id, rid=rid, reindex_vectors=True)
     result = await stub.ReIndex(req)
+
+
+@pytest.mark.asyncio
+async def test_reindex_knowledgebox(grpc_servicer, fake_node):
+    stub = writer_pb2_grpc.WriterStub(grpc_servicer.channel)
+
+    kb_id = str(uuid4())
+    pb = knowledgebox_pb2.KnowledgeBoxNew(slug="test", forceuuid=kb_id)
+    pb.config.title = "My Title"
+    result = await stub.NewKnowledgeBox(pb)
+    assert result.status == knowledgebox_pb2.KnowledgeBoxResponseStatus.OK
+
+    bms = []
+    for index in range(3):
+        bm = BrokerMessage()
+        bm.uuid = f"test{index}"
+        bm.slug = f"test{index}"
+        bm.kbid = kb_id
+        bm.texts["text1"].body = f"My text {index}"
+        bms.append(bm)
+    await stub.ProcessMessage(bms)  # type: ignore
+
+    driver = grpc_servicer.servicer.proc.driver
+    checkpoint = await KnowledgeBoxReindexer(driver, kb_id).run()
+    assert checkpoint.finished
+    assert checkpoint.total == 3
+    assert checkpoint.indexed == 3
+    assert checkpoint.last == "test2"
+
+    # Nothing changed, so a new run does not index anything again
+    checkpoint = await KnowledgeBoxReindexer(driver, kb_id).run()
+    assert checkpoint.indexed == 0
+    assert checkpoint.skipped == 3
+
+    checkpoint = await KnowledgeBoxReindexer(driver, kb_id, force=True).run()
+    assert checkpoint.indexed == 3
@@ -0,0 +1,118 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from nucliadb_protos.writer_pb2 import BrokerMessage
+
+from nucliadb.ingest.consumer.pull import PullWorker, SeqidWatermark
+
+
+def test_watermark_waits_for_lowest_pending():
+    watermark = SeqidWatermark(10)
+    for seqid in (11, 12, 13):
+        watermark.start(seqid)
+
+    assert watermark.finish(13) is False
+    assert watermark.finish(12) is False
+    assert watermark.seqid == 10
+
+    assert watermark.finish(11) is True
+    assert watermark.seqid == 13
+
+
+def test_watermark_does_not_go_backwards():
+    watermark = SeqidWatermark(10)
+    watermark.start(10)
+    assert watermark.finish(10) is False
+    assert watermark.seqid == 10
+
+    watermark.start(11)
+    assert watermark.finish(11) is True
+    assert watermark.seqid == 11
+
+
+def test_watermark_failed_message_keeps_blocking():
+    watermark = SeqidWatermark()
+    watermark.start(1)
+    watermark.start(2)
+    # 1 failed and is still pending until redelivered
+    assert watermark.finish(2) is False
+    assert watermark.seqid is None
+
+    watermark.start(1)
+    assert watermark.finish(1) is True
+    assert watermark.seqid == 2
+
+
+def test_watermark_moves_past_stalled_message():
+    watermark = SeqidWatermark(max_finished=2)
+    for seqid in (1, 2, 3, 4):
+        watermark.start(seqid)
+
+    assert watermark.finish(2) is False
+    assert watermark.finish(3) is False
+    # 1 is never finished, the watermark stops waiting for it
+    assert watermark.finish(4) is True
+    assert watermark.seqid == 4
+    assert watermark.finished == []
+
+
+@pytest.mark.asyncio
+async def test_failed_message_blocks_next_messages_of_the_resource():
+    worker = PullWorker(
+        driver=MagicMock(set_last_seqid=AsyncMock()),
+        partition="1",
+        storage=MagicMock(),
+        pull_time=1,
+        zone="",
+        nuclia_cluster_url="",
+        nuclia_public_url="",
+        audit=None,
+        target="",
+        group="",
+        stream="",
+        onprem=False,
+        max_concurrency=2,
+    )
+    processed = []
+
+    async def handle_message(msg, seqid, pb):
+        processed.append(seqid)
+        if processed == [1]:
+            raise Exception()
+
+    worker.handle_message = handle_message  # type: ignore
+    pb = BrokerMessage(kbid="kbid", uuid="uuid")
+    msgs = {seqid: MagicMock(in_progress=AsyncMock()) for seqid in (1, 2)}
+    tasks = []
+    for seqid, msg in msgs.items():
+        await worker.semaphore.acquire()
+        worker.watermark.start(seqid)
+        tasks.append(
+            asyncio.create_task(worker.handle_concurrent_message(msg, seqid, pb))
+        )
+    await asyncio.gather(*tasks)
+
+    # 1 is retried before 2 gets the resource lock
+    assert processed == [1, 1, 2]
+    msgs[1].in_progress.assert_awaited_once()
+    assert worker.watermark.seqid == 2
@@ -0,0 +1,99 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Optional
+from unittest.mock import MagicMock
+
+import pytest
+from nucliadb_protos.resources_pb2 import ExtractedTextWrapper
+
+from nucliadb.ingest.fields.blobs import BlobWriteBuffer
+from nucliadb.ingest.fields.layout import Layout
+from nucliadb.ingest.fields.text import Text
+
+
+class StorageTest:
+    def __init__(self):
+        self.blobs = {}
+
+    def file_extracted(self, kbid, uuid, field_type, field, key):
+        return MagicMock(bucket="b", key=f"{kbid}/{uuid}/{field_type}/{field}/{key}")
+
+    async def uploadbytes(self, bucket, key, data):
+        self.blobs[key] = data
+
+    async def upload_pb(self, sf, payload):
+        await self.uploadbytes(sf.bucket, sf.key, payload.SerializeToString())
+
+    async def download_pb(self, sf, PBKlass):
+        data = self.blobs.get(sf.key)
+        if data is None:
+            return None
+        pb = PBKlass()
+        pb.ParseFromString(data)
+        return pb
+
+
+def resource(storage: StorageTest, blobs: Optional[BlobWriteBuffer]):
+    return MagicMock(
+        kb=MagicMock(kbid="kbid"), uuid="rid", storage=storage, blobs=blobs
+    )
+
+
+def extracted_text(text: str, **split_text: str) -> ExtractedTextWrapper:
+    payload = ExtractedTextWrapper()
+    payload.body.text = text
+    for key, value in split_text.items():
+        payload.body.split_text[key] = value
+    return payload
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("buffered", [False, True])
+async def test_set_and_get_extracted_text(buffered):
+    storage = StorageTest()
+    blobs = BlobWriteBuffer(storage, concurrency=2) if buffered else None  # type: ignore
+    field = Text("text1", resource(storage, blobs))
+
+    await field.set_extracted_text(extracted_text("My text"))
+    if blobs is not None:
+        await blobs.flush()
+
+    stored = Text("text1", resource(storage, None))
+    result = await stored.get_extracted_text()
+    assert result is not None
+    assert result.text == "My text"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("buffered", [False, True])
+async def test_set_extracted_text_merges_previous_subfields(buffered):
+    storage = StorageTest()
+    blobs = BlobWriteBuffer(storage, concurrency=2) if buffered else None  # type: ignore
+    field = Layout("layout1", resource(storage, blobs))
+
+    await field.set_extracted_text(extracted_text("", block1="first"))
+    # Reads the previous payload, waiting for its pending upload if buffered
+    await field.set_extracted_text(extracted_text("", block2="second"))
+    if blobs is not None:
+        await blobs.flush()
+
+    result = await field.get_extracted_text(force=True)
+    assert result is not None
+    assert dict(result.split_text) == {"block1": "first", "block2": "second"}
@@ -0,0 +1,71 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from nucliadb.ingest.fields.blobs import BlobWriteBuffer
+
+
+class StorageTest:
+    def __init__(self):
+        self.uploaded = []
+        self.running = 0
+        self.max_running = 0
+
+    async def uploadbytes(self, bucket, key, data):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.uploaded.append((key, data))
+        self.running -= 1
+
+
+def payload(data: bytes):
+    return MagicMock(SerializeToString=MagicMock(return_value=data))
+
+
+@pytest.mark.asyncio
+async def test_uploads_are_bounded_and_flushed():
+    storage = StorageTest()
+    blobs = BlobWriteBuffer(storage, concurrency=2)  # type: ignore
+    for i in range(6):
+        blobs.upload_pb(MagicMock(bucket="b", key=f"k{i}"), payload(b"data"))
+
+    await blobs.flush()
+
+    assert len(storage.uploaded) == 6
+    assert storage.max_running == 2
+    assert blobs.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_same_key_uploads_keep_order():
+    storage = StorageTest()
+    blobs = BlobWriteBuffer(storage, concurrency=5)  # type: ignore
+    sf = MagicMock(bucket="b", key="k")
+    blobs.upload_pb(sf, payload(b"first"))
+    blobs.upload_pb(sf, payload(b"second"))
+
+    await blobs.wait("k")
+
+    assert storage.uploaded == [("k", b"first"), ("k", b"second")]
+    await blobs.flush()
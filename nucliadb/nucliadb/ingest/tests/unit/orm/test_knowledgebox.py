@@ -0,0 +1,60 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from nucliadb_protos.resources_pb2 import Basic
+
+from nucliadb.ingest.orm.knowledgebox import KnowledgeBox
+
+
+@pytest.mark.asyncio
+async def test_get_many_skips_deleted_resources():
+    basics = {
+        rid: Basic(title=f"Title {rid}").SerializeToString() for rid in ("r1", "r3")
+    }
+    txn = Mock(
+        # r2 was deleted, and the basic of r4 is empty
+        batch_get=AsyncMock(
+            side_effect=lambda keys: [
+                basics.get(key.split("/")[4], b"" if "r4" in key else None)
+                for key in keys
+            ]
+        ),
+        get=AsyncMock(return_value=None),
+    )
+    kb = KnowledgeBox(txn, Mock(), None, "kbid")
+
+    resources = await kb.get_many(["r3", "r2", "r1", "r4"])
+
+    txn.batch_get.assert_awaited_once()
+    assert list(resources) == ["r3", "r1"]
+    assert resources["r1"].basic.title == "Title r1"
+    assert resources["r3"].basic.title == "Title r3"
+    assert resources["r1"].kb is kb
+
+
+@pytest.mark.asyncio
+async def test_get_many_without_resources():
+    txn = Mock(batch_get=AsyncMock())
+    kb = KnowledgeBox(txn, Mock(), None, "kbid")
+
+    assert await kb.get_many([]) == {}
+    txn.batch_get.assert_not_awaited()
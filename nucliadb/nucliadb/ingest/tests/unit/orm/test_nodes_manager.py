@@ -0,0 +1,152 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+from unittest import mock
+
+import pytest
+from nucliadb_protos.writer_pb2 import ShardObject, ShardReplica
+from nucliadb_protos.writer_pb2 import Shards as PBShards
+
+from nucliadb.ingest.orm import nodes_manager
+from nucliadb.ingest.orm.nodes_manager import (
+    NODE_STATS_HALF_LIFE,
+    NodesManager,
+    observe_node,
+)
+
+
+@pytest.fixture(scope="function")
+def nodes():
+    nodes = {node_id: mock.Mock(load_score=0.0) for node_id in ("node-0", "node-1")}
+    with mock.patch.object(nodes_manager, "NODES", new=nodes), mock.patch.object(
+        nodes_manager, "NODE_STATS", new={}
+    ):
+        yield nodes
+
+
+def _shard_object() -> ShardObject:
+    shard = ShardObject(shard="shard")
+    for node_id in ("node-0", "node-1"):
+        replica = ShardReplica(node=node_id)
+        replica.shard.id = f"{node_id}-shard"
+        shard.replicas.append(replica)
+    return shard
+
+
+def test_choose_nodes_prefers_faster_nodes(nodes):
+    observe_node("node-0", 1.0)
+    observe_node("node-1", 0.1)
+
+    manager = NodesManager(driver=mock.Mock(), cache=None)
+    replicas = manager.choose_nodes(_shard_object())
+    assert [node_id for _, _, node_id in replicas] == ["node-1", "node-0"]
+
+
+def test_choose_nodes_avoids_failing_and_loaded_nodes(nodes):
+    observe_node("node-0", 0.1, error=True)
+    observe_node("node-1", 0.1)
+    manager = NodesManager(driver=mock.Mock(), cache=None)
+    assert manager.choose_node(_shard_object())[2] == "node-1"
+
+    observe_node("node-0", 0.1)
+    nodes["node-1"].load_score = 100.0
+    assert manager.choose_node(_shard_object())[2] == "node-0"
+
+
+def test_choose_nodes_recovers_from_stale_latency_spikes(nodes):
+    observe_node("node-0", 10.0)
+    observe_node("node-1", 0.1)
+    manager = NodesManager(driver=mock.Mock(), cache=None)
+    assert manager.choose_node(_shard_object())[2] == "node-1"
+
+    # node-0 is not queried anymore, its stats decay toward the mean
+    nodes_manager.NODE_STATS["node-0"].updated -= 100 * NODE_STATS_HALF_LIFE
+    nodes["node-1"].load_score = 60.0
+    assert manager.choose_node(_shard_object())[2] == "node-0"
+
+
+def test_choose_nodes_uses_load_for_unobserved_nodes(nodes):
+    nodes["node-0"].load_score = 5.0
+    manager = NodesManager(driver=mock.Mock(), cache=None)
+    assert manager.choose_node(_shard_object())[2] == "node-1"
+
+    observe_node("node-1", 0.1)
+    nodes["node-1"].load_score = 10.0
+    assert manager.choose_node(_shard_object())[2] == "node-0"
+
+
+@pytest.mark.asyncio
+async def test_get_shards_by_kbid_is_cached():
+    shards = PBShards(kbid="kbid")
+    shards.shards.append(_shard_object())
+
+    cached = {}
+
+    async def get_or_load(key, loader):
+        if key not in cached:
+            cached[key] = await loader()
+        return cached[key]
+
+    cache = mock.Mock(get_or_load=get_or_load)
+    txn = mock.Mock(
+        get=mock.AsyncMock(return_value=shards.SerializeToString()),
+        abort=mock.AsyncMock(),
+    )
+    driver = mock.Mock(begin=mock.AsyncMock(return_value=txn))
+
+    manager = NodesManager(driver=driver, cache=cache)
+    assert await manager.get_shards_by_kbid_inner("kbid") == shards
+    assert await manager.get_shards_by_kbid_inner("kbid") == shards
+    txn.get.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_shards_by_rid():
+    shards = PBShards(kbid="kbid")
+    for shard_id in ("shard-0", "shard-1"):
+        shard = _shard_object()
+        shard.shard = shard_id
+        shards.shards.append(shard)
+
+    resource_shards = {"/kbs/kbid/r/rid/shard": b"shard-1"}
+    txn = mock.Mock(
+        get=mock.AsyncMock(side_effect=lambda key: resource_shards.get(key)),
+        abort=mock.AsyncMock(),
+    )
+    driver = mock.Mock(begin=mock.AsyncMock(return_value=txn))
+    manager = NodesManager(driver=driver, cache=None)
+    manager.get_shards_by_kbid_inner = mock.AsyncMock(return_value=shards)  # type: ignore
+
+    shard_groups = await manager.get_shards_by_rid("kbid", "rid")
+    assert [shard.shard for shard in shard_groups] == ["shard-1"]
+
+    # The resource shard is cached
+    await manager.get_shards_by_rid("kbid", "rid")
+    txn.get.assert_awaited_once()
+
+    # Unknown resources are searched everywhere
+    shard_groups = await manager.get_shards_by_rid("kbid", "other")
+    assert [shard.shard for shard in shard_groups] == ["shard-0", "shard-1"]
+
+    # Until it expires, as the resource may have been created again
+    resource_shards["/kbs/kbid/r/rid/shard"] = b"shard-0"
+    shard_id, _ = manager.resource_shards[("kbid", "rid")]
+    manager.resource_shards[("kbid", "rid")] = (shard_id, 0.0)
+    shard_groups = await manager.get_shards_by_rid("kbid", "rid")
+    assert [shard.shard for shard in shard_groups] == ["shard-0"]
@@ -0,0 +1,53 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import pytest
+
+from nucliadb.ingest import reindex
+from nucliadb.ingest.reindex import NodeRateLimiter
+
+
+@pytest.fixture(scope="function")
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(reindex.asyncio, "sleep", sleep)
+    yield delays
+
+
+@pytest.mark.asyncio
+async def test_node_rate_limiter_spaces_operations_per_node(sleeps):
+    limiter = NodeRateLimiter(rate=20)
+    for _ in range(3):
+        await limiter.wait("node1")
+    # Other nodes have their own budget
+    await limiter.wait("node2")
+    # The sleeps are not awaited, so every slot is relative to the start
+    assert sleeps == [pytest.approx(0.05, abs=0.01), pytest.approx(0.1, abs=0.01)]
+
+
+@pytest.mark.asyncio
+async def test_node_rate_limiter_disabled(sleeps):
+    limiter = NodeRateLimiter(rate=0)
+    for _ in range(100):
+        await limiter.wait("node1")
+    assert sleeps == []
@@ -18,3 +18,4 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 DEFAULT_RESOURCE_LIST_PAGE_SIZE = 20
+SERIALIZE_CONCURRENCY = 10
@@ -17,6 +17,9 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
+import asyncio
+import base64
+import binascii
 from typing import List, Literal, Optional, Union
 from typing import get_args as typing_get_args
 
@@ -26,13 +29,17 @@ from sentry_sdk import capture_exception
 
 import nucliadb_models as models
 from nucliadb.ingest.fields.conversation import Conversation
+from nucliadb.ingest.maindb.exceptions import InvalidCursor
 from nucliadb.ingest.orm.knowledgebox import KnowledgeBox as ORMKnowledgeBox
 from nucliadb.ingest.orm.resource import KB_RESOURCE_SLUG_BASE
 from nucliadb.ingest.orm.resource import Resource as ORMResource
 from nucliadb.ingest.serialize import serialize, set_resource_field_extracted_data
 from nucliadb.ingest.utils import get_driver
 from nucliadb.reader import SERVICE_NAME  # type: ignore
-from nucliadb.reader.api import DEFAULT_RESOURCE_LIST_PAGE_SIZE
+from nucliadb.reader.api import (
+    DEFAULT_RESOURCE_LIST_PAGE_SIZE,
+    SERIALIZE_CONCURRENCY,
+)
 from nucliadb.reader.api.models import (
     FIELD_NAME_TO_EXTRACTED_DATA_FIELD_MAP,
     FIELD_NAMES_TO_PB_TYPE_MAP,
@@ -69,6 +76,7 @@ async def list_resources(
     kbid: str,
     page: int = Query(0),
     size: int = Query(DEFAULT_RESOURCE_LIST_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
 ) -> ResourceList:
     # Get all resource id's fast by scanning all existing slugs
 
@@ -82,32 +90,27 @@ async def list_resources(
     extracted: List[ExtractedDataTypeName] = []
 
     try:
-        resources: List[Resource] = []
-        max_items_to_iterate = (page + 1) * size
-        first_wanted_item_index = (page * size) + 1  # 1-based index
-        current_key_index = 0
-
-        # ask for one item more than we need, in order to know if it's the last page
-        keys_generator = txn.keys(
-            match=KB_RESOURCE_SLUG_BASE.format(kbid=kbid),
-            count=max_items_to_iterate + 1,
-        )
-        async for key in keys_generator:
-            current_key_index += 1
-
-            # First of all, we need to skip keys, in case we are on a +1 page
-            if page > 0 and current_key_index < first_wanted_item_index:
-                continue
-
-            # Don't fetch keys once we got all items for this
-            if len(resources) == size:
-                await keys_generator.aclose()
-                break
-
-            # Fetch and Add wanted item
-            rid = await txn.get(key)
-            if rid is not None:
-                result = await serialize(
+        match = KB_RESOURCE_SLUG_BASE.format(kbid=kbid)
+        scan_cursor = decode_cursor(cursor) if cursor is not None else None
+        if cursor is None and page > 0:
+            # Clients not using the cursor yet still need to skip
+            # the previous pages, but only scanning keys
+            for _ in range(page):
+                _, scan_cursor = await txn.scan_page(match, scan_cursor, size)
+                if scan_cursor is None:
+                    break
+
+        keys: List[str] = []
+        next_cursor: Optional[str] = None
+        if cursor is not None or page == 0 or scan_cursor is not None:
+            keys, next_cursor = await txn.scan_page(match, scan_cursor, size)
+
+        rids = await txn.batch_get(keys)
+        semaphore = asyncio.Semaphore(SERIALIZE_CONCURRENCY)
+
+        async def serialize_resource(rid: bytes) -> Optional[Resource]:
+            async with semaphore:
+                return await serialize(
                     kbid,
                     rid.decode(),
                     show,
@@ -115,11 +118,14 @@ async def list_resources(
                     extracted,
                     service_name=SERVICE_NAME,
                 )
-                if result is not None:
-                    resources.append(result)
 
-        is_last_page = current_key_index <= max_items_to_iterate
+        results = await asyncio.gather(
+            *[serialize_resource(rid) for rid in rids if rid is not None]
+        )
+        resources: List[Resource] = [result for result in results if result is not None]
 
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as exc:
         capture_exception(exc)
         raise HTTPException(
@@ -130,10 +136,26 @@ async def list_resources(
 
     return ResourceList(
         resources=resources,
-        pagination=ResourcePagination(page=page, size=size, last=is_last_page),
+        pagination=ResourcePagination(
+            page=page,
+            size=size,
+            last=next_cursor is None,
+            cursor=encode_cursor(next_cursor) if next_cursor is not None else None,
+        ),
     )
 
 
+def encode_cursor(scan_cursor: str) -> str:
+    return base64.urlsafe_b64encode(scan_cursor.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor()
+
+
 @api.get(
     f"/{KB_PREFIX}/{{kbid}}/{RSLUG_PREFIX}/{{rslug}}",
     status_code=200,
@@ -23,6 +23,7 @@ import pytest
 from httpx import AsyncClient
 
 from nucliadb.reader.api import DEFAULT_RESOURCE_LIST_PAGE_SIZE
+from nucliadb.reader.api.v1.resource import encode_cursor
 from nucliadb.reader.api.v1.router import KB_PREFIX
 from nucliadb_models.resource import NucliaDBRoles
 
@@ -73,3 +74,35 @@ async def test_list_resources(
         assert pagination["size"] == query_params.get(
             "size", DEFAULT_RESOURCE_LIST_PAGE_SIZE
         )
+
+
+@pytest.mark.asyncio
+async def test_list_resources_with_cursor(
+    reader_api: Callable[..., AsyncClient],
+    test_pagination_resources: str,
+) -> None:
+    kbid = test_pagination_resources
+
+    rids = set()
+    query_params = {"size": 3}
+    async with reader_api(roles=[NucliaDBRoles.READER]) as client:
+        for _ in range(10):
+            resp = await client.get(
+                f"/{KB_PREFIX}/{kbid}/resources", params=query_params
+            )
+            assert resp.status_code == 200
+            pagination = resp.json()["pagination"]
+            rids.update(resource["id"] for resource in resp.json()["resources"])
+            if pagination["last"]:
+                assert pagination["cursor"] is None
+                break
+            query_params["cursor"] = pagination["cursor"]
+
+        assert pagination["last"]
+        assert len(rids) == 10
+
+        for cursor in ("not base64!", encode_cursor("not a cursor")):
+            resp = await client.get(
+                f"/{KB_PREFIX}/{kbid}/resources", params={"cursor": cursor}
+            )
+            assert resp.status_code == 400
@@ -19,7 +19,8 @@
 #
 import asyncio
 import json
-from typing import List, Optional
+import time
+from typing import Any, Dict, List, Optional
 
 from fastapi import HTTPException, Query, Request
 from fastapi_versioning import version
@@ -30,7 +31,7 @@ from nucliadb_protos.writer_pb2 import ShardObject as PBShardObject
 from nucliadb_protos.writer_pb2 import Shards
 from sentry_sdk import capture_exception
 
-from nucliadb.ingest.orm.resource import KB_RESOURCE_SLUG_BASE
+from nucliadb.ingest.orm.knowledgebox import KnowledgeBox
 from nucliadb.search import logger
 from nucliadb.search.api.v1.router import KB_PREFIX, api
 from nucliadb.search.search.fetch import abort_transaction  # type: ignore
@@ -83,18 +84,76 @@ async def knowledgebox_counters(
     vectorset: str = Query(None),
     debug: bool = Query(False),
 ) -> KnowledgeboxCounters:
+    node_counters = await get_node_counters(kbid, vectorset)
+
+    # Get counters from maindb
+    driver = await get_driver()
+    txn = await driver.begin()
+
+    try:
+        resource_count = await KnowledgeBox.get_resources_count(txn, kbid)
+        if resource_count is None:
+            resource_count = await KnowledgeBox.backfill_resources_counter(txn, kbid)
+            await txn.commit(resource=False)
+    except Exception as exc:
+        capture_exception(exc)
+        raise HTTPException(
+            status_code=500, detail="Couldn't retrieve counters right now"
+        )
+    finally:
+        if txn.open:
+            await txn.abort()
+
+    counters = KnowledgeboxCounters(
+        resources=resource_count,
+        paragraphs=node_counters["paragraphs"],
+        fields=node_counters["fields"],
+        sentences=node_counters["sentences"],
+    )
+
+    if debug:
+        counters.shards = node_counters.get("shards")
+    return counters
+
+
+async def get_node_counters(kbid: str, vectorset: Optional[str]) -> Dict[str, Any]:
+    """
+    Counters are cached and served while they are refreshed in the
+    background, so only the first request of a KB waits for the nodes.
+    """
     cache = await get_cache()
 
     if cache is not None:
         cached_counters = await cache.get(KB_COUNTER_CACHE.format(kbid=kbid))
-
         if cached_counters is not None:
-            cached_counters_obj = json.loads(cached_counters)
-            # In case shards get cached, we don't want it to be retrieved if we are not debugging
-            if not debug:
-                cached_counters_obj.pop("shards", None)
-            return KnowledgeboxCounters.parse_obj(cached_counters_obj)
+            node_counters = json.loads(cached_counters)
+            updated = node_counters.get("updated", 0)
+            if time.time() - updated > settings.counters_refresh_interval:
+                refresh_node_counters(kbid, vectorset)
+            return node_counters
+
+    return await compute_node_counters(kbid, vectorset)
+
+
+REFRESHING_COUNTERS: Dict[str, asyncio.Task] = {}
 
+
+def refresh_node_counters(kbid: str, vectorset: Optional[str]):
+    if kbid in REFRESHING_COUNTERS:
+        return
+
+    async def refresh():
+        try:
+            await compute_node_counters(kbid, vectorset)
+        except Exception:
+            logger.warning(f"Could not refresh {kbid} counters", exc_info=True)
+        finally:
+            REFRESHING_COUNTERS.pop(kbid, None)
+
+    REFRESHING_COUNTERS[kbid] = asyncio.create_task(refresh())
+
+
+async def compute_node_counters(kbid: str, vectorset: Optional[str]) -> Dict[str, Any]:
     nodemanager = get_nodes()
 
     try:
@@ -164,33 +223,14 @@ async def knowledgebox_counters(
         paragraph_count += shard.paragraphs
         sentence_count += shard.sentences
 
-    # Get counters from maindb
-    driver = await get_driver()
-    txn = await driver.begin()
-
-    try:
-        resource_count = 0
-        async for _ in txn.keys(
-            match=KB_RESOURCE_SLUG_BASE.format(kbid=kbid), count=-1
-        ):
-            resource_count += 1
-    except Exception as exc:
-        capture_exception(exc)
-        raise HTTPException(
-            status_code=500, detail="Couldn't retrieve counters right now"
-        )
-    finally:
-        await txn.abort()
-
-    counters = KnowledgeboxCounters(
-        resources=resource_count,
-        paragraphs=paragraph_count,
-        fields=field_count,
-        sentences=sentence_count,
-    )
-
-    if debug:
-        counters.shards = queried_shards
+    node_counters = {
+        "fields": field_count,
+        "paragraphs": paragraph_count,
+        "sentences": sentence_count,
+        "shards": queried_shards,
+        "updated": time.time(),
+    }
+    cache = await get_cache()
     if cache is not None:
-        await cache.set(KB_COUNTER_CACHE.format(kbid=kbid), counters.json())
-    return counters
+        await cache.set(KB_COUNTER_CACHE.format(kbid=kbid), json.dumps(node_counters))
+    return node_counters
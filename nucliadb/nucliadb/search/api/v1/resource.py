@@ -101,18 +101,17 @@ async def search(
         if rid is None:
             raise HTTPException(status_code=404, detail="Resource does not exist")
 
-    # We need the nodes/shards that are connected to the KB
+    # We only need the shard the resource is indexed in
     nodemanager = get_nodes()
 
     try:
-        shard_groups = await nodemanager.get_shards_by_kbid(kbid)
+        shard_groups = await nodemanager.get_shards_by_rid(kbid, rid)
     except ShardsNotFound:
         raise HTTPException(
             status_code=404,
             detail="The knowledgebox or its shards configuration is missing",
         )
 
-    # We need to query all nodes
     pb_query = await paragraph_query_to_pb(
         [SearchOptions.PARAGRAPH],
         rid,
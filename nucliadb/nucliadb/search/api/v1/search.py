@@ -35,7 +35,7 @@ from nucliadb.search.api.v1.router import KB_PREFIX, api
 from nucliadb.search.search.fetch import abort_transaction  # type: ignore
 from nucliadb.search.search.merge import merge_results
 from nucliadb.search.search.query import global_query_to_pb, pre_process_query
-from nucliadb.search.search.shards import query_shard
+from nucliadb.search.search.shards import hedged_query, query_shard
 from nucliadb.search.settings import settings
 from nucliadb.search.utilities import get_nodes
 from nucliadb_models.common import FieldTypeName
@@ -267,54 +267,75 @@ async def search(
         if SearchOptions.VECTOR in item.features:
             item.features.remove(SearchOptions.VECTOR)
 
-    try:
-        shard_groups: List[PBShardObject] = await nodemanager.get_shards_by_kbid(kbid)
-    except ShardsNotFound:
-        raise HTTPException(
-            status_code=404,
-            detail="The knowledgebox or its shards configuration is missing",
-        )
-
     # We need to query all nodes
     processed_query = pre_process_query(item.query)
-    pb_query, incomplete_results = await global_query_to_pb(
-        kbid,
-        features=item.features,
-        query=processed_query,
-        advanced_query=item.advanced_query,
-        filters=item.filters,
-        faceted=item.faceted,
-        sort=sort_options,
-        sort_ord=SortOrderMap[sort_options.order],
-        page_number=item.page_number,
-        page_size=item.page_size,
-        range_creation_start=item.range_creation_start,
-        range_creation_end=item.range_creation_end,
-        range_modification_start=item.range_modification_start,
-        range_modification_end=item.range_modification_end,
-        fields=item.fields,
-        reload=item.reload,
-        user_vector=item.vector,
-        vectorset=item.vectorset,
-        with_duplicates=item.with_duplicates,
-        with_status=item.with_status,
+    query_task = asyncio.create_task(
+        global_query_to_pb(
+            kbid,
+            features=item.features,
+            query=processed_query,
+            advanced_query=item.advanced_query,
+            filters=item.filters,
+            faceted=item.faceted,
+            sort=sort_options,
+            sort_ord=SortOrderMap[sort_options.order],
+            page_number=item.page_number,
+            page_size=item.page_size,
+            range_creation_start=item.range_creation_start,
+            range_creation_end=item.range_creation_end,
+            range_modification_start=item.range_modification_start,
+            range_modification_end=item.range_modification_end,
+            fields=item.fields,
+            reload=item.reload,
+            user_vector=item.vector,
+            vectorset=item.vectorset,
+            with_duplicates=item.with_duplicates,
+            with_status=item.with_status,
+        )
     )
 
+    # Shards lookup and query parsing (predict api calls) are independent
+    try:
+        try:
+            shard_groups: List[PBShardObject] = await nodemanager.get_shards_by_kbid(
+                kbid
+            )
+        except ShardsNotFound:
+            raise HTTPException(
+                status_code=404,
+                detail="The knowledgebox or its shards configuration is missing",
+            )
+        pb_query, incomplete_results = await query_task
+    finally:
+        # Don't leave the query parsing running on early exits
+        query_task.cancel()
+        if query_task.done() and not query_task.cancelled():
+            query_task.exception()
+
     ops = []
     queried_shards = []
     queried_nodes = []
     for shard_obj in shard_groups:
-        try:
-            node, shard_id, node_id = nodemanager.choose_node(shard_obj, item.shards)
-        except KeyError:
+        replicas = nodemanager.choose_nodes(shard_obj, item.shards)
+        if len(replicas) == 0:
             incomplete_results = True
-        else:
-            if shard_id is not None:
-                # At least one node is alive for this shard group
-                # let's add it ot the query list if has a valid value
-                ops.append(query_shard(node, shard_id, pb_query))
-                queried_nodes.append((node.label, shard_id, node_id))
-                queried_shards.append(shard_id)
+            continue
+        node, shard_id, node_id = replicas[0]
+        if shard_id is not None:
+            # At least one node is alive for this shard group
+            # let's add it ot the query list if has a valid value
+            ops.append(
+                asyncio.create_task(
+                    hedged_query(
+                        replicas,
+                        query_shard,
+                        pb_query,
+                        delay=settings.search_hedging_delay,
+                    )
+                )
+            )
+            queried_nodes.append((node.label, shard_id, node_id))
+            queried_shards.append(shard_id)
 
     if not ops:
         await abort_transaction()
@@ -324,35 +345,36 @@ async def search(
             detail=f"No node found for any of this resources shards {kbid}",
         )
 
-    try:
-        results: Optional[List[SearchResponse]] = await asyncio.wait_for(  # type: ignore
-            asyncio.gather(*ops, return_exceptions=True),  # type: ignore
-            timeout=settings.search_timeout,
-        )
-    except asyncio.TimeoutError as exc:
-        capture_exception(exc)
-        await abort_transaction()
-        raise HTTPException(status_code=503, detail=f"Data query took too long")
-    except AioRpcError as exc:
-        if exc.code() is GrpcStatusCode.UNAVAILABLE:
-            raise HTTPException(status_code=503, detail=f"Search backend not available")
+    # Shards that do not answer in time or fail are left out of the results,
+    # which are then flagged as incomplete
+    done, pending = await asyncio.wait(ops, timeout=settings.search_timeout)
+    for task in pending:
+        task.cancel()
+
+    results: List[SearchResponse] = []
+    errors: List[BaseException] = []
+    for task in done:
+        exc = task.exception()
+        if exc is None:
+            results.append(task.result())
         else:
-            raise exc
+            capture_exception(exc)
+            logger.error("Error while querying shard data", exc_info=exc)
+            errors.append(exc)
 
-    if results is None:
+    if len(results) == 0:
         await abort_transaction()
-        raise HTTPException(
-            status_code=500, detail=f"Error while executing shard queries"
-        )
+        if len(pending) > 0:
+            raise HTTPException(status_code=503, detail=f"Data query took too long")
+        if all(
+            isinstance(exc, AioRpcError) and exc.code() is GrpcStatusCode.UNAVAILABLE
+            for exc in errors
+        ):
+            raise HTTPException(status_code=503, detail=f"Search backend not available")
+        raise HTTPException(status_code=500, detail=f"Error while querying shard data")
 
-    for result in results:
-        if isinstance(result, Exception):
-            capture_exception(result)
-            await abort_transaction()
-            logger.exception("Error while querying shard data", exc_info=True)
-            raise HTTPException(
-                status_code=500, detail=f"Error while querying shard data"
-            )
+    if len(pending) > 0 or len(errors) > 0:
+        incomplete_results = True
 
     # We need to merge
     search_results = await merge_results(
@@ -95,27 +95,37 @@ async def suggest_knowledgebox(
     audit = get_audit()
     start_time = time()
 
-    try:
-        shard_groups: List[ShardObject] = await nodemanager.get_shards_by_kbid(kbid)
-    except ShardsNotFound:
-        raise HTTPException(
-            status_code=404,
-            detail="The knowledgebox or its shards configuration is missing",
-        )
-
     # We need to query all nodes
-    pb_query = await suggest_query_to_pb(
-        features,
-        query,
-        fields,
-        filters,
-        faceted,
-        range_creation_start,
-        range_creation_end,
-        range_modification_start,
-        range_modification_end,
+    query_task = asyncio.create_task(
+        suggest_query_to_pb(
+            features,
+            query,
+            fields,
+            filters,
+            faceted,
+            range_creation_start,
+            range_creation_end,
+            range_modification_start,
+            range_modification_end,
+        )
     )
 
+    # Shards lookup and query parsing are independent
+    try:
+        try:
+            shard_groups: List[ShardObject] = await nodemanager.get_shards_by_kbid(kbid)
+        except ShardsNotFound:
+            raise HTTPException(
+                status_code=404,
+                detail="The knowledgebox or its shards configuration is missing",
+            )
+        pb_query = await query_task
+    finally:
+        # Don't leave the query parsing running on early exits
+        query_task.cancel()
+        if query_task.done() and not query_task.cancelled():
+            query_task.exception()
+
     incomplete_results = False
     ops = []
     queried_shards = []
@@ -27,6 +27,7 @@ from nucliadb.ingest.utils import start_ingest, stop_ingest
 from nucliadb.search import SERVICE_NAME, logger
 from nucliadb.search.chitchat import start_chitchat, stop_chitchat
 from nucliadb.search.predict import PredictEngine
+from nucliadb.search.settings import settings
 from nucliadb_telemetry.utils import clean_telemetry, get_telemetry, init_telemetry
 from nucliadb_utils.settings import nuclia_settings, running_settings
 from nucliadb_utils.utilities import (
@@ -55,6 +56,8 @@ async def initialize() -> None:
         nuclia_settings.nuclia_zone,
         nuclia_settings.onprem,
         nuclia_settings.dummy_processing,
+        cache_size=settings.predict_cache_size,
+        cache_ttl=settings.predict_cache_ttl,
     )
     await predict_util.initialize()
     set_utility(Utility.PREDICT, predict_util)
@@ -17,9 +17,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
-from typing import List, Optional
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import aiohttp
+import prometheus_client  # type: ignore
+from lru import LRU  # type: ignore
 from nucliadb_protos.utils_pb2 import RelationNode
 
 from nucliadb.ingest.tests.vectors import Q
@@ -42,6 +46,62 @@ DUMMY_RELATION_NODE = [
 ]
 
 
+PREDICT_CACHE_OPS = prometheus_client.Counter(
+    "nucliadb_predict_cache_ops",
+    "Number of predict cache lookups by operation and result (hit, miss, coalesced)",
+    labelnames=["type", "result"],
+)
+
+CacheKey = Tuple[str, str, str]
+
+
+class PredictCache:
+    """
+    Bounded LRU cache with TTL for predict api results. Concurrent lookups of
+    the same key that are not cached yet share one single predict api call.
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self.ttl = ttl
+        self._cache = LRU(size)
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+
+    async def get_or_compute(
+        self, key: CacheKey, func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        operation = key[0]
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires, value = cached
+            if expires > time.monotonic():
+                PREDICT_CACHE_OPS.labels(type=operation, result="hit").inc()
+                return value
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            PREDICT_CACHE_OPS.labels(type=operation, result="miss").inc()
+            task = asyncio.create_task(self._compute(key, func))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            PREDICT_CACHE_OPS.labels(type=operation, result="coalesced").inc()
+        # Shield it so a cancelled caller does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: CacheKey, func: Callable[[], Awaitable[Any]]):
+        value = await func()
+        self._cache[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def clear(self):
+        self._cache.clear()
+
+
+def normalize_sentence(sentence: str) -> str:
+    return " ".join(sentence.split())
+
+
 PUBLIC_PREDICT = "/api/v1/predict"
 PRIVATE_PREDICT = "/api/internal/predict"
 SENTENCE = "/sentence"
@@ -57,6 +117,8 @@ class PredictEngine:
         zone: Optional[str] = None,
         onprem: bool = False,
         dummy: bool = False,
+        cache_size: int = 1000,
+        cache_ttl: float = 300,
     ):
         self.nuclia_service_account = nuclia_service_account
         self.cluster_url = cluster_url
@@ -68,6 +130,7 @@ class PredictEngine:
         self.onprem = onprem
         self.dummy = dummy
         self.calls: List[str] = []
+        self.cache = PredictCache(cache_size, cache_ttl)
 
     async def initialize(self):
         self.session = aiohttp.ClientSession()
@@ -76,6 +139,22 @@ class PredictEngine:
         await self.session.close()
 
     async def convert_sentence_to_vector(self, kbid: str, sentence: str) -> List[float]:
+        sentence = normalize_sentence(sentence)
+        return await self.cache.get_or_compute(
+            ("sentence", kbid, sentence),
+            lambda: self._convert_sentence_to_vector(kbid, sentence),
+        )
+
+    async def detect_entities(self, kbid: str, sentence: str) -> List[RelationNode]:
+        sentence = normalize_sentence(sentence)
+        return await self.cache.get_or_compute(
+            ("tokens", kbid, sentence),
+            lambda: self._detect_entities(kbid, sentence),
+        )
+
+    async def _convert_sentence_to_vector(
+        self, kbid: str, sentence: str
+    ) -> List[float]:
         # If token is offered
         if self.dummy:
             self.calls.append(sentence)
@@ -111,7 +190,7 @@ class PredictEngine:
             raise PredictVectorMissing()
         return data["data"]
 
-    async def detect_entities(self, kbid: str, sentence: str) -> List[RelationNode]:
+    async def _detect_entities(self, kbid: str, sentence: str) -> List[RelationNode]:
         # If token is offered
         if self.dummy:
             self.calls.append(sentence)
@@ -0,0 +1,281 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import prometheus_client  # type: ignore
+from nucliadb_protos.writer_pb2 import Notification
+
+from nucliadb.ingest.orm.resource import KB_REVERSE
+from nucliadb.ingest.orm.resource import Resource as ResourceORM
+from nucliadb.search import logger
+from nucliadb.search.settings import settings
+from nucliadb_utils.cache.pubsub import PubSubDriver
+from nucliadb_utils.settings import transaction_settings
+from nucliadb_utils.utilities import get_pubsub
+
+FIELD_CACHE_OPS = prometheus_client.Counter(
+    "nucliadb_search_field_cache_ops",
+    "Number of field data cache lookups by type of data and result (hit, miss)",
+    labelnames=["type", "result"],
+)
+
+# kbid, rid, field type, field, type of data, resource version
+FieldCacheKey = Tuple[str, str, str, str, str, str]
+
+
+def get_resource_version(orm_resource: ResourceORM) -> str:
+    """
+    Changes every time the resource is modified or sent to processing.
+    Processing results do not change it, commit notifications take care
+    of them.
+    """
+    if orm_resource.basic is None:
+        return ""
+    modified = orm_resource.basic.modified.ToNanoseconds()
+    return f"{modified}-{orm_resource.basic.last_seqid}"
+
+
+class FieldDataCache:
+    """
+    Process wide LRU cache of parsed extracted texts and field metadata,
+    bounded by their size in bytes.
+
+    The entries of a resource are invalidated when its knowledgebox
+    notifies a commit of it. We only cache data of knowledgeboxes whose
+    notifications we are subscribed to, up to `max_kbs` of them.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        pubsub: Optional[PubSubDriver] = None,
+        max_kbs: int = 100,
+    ):
+        self.max_size = max_size
+        self.max_kbs = max_kbs
+        self.size = 0
+        self.pubsub = pubsub
+        self._entries: OrderedDict[FieldCacheKey, Tuple[Any, int]] = OrderedDict()
+        self._resources: Dict[Tuple[str, str], Set[FieldCacheKey]] = {}
+        # Least recently used first
+        self._subscribed: OrderedDict[str, None] = OrderedDict()
+        self._lock = asyncio.Lock()
+        # Loads in flight per resource, and times the resource was
+        # invalidated while they were loading
+        self._loads: Dict[Tuple[str, str], int] = {}
+        self._generations: Dict[Tuple[str, str], int] = {}
+
+    def get(self, key: FieldCacheKey) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: FieldCacheKey, value: Any, size: int):
+        if size > self.max_size:
+            return
+        self.remove(key)
+        self._entries[key] = (value, size)
+        self._resources.setdefault((key[0], key[1]), set()).add(key)
+        self.size += size
+        while self.size > self.max_size:
+            self.remove(next(iter(self._entries)))
+
+    def remove(self, key: FieldCacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry[1]
+        keys = self._resources[(key[0], key[1])]
+        keys.discard(key)
+        if len(keys) == 0:
+            del self._resources[(key[0], key[1])]
+
+    def invalidate(self, kbid: str, rid: str):
+        resource = (kbid, rid)
+        if resource in self._loads:
+            # Values being loaded may be stale already, do not store them
+            self._generations[resource] = self._generations.get(resource, 0) + 1
+        for key in list(self._resources.get(resource, ())):
+            self.remove(key)
+
+    def invalidate_kb(self, kbid: str):
+        resources = set(self._resources) | set(self._loads)
+        for resource_kbid, rid in resources:
+            if resource_kbid == kbid:
+                self.invalidate(kbid, rid)
+
+    def received(self, raw_data: Any):
+        if self.pubsub is None:
+            return
+        notification = Notification()
+        notification.ParseFromString(self.pubsub.parse(raw_data))
+        self.invalidate(notification.kbid, notification.uuid)
+
+    async def async_received(self, raw_data: Any):
+        self.received(raw_data)
+
+    async def watch(self, kbid: str) -> bool:
+        """
+        Subscribe to the commit notifications of the knowledgebox
+        """
+        if kbid in self._subscribed:
+            self._subscribed.move_to_end(kbid)
+            return True
+        async with self._lock:
+            if kbid in self._subscribed:
+                self._subscribed.move_to_end(kbid)
+                return True
+            try:
+                if self.pubsub is None:
+                    self.pubsub = await get_pubsub()
+                while len(self._subscribed) >= self.max_kbs:
+                    await self.unwatch(next(iter(self._subscribed)))
+                await self.pubsub.subscribe(
+                    # Sync callbacks may be run in a thread by the driver
+                    handler=(
+                        self.async_received
+                        if self.pubsub.async_callback
+                        else self.received
+                    ),
+                    key=transaction_settings.transaction_notification.format(kbid=kbid),
+                    subscription_id=f"field-cache-{kbid}",
+                )
+            except Exception:
+                logger.warning(
+                    f"Could not watch {kbid} notifications, not caching its fields",
+                    exc_info=True,
+                )
+                return False
+            self._subscribed[kbid] = None
+            return True
+
+    async def unwatch(self, kbid: str):
+        """
+        Unsubscribe from the notifications of the knowledgebox and drop its
+        entries, as they could not be invalidated anymore
+        """
+        del self._subscribed[kbid]
+        self.invalidate_kb(kbid)
+        try:
+            await self.pubsub.unsubscribe(  # type: ignore
+                key=transaction_settings.transaction_notification.format(kbid=kbid),
+                subscription_id=f"field-cache-{kbid}",
+            )
+        except Exception:
+            logger.warning(f"Could not unwatch {kbid} notifications", exc_info=True)
+
+    async def get_or_load(
+        self,
+        key: FieldCacheKey,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        data_type = key[4]
+        value = self.get(key)
+        if value is not None:
+            FIELD_CACHE_OPS.labels(type=data_type, result="hit").inc()
+            return value
+
+        FIELD_CACHE_OPS.labels(type=data_type, result="miss").inc()
+        # Subscribe before loading, so we do not miss a commit in between
+        watching = await self.watch(key[0])
+        resource = (key[0], key[1])
+        self._loads[resource] = self._loads.get(resource, 0) + 1
+        generation = self._generations.get(resource, 0)
+        try:
+            value = await loader()
+        finally:
+            invalidated = self._generations.get(resource, 0) != generation
+            self._loads[resource] -= 1
+            if self._loads[resource] == 0:
+                del self._loads[resource]
+                self._generations.pop(resource, None)
+        if value is not None and watching and not invalidated:
+            self.set(key, value, value.ByteSize())
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self._resources.clear()
+        self.size = 0
+
+
+_field_cache: Optional[FieldDataCache] = None
+
+
+def get_field_cache() -> Optional[FieldDataCache]:
+    global _field_cache
+    if settings.field_cache_size <= 0:
+        return None
+    if _field_cache is None:
+        _field_cache = FieldDataCache(
+            settings.field_cache_size, max_kbs=settings.field_cache_kbs
+        )
+    return _field_cache
+
+
+async def get_field_data(
+    orm_resource: ResourceORM,
+    field_type: str,
+    field: str,
+    data_type: str,
+    loader: Callable[[Any], Awaitable[Any]],
+) -> Any:
+    """
+    Loads some data of a resource field through the process cache.
+    `field_type` is the field type letter as found in search results.
+    """
+    field_obj = await orm_resource.get_field(field, KB_REVERSE[field_type], load=False)
+    cache = get_field_cache()
+    if cache is None:
+        return await loader(field_obj)
+    key = (
+        orm_resource.kb.kbid,
+        orm_resource.uuid,
+        field_type,
+        field,
+        data_type,
+        get_resource_version(orm_resource),
+    )
+    return await cache.get_or_load(key, partial(loader, field_obj))
+
+
+async def get_extracted_text(orm_resource: ResourceORM, field_type: str, field: str):
+    return await get_field_data(
+        orm_resource,
+        field_type,
+        field,
+        "extracted_text",
+        lambda field_obj: field_obj.get_extracted_text(),
+    )
+
+
+async def get_field_metadata(orm_resource: ResourceORM, field_type: str, field: str):
+    return await get_field_data(
+        orm_resource,
+        field_type,
+        field,
+        "field_metadata",
+        lambda field_obj: field_obj.get_field_metadata(),
+    )
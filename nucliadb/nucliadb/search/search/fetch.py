@@ -17,10 +17,11 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
+import asyncio
 import re
 import string
 from contextvars import ContextVar
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from nucliadb_protos.nodereader_pb2 import DocumentResult, ParagraphResult
 from nucliadb_protos.resources_pb2 import Paragraph
@@ -32,6 +33,7 @@ from nucliadb.ingest.orm.resource import Resource as ResourceORM
 from nucliadb.ingest.serialize import serialize
 from nucliadb.ingest.utils import get_driver
 from nucliadb.search import SERVICE_NAME, logger
+from nucliadb.search.search.cache import get_extracted_text, get_field_metadata
 from nucliadb_models.common import FieldTypeName
 from nucliadb_models.resource import ExtractedDataTypeName, Resource
 from nucliadb_models.search import ResourceProperties
@@ -44,6 +46,9 @@ txn: ContextVar[Optional[Transaction]] = ContextVar("txn", default=None)
 
 PRE_WORD = string.punctuation + " "
 
+# Max number of concurrent storage downloads while hydrating search results
+FETCH_FIELDS_CONCURRENCY = 20
+
 
 def get_resource_cache(clear: bool = False) -> Dict[str, ResourceORM]:
     value: Optional[Dict[str, ResourceORM]] = rcache.get()
@@ -106,13 +111,59 @@ async def get_resource_from_cache(kbid: str, uuid: str) -> Optional[ResourceORM]
     return orm_resource
 
 
+async def get_resources_from_cache(
+    kbid: str, uuids: Iterable[str]
+) -> Dict[str, ResourceORM]:
+    """
+    Loads all the resources not already cached with a single maindb round trip
+    """
+    resource_cache = get_resource_cache()
+    missing = [uuid for uuid in set(uuids) if uuid not in resource_cache]
+    if len(missing) > 0:
+        transaction = await get_transaction()
+        storage = await get_storage(service_name=SERVICE_NAME)
+        cache = await get_cache()
+        kb = KnowledgeBoxORM(transaction, storage, cache, kbid)
+        resource_cache.update(await kb.get_many(missing))
+    return resource_cache
+
+
+async def fetch_fields(
+    kbid: str,
+    fields: Set[Tuple[str, str, str]],
+    extracted_text: bool = True,
+    field_metadata: bool = True,
+) -> None:
+    """
+    Concurrently downloads the extracted text and/or computed metadata of the
+    given (rid, field_type, field) tuples, so they are cached before building
+    the search results.
+    """
+    resources = await get_resources_from_cache(kbid, (rid for rid, _, _ in fields))
+    semaphore = asyncio.Semaphore(FETCH_FIELDS_CONCURRENCY)
+
+    async def _fetch(coro):
+        async with semaphore:
+            await coro
+
+    ops = []
+    for rid, field_type, field in fields:
+        orm_resource = resources.get(rid)
+        if orm_resource is None:
+            continue
+        if extracted_text:
+            ops.append(_fetch(get_extracted_text(orm_resource, field_type, field)))
+        if field_metadata:
+            ops.append(_fetch(get_field_metadata(orm_resource, field_type, field)))
+    if len(ops) > 0:
+        await asyncio.gather(*ops)
+
+
 async def get_paragraph_from_resource(
     orm_resource: ResourceORM, result: ParagraphResult
 ) -> Optional[Paragraph]:
     _, field_type, field = result.field.split("/")
-    field_type_int = KB_REVERSE[field_type]
-    field_obj = await orm_resource.get_field(field, field_type_int, load=False)
-    field_metadata = await field_obj.get_field_metadata()
+    field_metadata = await get_field_metadata(orm_resource, field_type, field)
     paragraph = None
     if field_metadata:
         if result.split not in (None, ""):
@@ -140,8 +191,7 @@ async def get_text_sentence(
         return ""
 
     field_type_int = KB_REVERSE[field_type]
-    field_obj = await orm_resource.get_field(field, field_type_int, load=False)
-    extracted_text = await field_obj.get_extracted_text()
+    extracted_text = await get_extracted_text(orm_resource, field_type, field)
     if extracted_text is None:
         logger.info(
             f"{rid} {field} {field_type_int} extracted_text does not exist on DB"
@@ -172,8 +222,7 @@ async def get_text_paragraph(
 
     _, field_type, field = result.field.split("/")
     field_type_int = KB_REVERSE[field_type]
-    field_obj = await orm_resource.get_field(field, field_type_int, load=False)
-    extracted_text = await field_obj.get_extracted_text()
+    extracted_text = await get_extracted_text(orm_resource, field_type, field)
     if extracted_text is None:
         logger.warn(
             f"{result.uuid} {field} {field_type_int} extracted_text does not exist on DB"
@@ -303,9 +352,7 @@ async def get_labels_paragraph(result: ParagraphResult, kbid: str) -> List[str]:
             labels.append(f"{classification.labelset}/{classification.label}")
 
     _, field_type, field = result.field.split("/")
-    field_type_int = KB_REVERSE[field_type]
-    field_obj = await orm_resource.get_field(field, field_type_int, load=False)
-    field_metadata = await field_obj.get_field_metadata()
+    field_metadata = await get_field_metadata(orm_resource, field_type, field)
     if field_metadata:
         paragraph = None
         if result.split not in (None, ""):
@@ -19,7 +19,7 @@
 #
 import datetime
 import math
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from nucliadb_protos.nodereader_pb2 import (
     DocumentResult,
@@ -37,11 +37,13 @@ from sentry_sdk import capture_message, push_scope
 
 from nucliadb.search import logger
 from nucliadb.search.search.fetch import (
+    fetch_fields,
     fetch_resources,
     get_labels_paragraph,
     get_labels_resource,
     get_resource_cache,
     get_resource_from_cache,
+    get_resources_from_cache,
     get_seconds_paragraph,
     get_text_paragraph,
     get_text_sentence,
@@ -78,6 +80,24 @@ TitleScore = str
 Score = Union[Bm25Score, TimestampScore, TitleScore]
 
 
+def result_field_key(
+    result: Union[DocumentResult, ParagraphResult]
+) -> Tuple[str, str, str]:
+    _, field_type, field = result.field.split("/")
+    return result.uuid, field_type, field
+
+
+def result_uuids(search_responses: List[SearchResponse]) -> Set[str]:
+    uuids: Set[str] = set()
+    for response in search_responses:
+        uuids.update(result.uuid for result in response.document.results)
+        uuids.update(result.uuid for result in response.paragraph.results)
+        uuids.update(
+            document.doc_id.id.split("/")[0] for document in response.vector.documents
+        )
+    return uuids
+
+
 def sort_results_by_score(results: Union[List[ParagraphResult], List[DocumentResult]]):
     results.sort(key=lambda x: (x.score.bm25, x.score.booster), reverse=True)
 
@@ -202,6 +222,10 @@ async def merge_suggest_paragraph_results(
     if len(suggest_responses) > 1:
         sort_results_by_score(raw_paragraph_list)
 
+    await fetch_fields(
+        kbid, {result_field_key(result) for result in raw_paragraph_list[:10]}
+    )
+
     result_paragraph_list: List[Paragraph] = []
     for result in raw_paragraph_list[:10]:
         _, field_type, field = result.field.split("/")
@@ -265,8 +289,18 @@ async def merge_vectors_results(
     end_element = skip + count
     length = len(raw_vectors_list)
 
+    page_results = raw_vectors_list[min(skip, length) : min(end_element, length)]
+    await fetch_fields(
+        kbid,
+        {
+            tuple(result.doc_id.id.split("/")[:3])  # type: ignore
+            for result in page_results
+        },
+        field_metadata=False,
+    )
+
     result_sentence_list: List[Sentence] = []
-    for result in raw_vectors_list[min(skip, length) : min(end_element, length)]:
+    for result in page_results:
         id_count = result.doc_id.id.count("/")
         if id_count == 4:
             rid, field_type, field, index, position = result.doc_id.id.split("/")
@@ -350,8 +384,11 @@ async def merge_paragraph_results(
     if length > end:
         next_page = True
 
+    page_results = raw_paragraph_list[min(skip, length) : min(end, length)]
+    await fetch_fields(kbid, {result_field_key(result) for result, _ in page_results})
+
     result_paragraph_list: List[Paragraph] = []
-    for result, _ in raw_paragraph_list[min(skip, length) : min(end, length)]:
+    for result, _ in page_results:
         _, field_type, field = result.field.split("/")
         text = await get_text_paragraph(result, kbid, highlight, ematches)
         labels = await get_labels_paragraph(result, kbid)
@@ -473,6 +510,7 @@ async def merge_results(
     api_results = KnowledgeboxSearchResults()
 
     get_resource_cache(clear=True)
+    await get_resources_from_cache(kbid, result_uuids(search_responses))
 
     resources: List[str] = list()
     api_results.fulltext = await merge_documents_results(
@@ -519,6 +557,11 @@ async def merge_paragraphs_results(
 
     api_results = ResourceSearchResults()
 
+    get_resource_cache(clear=True)
+    await get_resources_from_cache(
+        kbid, {result.uuid for response in paragraphs for result in response.results}
+    )
+
     resources: List[str] = list()
     api_results.paragraphs = await merge_paragraph_results(
         paragraphs,
@@ -17,6 +17,7 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
+import asyncio
 import re
 from datetime import datetime
 from typing import List, Optional, Tuple
@@ -30,6 +31,7 @@ from nucliadb_protos.noderesources_pb2 import Resource
 
 from nucliadb.search import logger
 from nucliadb.search.predict import PredictVectorMissing, SendToPredictError
+from nucliadb.search.settings import settings
 from nucliadb.search.utilities import get_predict
 from nucliadb_models.metadata import ResourceProcessingStatus
 from nucliadb_models.search import (
@@ -112,15 +114,19 @@ async def global_query_to_pb(
     request.document = SearchOptions.DOCUMENT in features
     request.paragraph = SearchOptions.PARAGRAPH in features
 
-    incomplete = False
+    # Predict api calls are independent, run them concurrently
+    ops = []
     if SearchOptions.VECTOR in features:
-        incomplete = await _parse_vectors(
-            request, kbid, query, user_vector=user_vector, vectorset=vectorset
+        ops.append(
+            _parse_vectors(
+                request, kbid, query, user_vector=user_vector, vectorset=vectorset
+            )
         )
 
     if SearchOptions.RELATIONS in features:
-        await _parse_entities(request, kbid, query)
+        ops.append(_parse_entities(request, kbid, query))
 
+    incomplete = any(await asyncio.gather(*ops))
     return request, incomplete
 
 
@@ -137,7 +143,10 @@ async def _parse_vectors(
     if user_vector is None:
         predict = get_predict()
         try:
-            predict_vector = await predict.convert_sentence_to_vector(kbid, query)
+            predict_vector = await asyncio.wait_for(
+                predict.convert_sentence_to_vector(kbid, query),
+                timeout=settings.predict_timeout,
+            )
             request.vector.extend(predict_vector)
         except SendToPredictError as err:
             logger.warning(f"Errors on predict api trying to embedd query: {err}")
@@ -145,19 +154,30 @@ async def _parse_vectors(
         except PredictVectorMissing:
             logger.warning("Predict api returned an empty vector")
             incomplete = True
+        except asyncio.TimeoutError:
+            logger.warning("Timeout on predict api trying to embedd query")
+            incomplete = True
     else:
         request.vector.extend(user_vector)
     return incomplete
 
 
-async def _parse_entities(request: SearchRequest, kbid: str, query: str):
+async def _parse_entities(request: SearchRequest, kbid: str, query: str) -> bool:
+    incomplete = False
     predict = get_predict()
     try:
-        detected_entities = await predict.detect_entities(kbid, query)
+        detected_entities = await asyncio.wait_for(
+            predict.detect_entities(kbid, query),
+            timeout=settings.predict_timeout,
+        )
         request.relation_subgraph.entry_points.extend(detected_entities)
         request.relation_subgraph.depth = 1
     except SendToPredictError as ex:
         logger.warning(f"Errors on predict api detecting entities: {ex}")
+    except asyncio.TimeoutError:
+        logger.warning("Timeout on predict api detecting entities")
+        incomplete = True
+    return incomplete
 
 
 async def suggest_query_to_pb(
@@ -17,7 +17,9 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
-from typing import Optional
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
 
 from nucliadb_protos.nodereader_pb2 import (
     GetShardRequest,
@@ -31,6 +33,7 @@ from nucliadb_protos.nodereader_pb2 import (
 from nucliadb_protos.noderesources_pb2 import Shard
 
 from nucliadb.ingest.orm.node import Node
+from nucliadb.ingest.orm.nodes_manager import observe_node
 
 
 def query_shard(node: Node, shard: str, query: SearchRequest) -> SearchResponse:
@@ -56,3 +59,64 @@ def query_paragraph_shard(
 def suggest_shard(node: Node, shard: str, query: SuggestRequest) -> SuggestResponse:
     query.shard = shard
     return node.reader.Suggest(query)
+
+
+async def hedged_query(
+    replicas: List[Tuple[Node, Optional[str], str]],
+    func: Callable[[Node, str, Any], Awaitable[Any]],
+    query: Any,
+    delay: Optional[float] = None,
+) -> Any:
+    """
+    Queries the first replica of a shard group. If it fails, or it does not
+    answer within `delay` seconds, the same query is sent to the next replica
+    and the first successful response is returned.
+    """
+    pending: Set[asyncio.Future] = set()
+    candidates = [
+        (node, shard, node_id) for node, shard, node_id in replicas if shard is not None
+    ]
+    last_exc: Optional[BaseException] = None
+    try:
+        while candidates or pending:
+            if candidates:
+                node, shard, node_id = candidates.pop(0)
+                # Every replica has a different shard id, copy the query
+                replica_query = type(query)()
+                replica_query.CopyFrom(query)
+                pending.add(
+                    asyncio.ensure_future(
+                        _observed(node_id, func(node, shard, replica_query))
+                    )
+                )
+
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=delay if candidates else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                last_exc = task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if last_exc is not None:
+        raise last_exc
+    raise KeyError("Could not find a node to query")
+
+
+async def _observed(node_id: str, request: Awaitable[Any]) -> Any:
+    # Hedged requests that get cancelled are recorded too: the elapsed time
+    # is a lower bound of the node latency
+    start = time.monotonic()
+    error = False
+    try:
+        return await request
+    except Exception:
+        error = True
+        raise
+    finally:
+        observe_node(node_id, time.monotonic() - start, error=error)
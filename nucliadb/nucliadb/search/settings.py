@@ -30,6 +30,24 @@ class Settings(BaseSettings):
     nodes_load_ingest: bool = False
 
     search_timeout: float = 10.0
+    # If a shard replica does not answer within this time, the query is also
+    # sent to the next replica of the shard group. None disables hedging
+    search_hedging_delay: Optional[float] = 1.0
+    # Max time to wait for the predict api while parsing the query. If it
+    # takes longer, the search goes on without it and is marked incomplete
+    predict_timeout: float = 3.0
+    # Query embeddings and detected entities are cached in memory. The KB
+    # defines the model, so results are keyed by kbid and query
+    predict_cache_size: int = 1000
+    predict_cache_ttl: float = 300.0
+    # Max size in bytes of the extracted texts and field metadata kept in
+    # memory to build search results. 0 disables the cache
+    field_cache_size: int = 256 * 1024 * 1024
+    # Knowledgeboxes whose commit notifications the field cache watches at
+    # once. The least recently used one is unwatched and its fields dropped
+    field_cache_kbs: int = 100
+    # Node counters older than this are refreshed in the background
+    counters_refresh_interval: float = 10.0
 
 
 settings = Settings()
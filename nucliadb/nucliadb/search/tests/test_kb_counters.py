@@ -18,6 +18,7 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 import json
+import time
 from typing import Callable
 
 import pytest
@@ -61,7 +62,13 @@ async def test_kb_counters_cached(
     await cache.set(
         KB_COUNTER_CACHE.format(kbid=kbid),
         json.dumps(
-            {"resources": 100, "paragraphs": 100, "fields": 100, "sentences": 100}
+            {
+                "paragraphs": 100,
+                "fields": 100,
+                "sentences": 100,
+                "shards": [],
+                "updated": time.time(),
+            }
         ),
     )
 
@@ -72,7 +79,8 @@ async def test_kb_counters_cached(
         assert resp.status_code == 200
 
         data = resp.json()
-        assert data["resources"] == 100
+        # Resources are always counted in maindb
+        assert data["resources"] == 1
         assert data["paragraphs"] == 100
         assert data["fields"] == 100
         assert data["sentences"] == 100
@@ -94,11 +102,11 @@ async def test_kb_counters_cached_nodebug(
         KB_COUNTER_CACHE.format(kbid=kbid),
         json.dumps(
             {
-                "resources": 100,
                 "paragraphs": 100,
                 "fields": 100,
                 "sentences": 100,
                 "shards": [],
+                "updated": time.time(),
             }
         ),
     )
@@ -110,8 +118,49 @@ async def test_kb_counters_cached_nodebug(
         assert resp.status_code == 200
 
         data = resp.json()
-        assert data["resources"] == 100
+        # Resources are always counted in maindb
+        assert data["resources"] == 1
         assert data["paragraphs"] == 100
         assert data["fields"] == 100
         assert data["sentences"] == 100
         assert "shards" not in data
+
+
+@pytest.mark.asyncio
+async def test_kb_counters_refreshed_in_background(
+    search_api: Callable[..., AsyncClient], test_search_resource: str
+) -> None:
+    from nucliadb.search.api.v1.knowledgebox import REFRESHING_COUNTERS
+    from nucliadb_utils.utilities import get_cache
+
+    kbid = test_search_resource
+
+    cache = await get_cache()
+    assert cache is not None
+
+    await cache.set(
+        KB_COUNTER_CACHE.format(kbid=kbid),
+        json.dumps(
+            {
+                "paragraphs": 100,
+                "fields": 100,
+                "sentences": 100,
+                "shards": [],
+                "updated": 0,
+            }
+        ),
+    )
+
+    async with search_api(roles=[NucliaDBRoles.READER]) as client:
+        resp = await client.get(f"/{KB_PREFIX}/{kbid}/counters")
+        assert resp.status_code == 200
+        # Outdated counters are served while they are refreshed
+        assert resp.json()["paragraphs"] == 100
+
+        refresh = REFRESHING_COUNTERS.get(kbid)
+        if refresh is not None:
+            await refresh
+
+        resp = await client.get(f"/{KB_PREFIX}/{kbid}/counters")
+        assert resp.status_code == 200
+        assert resp.json()["paragraphs"] == 2
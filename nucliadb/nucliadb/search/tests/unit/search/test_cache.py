@@ -0,0 +1,132 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from nucliadb_protos.resources_pb2 import ExtractedText
+from nucliadb_protos.writer_pb2 import Notification
+
+from nucliadb.search.search.cache import FieldDataCache
+
+
+def key(rid: str, field: str, kbid: str = "kbid"):
+    return (kbid, rid, "t", field, "extracted_text", "1")
+
+
+def text(size: int) -> ExtractedText:
+    return ExtractedText(text="x" * size)
+
+
+@pytest.fixture
+def pubsub():
+    yield MagicMock(
+        subscribe=AsyncMock(),
+        unsubscribe=AsyncMock(),
+        async_callback=False,
+        parse=lambda data: data,
+    )
+
+
+@pytest.mark.asyncio
+async def test_field_cache_loads_once(pubsub):
+    cache = FieldDataCache(1000, pubsub=pubsub)
+    loader = AsyncMock(return_value=text(10))
+
+    assert await cache.get_or_load(key("r1", "f1"), loader) == text(10)
+    assert await cache.get_or_load(key("r1", "f1"), loader) == text(10)
+    loader.assert_awaited_once()
+    pubsub.subscribe.assert_awaited_once()
+
+
+def test_field_cache_evicts_by_size():
+    cache = FieldDataCache(100)
+    cache.set(key("r1", "f1"), text(40), 40)
+    cache.set(key("r1", "f2"), text(40), 40)
+    # Refresh f1, so f2 is the least recently used
+    assert cache.get(key("r1", "f1")) is not None
+    cache.set(key("r2", "f1"), text(40), 40)
+
+    assert cache.get(key("r1", "f2")) is None
+    assert cache.get(key("r1", "f1")) is not None
+    assert cache.size == 80
+
+    # Values bigger than the cache are not stored
+    cache.set(key("r3", "f1"), text(200), 200)
+    assert cache.get(key("r3", "f1")) is None
+
+
+def test_field_cache_invalidated_by_commits(pubsub):
+    cache = FieldDataCache(1000, pubsub=pubsub)
+    cache.set(key("r1", "f1"), text(10), 10)
+    cache.set(key("r1", "f2"), text(10), 10)
+    cache.set(key("r2", "f1"), text(10), 10)
+
+    cache.received(Notification(kbid="kbid", uuid="r1").SerializeToString())
+
+    assert cache.get(key("r1", "f1")) is None
+    assert cache.get(key("r1", "f2")) is None
+    assert cache.get(key("r2", "f1")) is not None
+    assert cache.size == 10
+
+
+@pytest.mark.asyncio
+async def test_field_cache_does_not_store_values_invalidated_while_loading(pubsub):
+    cache = FieldDataCache(1000, pubsub=pubsub)
+    loading = asyncio.Event()
+    loaded = asyncio.Event()
+
+    async def loader():
+        loading.set()
+        await loaded.wait()
+        return text(10)
+
+    task = asyncio.create_task(cache.get_or_load(key("r1", "f1"), loader))
+    await loading.wait()
+    cache.received(Notification(kbid="kbid", uuid="r1").SerializeToString())
+    loaded.set()
+
+    assert await task == text(10)
+    assert cache.get(key("r1", "f1")) is None
+    assert cache._loads == {}
+    assert cache._generations == {}
+
+
+@pytest.mark.asyncio
+async def test_field_cache_unwatches_least_recently_used_kb(pubsub):
+    cache = FieldDataCache(1000, pubsub=pubsub, max_kbs=2)
+    await cache.get_or_load(
+        key("r1", "f1", kbid="kb1"), AsyncMock(return_value=text(10))
+    )
+    await cache.get_or_load(
+        key("r1", "f1", kbid="kb2"), AsyncMock(return_value=text(10))
+    )
+    # Refresh kb1, so kb2 is the least recently used
+    await cache.watch("kb1")
+    await cache.get_or_load(
+        key("r1", "f1", kbid="kb3"), AsyncMock(return_value=text(10))
+    )
+
+    assert list(cache._subscribed) == ["kb1", "kb3"]
+    pubsub.unsubscribe.assert_awaited_once()
+    assert pubsub.unsubscribe.call_args.kwargs["subscription_id"] == "field-cache-kb2"
+    assert cache.get(key("r1", "f1", kbid="kb2")) is None
+    assert cache.get(key("r1", "f1", kbid="kb1")) is not None
+    assert cache.size == 20
@@ -0,0 +1,115 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from nucliadb.search.search import fetch
+from nucliadb.search.search.fetch import (
+    fetch_fields,
+    get_resource_cache,
+    get_resources_from_cache,
+)
+
+
+@pytest.fixture
+def resources():
+    # r3 is not in maindb anymore, it was deleted after being indexed
+    resources = {"r1": MagicMock(uuid="r1"), "r2": MagicMock(uuid="r2")}
+    kb = MagicMock()
+    kb.get_many = AsyncMock(
+        side_effect=lambda uuids: {
+            uuid: resources[uuid] for uuid in uuids if uuid in resources
+        }
+    )
+    with patch.object(fetch, "KnowledgeBoxORM", return_value=kb), patch.object(
+        fetch, "get_transaction", AsyncMock()
+    ), patch.object(fetch, "get_storage", AsyncMock()), patch.object(
+        fetch, "get_cache", AsyncMock()
+    ):
+        get_resource_cache(clear=True)
+        yield kb
+
+
+@pytest.mark.asyncio
+async def test_get_resources_from_cache_loads_missing_resources_at_once(resources):
+    cached = get_resource_cache()
+    cached["r1"] = MagicMock(uuid="r1")
+
+    result = await get_resources_from_cache("kbid", ["r1", "r2", "r3", "r2"])
+
+    resources.get_many.assert_awaited_once()
+    assert sorted(resources.get_many.call_args.args[0]) == ["r2", "r3"]
+    assert result["r1"] is cached["r1"]
+    assert set(result) == {"r1", "r2"}
+
+    # Everything is cached now, deleted resources are just skipped
+    await get_resources_from_cache("kbid", ["r1", "r2"])
+    resources.get_many.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_fetch_fields_skips_deleted_resources(resources):
+    get_extracted_text = AsyncMock()
+    get_field_metadata = AsyncMock()
+    with patch.object(fetch, "get_extracted_text", get_extracted_text), patch.object(
+        fetch, "get_field_metadata", get_field_metadata
+    ):
+        await fetch_fields(
+            "kbid",
+            {("r1", "t", "text"), ("r2", "u", "link"), ("r3", "t", "text")},
+            field_metadata=False,
+        )
+
+    fetched = {
+        (res.uuid, ftype, field) for res, ftype, field in _args(get_extracted_text)
+    }
+    assert fetched == {("r1", "t", "text"), ("r2", "u", "link")}
+    get_field_metadata.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_fetch_fields_bounds_concurrent_downloads(resources):
+    running = 0
+    max_running = 0
+
+    async def download(*args):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    fields = {(rid, "t", f"field{i}") for rid in ("r1", "r2") for i in range(5)}
+    with patch.object(fetch, "FETCH_FIELDS_CONCURRENCY", 3), patch.object(
+        fetch, "get_extracted_text", AsyncMock(side_effect=download)
+    ) as get_extracted_text, patch.object(
+        fetch, "get_field_metadata", AsyncMock(side_effect=download)
+    ) as get_field_metadata:
+        await fetch_fields("kbid", fields)
+
+    assert get_extracted_text.await_count == 10
+    assert get_field_metadata.await_count == 10
+    assert max_running == 3
+
+
+def _args(mock: AsyncMock):
+    return [call.args for call in mock.await_args_list]
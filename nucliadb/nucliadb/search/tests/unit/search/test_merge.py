@@ -0,0 +1,121 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+from typing import List
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from nucliadb_protos.nodereader_pb2 import ParagraphResult, ParagraphSearchResponse
+from nucliadb_protos.resources_pb2 import Basic
+
+from nucliadb.search.search import fetch, merge
+from nucliadb.search.search.fetch import get_resource_cache
+from nucliadb.search.search.merge import merge_paragraph_results
+from nucliadb_models.search import SortField, SortOptions, SortOrder
+
+
+@pytest.fixture
+def resources():
+    # r3 is not in maindb anymore, it was deleted after being indexed
+    resources = {
+        rid: MagicMock(uuid=rid, get_basic=AsyncMock(return_value=Basic()))
+        for rid in ("r1", "r2")
+    }
+    kb = MagicMock()
+    kb.get = AsyncMock(side_effect=lambda uuid: resources.get(uuid))
+    kb.get_many = AsyncMock(
+        side_effect=lambda uuids: {
+            uuid: resources[uuid] for uuid in uuids if uuid in resources
+        }
+    )
+    with patch.object(fetch, "KnowledgeBoxORM", return_value=kb), patch.object(
+        fetch, "get_transaction", AsyncMock()
+    ), patch.object(fetch, "get_storage", AsyncMock()), patch.object(
+        fetch, "get_cache", AsyncMock()
+    ), patch.object(
+        fetch, "get_extracted_text", AsyncMock()
+    ), patch.object(
+        fetch, "get_field_metadata", AsyncMock()
+    ), patch.object(
+        merge, "get_text_paragraph", AsyncMock(return_value="text")
+    ), patch.object(
+        merge, "get_labels_paragraph", AsyncMock(return_value=[])
+    ), patch.object(
+        merge, "get_seconds_paragraph", AsyncMock(return_value=None)
+    ):
+        get_resource_cache(clear=True)
+        yield kb
+
+
+def paragraph(rid: str, index: int, bm25: float) -> ParagraphResult:
+    result = ParagraphResult(uuid=rid, field="/t/text", index=index)
+    result.score.bm25 = bm25
+    result.metadata.position.index = index
+    return result
+
+
+@pytest.mark.asyncio
+async def test_merge_paragraph_results_orders_shards_and_skips_deleted_resources(
+    resources,
+):
+    shard1 = ParagraphSearchResponse(
+        results=[paragraph("r1", 0, 2.0), paragraph("r3", 0, 5.0)]
+    )
+    shard2 = ParagraphSearchResponse(
+        results=[paragraph("r2", 0, 3.0), paragraph("r1", 1, 1.0)]
+    )
+    found: List[str] = []
+
+    paragraphs = await merge_paragraph_results(
+        [shard1, shard2],
+        found,
+        "kbid",
+        count=10,
+        page=0,
+        highlight=False,
+        sort=SortOptions(field=SortField.SCORE, order=SortOrder.DESC, limit=None),
+    )
+
+    assert [(p.rid, p.position.index) for p in paragraphs.results] == [
+        ("r2", 0),
+        ("r1", 0),
+        ("r1", 1),
+    ]
+    assert paragraphs.total == 3
+    assert found == ["r2", "r1"]
+
+
+@pytest.mark.asyncio
+async def test_merge_paragraph_results_pages(resources):
+    shard = ParagraphSearchResponse(
+        results=[paragraph("r1", i, float(i)) for i in range(5)]
+    )
+
+    paragraphs = await merge_paragraph_results(
+        [shard],
+        [],
+        "kbid",
+        count=2,
+        page=1,
+        highlight=False,
+        sort=SortOptions(field=SortField.SCORE, order=SortOrder.DESC, limit=None),
+    )
+
+    assert [p.position.index for p in paragraphs.results] == [2, 1]
+    assert paragraphs.next_page
@@ -0,0 +1,78 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+from unittest import mock
+
+import pytest
+
+from nucliadb.search.search import query
+from nucliadb_models.search import SearchOptions, SortField, SortOptions, SortOrder
+
+
+@pytest.fixture(scope="function")
+def predict():
+    predict = mock.AsyncMock()
+    with mock.patch.object(query, "get_predict", return_value=predict):
+        yield predict
+
+
+async def _global_query(features):
+    return await query.global_query_to_pb(
+        "kbid",
+        features=features,
+        query="my query",
+        filters=[],
+        faceted=[],
+        page_number=0,
+        page_size=20,
+        sort=SortOptions(field=SortField.SCORE, order=SortOrder.DESC, limit=None),
+    )
+
+
+@pytest.mark.asyncio
+async def test_global_query_to_pb_calls_predict(predict):
+    predict.convert_sentence_to_vector.return_value = [1.0, 2.0]
+    predict.detect_entities.return_value = []
+
+    request, incomplete = await _global_query(
+        [SearchOptions.VECTOR, SearchOptions.RELATIONS]
+    )
+
+    assert not incomplete
+    assert list(request.vector) == [1.0, 2.0]
+    predict.convert_sentence_to_vector.assert_awaited_once_with("kbid", "my query")
+    predict.detect_entities.assert_awaited_once_with("kbid", "my query")
+
+
+@pytest.mark.asyncio
+async def test_global_query_to_pb_slow_predict_is_incomplete(predict):
+    async def slow(*args):
+        await asyncio.sleep(1)
+
+    predict.convert_sentence_to_vector.side_effect = slow
+    predict.detect_entities.return_value = []
+
+    with mock.patch.object(query.settings, "predict_timeout", 0.01):
+        request, incomplete = await _global_query(
+            [SearchOptions.VECTOR, SearchOptions.RELATIONS]
+        )
+
+    assert incomplete
+    assert len(request.vector) == 0
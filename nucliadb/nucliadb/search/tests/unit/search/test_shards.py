@@ -0,0 +1,70 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+
+import pytest
+from nucliadb_protos.nodereader_pb2 import SearchRequest
+
+from nucliadb.search.search.shards import hedged_query
+
+
+def _replicas(*names):
+    return [(name, f"shard-{name}", name) for name in names]
+
+
+@pytest.mark.asyncio
+async def test_hedged_query_returns_first_replica():
+    async def query(node, shard, query):
+        return node
+
+    result = await hedged_query(_replicas("a", "b"), query, SearchRequest(), delay=1)
+    assert result == "a"
+
+
+@pytest.mark.asyncio
+async def test_hedged_query_hedges_slow_replica():
+    queried = []
+
+    async def query_shard(node, shard, query):
+        query.shard = shard
+        queried.append((node, query.shard))
+        if node == "a":
+            await asyncio.sleep(10)
+        return node
+
+    result = await hedged_query(
+        _replicas("a", "b"), query_shard, SearchRequest(), delay=0.01
+    )
+    assert result == "b"
+    assert queried == [("a", "shard-a"), ("b", "shard-b")]
+
+
+@pytest.mark.asyncio
+async def test_hedged_query_fails_over_on_errors():
+    async def query(node, shard, query):
+        if node == "a":
+            raise ValueError()
+        return node
+
+    result = await hedged_query(_replicas("a", "b"), query, SearchRequest())
+    assert result == "b"
+
+    with pytest.raises(ValueError):
+        await hedged_query(_replicas("a"), query, SearchRequest())
@@ -0,0 +1,63 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+
+import pytest
+
+from nucliadb.search.predict import PredictEngine
+
+
+@pytest.mark.asyncio
+async def test_predict_engine_caches_sentence_vectors():
+    predict = PredictEngine(dummy=True)
+
+    await predict.convert_sentence_to_vector("kbid", "some  query")
+    await predict.convert_sentence_to_vector("kbid", "some query ")
+    assert predict.calls == ["some query"]
+
+    await predict.convert_sentence_to_vector("other_kbid", "some query")
+    assert len(predict.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_predict_engine_cache_expires():
+    predict = PredictEngine(dummy=True, cache_ttl=0)
+
+    await predict.detect_entities("kbid", "some query")
+    await predict.detect_entities("kbid", "some query")
+    assert len(predict.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_predict_engine_coalesces_concurrent_calls():
+    predict = PredictEngine()
+    calls = []
+
+    async def convert(kbid, sentence):
+        calls.append(sentence)
+        await asyncio.sleep(0.01)
+        return [1.0]
+
+    predict._convert_sentence_to_vector = convert  # type: ignore
+    results = await asyncio.gather(
+        *[predict.convert_sentence_to_vector("kbid", "query") for _ in range(5)]
+    )
+    assert results == [[1.0]] * 5
+    assert calls == ["query"]
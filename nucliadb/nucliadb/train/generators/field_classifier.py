@@ -18,7 +18,7 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 
 from nucliadb_protos.dataset_pb2 import (
     FieldClassificationBatch,
@@ -30,13 +30,17 @@ from nucliadb_protos.nodereader_pb2 import StreamRequest
 
 from nucliadb.ingest.orm.node import Node
 from nucliadb.ingest.orm.resource import KB_REVERSE
+from nucliadb.ingest.orm.resource import Resource as ResourceORM
 from nucliadb.train import logger
-from nucliadb.train.generators.utils import get_resource_from_cache
-
+from nucliadb.train.generators.utils import (
+    get_document_field,
+    prefetch_resources,
+)
 
-async def get_field_text(kbid: str, rid: str, field: str, field_type: str) -> str:
-    orm_resource = await get_resource_from_cache(kbid, rid)
 
+async def get_field_text(
+    orm_resource: Optional[ResourceORM], rid: str, field: str, field_type: str
+) -> str:
     if orm_resource is None:
         logger.error(f"{rid} does not exist on DB")
         return ""
@@ -75,7 +79,9 @@ async def generate_field_classification_payloads(
     total = 0
 
     batch = FieldClassificationBatch()
-    async for document_item in node.stream_get_fields(request):
+    async for document_item, orm_resource in prefetch_resources(
+        kbid, node.stream_get_fields(request), get_document_field
+    ):
         text_labels = []
         for label in document_item.labels:
             if label.startswith(labelset):
@@ -86,7 +92,7 @@ async def generate_field_classification_payloads(
 
         tl = TextLabel()
         rid, field_type, field = field_id.split("/")
-        tl.text = await get_field_text(kbid, rid, field, field_type)
+        tl.text = await get_field_text(orm_resource, rid, field, field_type)
 
         for label in text_labels:
             _, _, labelset_title, label_title = label.split("/")
@@ -18,7 +18,7 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 
 from nucliadb_protos.dataset_pb2 import (
     Label,
@@ -30,11 +30,15 @@ from nucliadb_protos.nodereader_pb2 import StreamRequest
 
 from nucliadb.ingest.orm.node import Node
 from nucliadb.ingest.orm.resource import KB_REVERSE
+from nucliadb.ingest.orm.resource import Resource as ResourceORM
 from nucliadb.train import logger
-from nucliadb.train.generators.utils import get_resource_from_cache
+from nucliadb.train.generators.utils import (
+    get_paragraph_field,
+    prefetch_resources,
+)
 
 
-async def get_paragraph(kbid: str, result: str) -> str:
+async def get_paragraph(orm_resource: Optional[ResourceORM], result: str) -> str:
     if result.count("/") == 5:
         rid, field_type, field, split_str, start_end = result.split("/")
         split = int(split_str)
@@ -46,8 +50,6 @@ async def get_paragraph(kbid: str, result: str) -> str:
     start = int(start_str)
     end = int(end_str)
 
-    orm_resource = await get_resource_from_cache(kbid, rid)
-
     if orm_resource is None:
         logger.error(f"{rid} does not exist on DB")
         return ""
@@ -85,14 +87,16 @@ async def generate_paragraph_classification_payloads(
     request.reload = True
     batch = ParagraphClassificationBatch()
 
-    async for paragraph_item in node.stream_get_paragraphs(request):
+    async for paragraph_item, orm_resource in prefetch_resources(
+        kbid, node.stream_get_paragraphs(request), get_paragraph_field
+    ):
         text_labels = []
         for label in paragraph_item.labels:
             if label.startswith(labelset):
                 text_labels.append(label)
 
         tl = TextLabel()
-        paragraph_text = await get_paragraph(kbid, paragraph_item.id)
+        paragraph_text = await get_paragraph(orm_resource, paragraph_item.id)
 
         tl.text = paragraph_text
         for label in text_labels:
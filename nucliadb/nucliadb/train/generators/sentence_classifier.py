@@ -18,7 +18,7 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
-from typing import AsyncIterator, List
+from typing import AsyncIterator, List, Optional
 
 from nucliadb_protos.dataset_pb2 import (
     Label,
@@ -30,11 +30,15 @@ from nucliadb_protos.nodereader_pb2 import StreamRequest
 
 from nucliadb.ingest.orm.node import Node
 from nucliadb.ingest.orm.resource import KB_REVERSE
+from nucliadb.ingest.orm.resource import Resource as ResourceORM
 from nucliadb.train import logger
-from nucliadb.train.generators.utils import get_resource_from_cache
+from nucliadb.train.generators.utils import (
+    get_paragraph_field,
+    prefetch_resources,
+)
 
 
-async def get_sentences(kbid: str, result: str) -> List[str]:
+async def get_sentences(orm_resource: Optional[ResourceORM], result: str) -> List[str]:
     if result.count("/") == 4:
         rid, field_type, field, split_str, _ = result.split("/")
         split = int(split_str)
@@ -42,8 +46,6 @@ async def get_sentences(kbid: str, result: str) -> List[str]:
         rid, field_type, field, _ = result.split("/")
         split = None
 
-    orm_resource = await get_resource_from_cache(kbid, rid)
-
     if orm_resource is None:
         logger.error(f"{rid} does not exist on DB")
         return []
@@ -102,7 +104,9 @@ async def generate_sentence_classification_payloads(
     request.reload = True
     batch = SentenceClassificationBatch()
 
-    async for paragraph_item in node.stream_get_paragraphs(request):
+    async for paragraph_item, orm_resource in prefetch_resources(
+        kbid, node.stream_get_paragraphs(request), get_paragraph_field, metadata=True
+    ):
         text_labels: List[str] = []
         for label in paragraph_item.labels:
             for labelset in labelsets:
@@ -110,7 +114,7 @@ async def generate_sentence_classification_payloads(
                     text_labels.append(label)
 
         tl = MultipleTextSameLabels()
-        sentences_text = await get_sentences(kbid, paragraph_item.id)
+        sentences_text = await get_sentences(orm_resource, paragraph_item.id)
 
         if len(sentences_text) == 0:
             continue
@@ -19,7 +19,7 @@
 #
 
 from collections import OrderedDict
-from typing import AsyncIterator, Dict, List, Tuple, cast
+from typing import AsyncIterator, Dict, List, Optional, Tuple, cast
 
 from nucliadb_protos.dataset_pb2 import (
     TokenClassificationBatch,
@@ -30,8 +30,12 @@ from nucliadb_protos.nodereader_pb2 import StreamRequest
 
 from nucliadb.ingest.orm.node import Node
 from nucliadb.ingest.orm.resource import KB_REVERSE
+from nucliadb.ingest.orm.resource import Resource as ResourceORM
 from nucliadb.train import logger
-from nucliadb.train.generators.utils import get_resource_from_cache
+from nucliadb.train.generators.utils import (
+    get_document_field,
+    prefetch_resources,
+)
 
 NERS_DICT = Dict[str, Dict[str, List[Tuple[int, int]]]]
 POSITION_DICT = OrderedDict[Tuple[int, int], Tuple[str, str]]
@@ -39,10 +43,12 @@ MAIN = "__main__"
 
 
 async def get_field_text(
-    kbid: str, rid: str, field: str, field_type: str, valid_entity_groups: List[str]
+    orm_resource: Optional[ResourceORM],
+    rid: str,
+    field: str,
+    field_type: str,
+    valid_entity_groups: List[str],
 ) -> Tuple[Dict[str, str], Dict[str, POSITION_DICT], Dict[str, List[Tuple[int, int]]]]:
-    orm_resource = await get_resource_from_cache(kbid, rid)
-
     if orm_resource is None:
         logger.error(f"{rid} does not exist on DB")
         return {}, {}, {}
@@ -224,14 +230,12 @@ async def generate_token_classification_payloads(
         request.filter.tags.append(f"/e/{entitygroup}")
     request.reload = True
     batch = TokenClassificationBatch()
-    async for field_item in node.stream_get_fields(request):
+    async for field_item, orm_resource in prefetch_resources(
+        kbid, node.stream_get_fields(request), get_document_field, metadata=True
+    ):
         _, field_type, field = field_item.field.split("/")
-        (
-            split_text,
-            ordered_positions,
-            split_paragaphs,
-        ) = await get_field_text(
-            kbid,
+        (split_text, ordered_positions, split_paragaphs,) = await get_field_text(
+            orm_resource,
             field_item.uuid,
             field,
             field_type,
@@ -18,29 +18,38 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 
+import asyncio
+from collections import deque
 from contextvars import ContextVar
-from typing import Dict, Optional
+from typing import (
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from nucliadb_protos.nodereader_pb2 import DocumentItem, ParagraphItem
 
 from nucliadb.ingest.maindb.driver import Transaction
 from nucliadb.ingest.orm.knowledgebox import KnowledgeBox as KnowledgeBoxORM
+from nucliadb.ingest.orm.resource import KB_REVERSE
 from nucliadb.ingest.orm.resource import Resource as ResourceORM
 from nucliadb.ingest.utils import get_driver
 from nucliadb.train import SERVICE_NAME
+from nucliadb.train.settings import settings
 from nucliadb_utils.utilities import get_cache, get_storage
 
-rcache: ContextVar[Optional[Dict[str, ResourceORM]]] = ContextVar(
-    "rcache", default=None
-)
-
-txn: ContextVar[Optional[Transaction]] = ContextVar("txn", default=None)
+T = TypeVar("T")
 
+# resource uuid, field type, field id
+FieldKey = Tuple[str, str, str]
 
-def get_resource_cache(clear: bool = False) -> Dict[str, ResourceORM]:
-    value: Optional[Dict[str, ResourceORM]] = rcache.get()
-    if value is None or clear:
-        value = {}
-        rcache.set(value)
-    return value
+txn: ContextVar[Optional[Transaction]] = ContextVar("txn", default=None)
 
 
 async def get_transaction() -> Transaction:
@@ -52,17 +61,90 @@ async def get_transaction() -> Transaction:
     return transaction
 
 
-async def get_resource_from_cache(kbid: str, uuid: str) -> Optional[ResourceORM]:
-    resouce_cache = get_resource_cache()
-    orm_resource: Optional[ResourceORM] = None
-    if uuid not in resouce_cache:
-        transaction = await get_transaction()
-        storage = await get_storage(service_name=SERVICE_NAME)
-        cache = await get_cache()
-        kb = KnowledgeBoxORM(transaction, storage, cache, kbid)
-        orm_resource = await kb.get(uuid)
-        if orm_resource is not None:
-            resouce_cache[uuid] = orm_resource
-    else:
-        orm_resource = resouce_cache.get(uuid)
-    return orm_resource
+def get_document_field(document_item: DocumentItem) -> FieldKey:
+    _, field_type, field = document_item.field.split("/")
+    return document_item.uuid, field_type, field
+
+
+def get_paragraph_field(paragraph_item: ParagraphItem) -> FieldKey:
+    rid, field_type, field = paragraph_item.id.split("/")[:3]
+    return rid, field_type, field
+
+
+async def load_resources(
+    kb: KnowledgeBoxORM,
+    fields: Dict[str, Set[Tuple[str, str]]],
+    metadata: bool = False,
+) -> Dict[str, ResourceORM]:
+    """
+    Load the resources with a single maindb round trip and download the
+    extracted text (and computed metadata) of the requested fields
+    concurrently, so they are cached on the returned ORM objects.
+    """
+    resources = await kb.get_many(list(fields.keys()))
+    loads = []
+    for rid, orm_resource in resources.items():
+        for field_type, field in fields[rid]:
+            field_obj = await orm_resource.get_field(
+                field, KB_REVERSE[field_type], load=False
+            )
+            loads.append(field_obj.get_extracted_text())
+            if metadata:
+                loads.append(field_obj.get_field_metadata())
+    await asyncio.gather(*loads)
+    return resources
+
+
+async def prefetch_resources(
+    kbid: str,
+    items: AsyncIterator[T],
+    get_field_key: Callable[[T], FieldKey],
+    metadata: bool = False,
+    window: Optional[int] = None,
+) -> AsyncIterator[Tuple[T, Optional[ResourceORM]]]:
+    """
+    Yield the stream items together with their loaded resource, keeping
+    their order. Items are grouped in windows of `window` resources that
+    are loaded in the background while the previous window is consumed.
+    Resources are dropped once all the items of their window are yielded.
+    """
+    if window is None:
+        window = settings.prefetch_resources
+    transaction = await get_transaction()
+    storage = await get_storage(service_name=SERVICE_NAME)
+    cache = await get_cache()
+    kb = KnowledgeBoxORM(transaction, storage, cache, kbid)
+
+    pending: Deque[Tuple[List[T], "asyncio.Task[Dict[str, ResourceORM]]"]] = deque()
+    buffered: List[T] = []
+    fields: Dict[str, Set[Tuple[str, str]]] = {}
+    try:
+        async for item in items:
+            rid, field_type, field = get_field_key(item)
+            if rid not in fields and len(fields) >= window:
+                task = asyncio.create_task(load_resources(kb, fields, metadata))
+                pending.append((buffered, task))
+                buffered, fields = [], {}
+
+            # Keep loading the next window while this one is consumed
+            while len(pending) > 1:
+                window_items, task = pending.popleft()
+                resources = await task
+                for window_item in window_items:
+                    yield window_item, resources.get(get_field_key(window_item)[0])
+
+            fields.setdefault(rid, set()).add((field_type, field))
+            buffered.append(item)
+
+        if buffered:
+            task = asyncio.create_task(load_resources(kb, fields, metadata))
+            pending.append((buffered, task))
+
+        while pending:
+            window_items, task = pending.popleft()
+            resources = await task
+            for window_item in window_items:
+                yield window_item, resources.get(get_field_key(window_item)[0])
+    finally:
+        for _, task in pending:
+            task.cancel()
@@ -43,5 +43,8 @@ class Settings(BaseSettings):
     driver_local_url: Optional[str] = None
     nodes_load_ingest: bool = False
 
+    # Resources loaded ahead of the train set generators
+    prefetch_resources: int = 10
+
 
 settings = Settings()
@@ -0,0 +1,72 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from nucliadb.train.generators import utils
+from nucliadb.train.generators.utils import FieldKey, prefetch_resources
+
+
+async def stream(items):
+    for item in items:
+        yield item
+
+
+@pytest.mark.asyncio
+async def test_prefetch_resources_loads_each_window_once(monkeypatch):
+    monkeypatch.setattr(utils, "get_transaction", AsyncMock())
+    monkeypatch.setattr(utils, "get_storage", AsyncMock())
+    monkeypatch.setattr(utils, "get_cache", AsyncMock())
+    monkeypatch.setattr(utils, "KnowledgeBoxORM", MagicMock())
+
+    loads = []
+
+    async def load_resources(kb, fields, metadata):
+        loads.append({rid: set(rid_fields) for rid, rid_fields in fields.items()})
+        return {rid: f"resource-{rid}" for rid in fields}
+
+    monkeypatch.setattr(utils, "load_resources", load_resources)
+
+    items = [
+        ("r1", "t", "f1"),
+        ("r1", "t", "f2"),
+        ("r2", "t", "f1"),
+        ("r3", "t", "f1"),
+        ("r4", "t", "f1"),
+        ("r3", "t", "f2"),
+        ("r5", "t", "f1"),
+    ]
+
+    def get_field_key(item: FieldKey) -> FieldKey:
+        return item
+
+    results = [
+        result
+        async for result in prefetch_resources(
+            "kbid", stream(items), get_field_key, window=2
+        )
+    ]
+
+    assert results == [(item, f"resource-{item[0]}") for item in items]
+    assert loads == [
+        {"r1": {("t", "f1"), ("t", "f2")}, "r2": {("t", "f1")}},
+        {"r3": {("t", "f1"), ("t", "f2")}, "r4": {("t", "f1")}},
+        {"r5": {("t", "f1")}},
+    ]
@@ -18,7 +18,7 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 from time import time
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Tuple
 from uuid import uuid4
 
 from fastapi import HTTPException, Query, Response
@@ -40,7 +40,7 @@ from starlette.requests import Request
 from nucliadb.ingest.orm.knowledgebox import KnowledgeBox
 from nucliadb.ingest.processing import PushPayload, Source
 from nucliadb.ingest.utils import get_driver
-from nucliadb.writer import SERVICE_NAME
+from nucliadb.writer import SERVICE_NAME, logger
 from nucliadb.writer.api.v1.router import (
     KB_PREFIX,
     RESOURCE_PREFIX,
@@ -60,7 +60,7 @@ from nucliadb.writer.resource.basic import (
 from nucliadb.writer.resource.field import extract_fields, parse_fields
 from nucliadb.writer.resource.origin import parse_origin
 from nucliadb.writer.resource.vectors import (
-    create_vectorset,
+    KnowledgeBoxVectorSets,
     get_vectorsets,
     parse_vectors,
 )
@@ -68,7 +68,9 @@ from nucliadb.writer.utilities import get_processing
 from nucliadb_models.resource import NucliaDBRoles
 from nucliadb_models.writer import (
     CreateResourcePayload,
+    CreateResourcesPayload,
     ResourceCreated,
+    ResourcesCreated,
     ResourceUpdated,
     UpdateResourcePayload,
 )
@@ -111,6 +113,126 @@ async def create_resource(
 ):
     transaction = get_transaction()
     processing = get_processing()
+
+    vectorsets = KnowledgeBoxVectorSets(kbid)
+    writer, toprocess, partition = await prepare_resource(
+        request, item, kbid, vectorsets
+    )
+    await vectorsets.create_pending()
+    await parse_fields(
+        writer=writer,
+        item=item,
+        toprocess=toprocess,
+        kbid=kbid,
+        uuid=writer.uuid,
+        x_skip_store=x_skip_store,
+    )
+    uuid = writer.uuid
+
+    set_info_on_span({"nuclia.rid": uuid, "nuclia.kbid": kbid})
+
+    try:
+        processing_info = await processing.send_to_process(toprocess, partition)
+    except LimitsExceededError as exc:
+        raise HTTPException(status_code=402, detail=str(exc))
+
+    writer.source = BrokerMessage.MessageSource.WRITER
+    set_processing_info(writer, processing_info)
+    if x_synchronous:
+        t0 = time()
+    await transaction.commit(writer, partition, wait=x_synchronous)
+
+    if x_synchronous:
+        return ResourceCreated(
+            seqid=processing_info.seqid, uuid=uuid, elapsed=time() - t0
+        )
+    else:
+        return ResourceCreated(seqid=processing_info.seqid, uuid=uuid)
+
+
+@api.post(
+    f"/{KB_PREFIX}/{{kbid}}/{RESOURCES_PREFIX}/batch",
+    status_code=201,
+    name="Create Resources",
+    description="Create a batch of new Resources in a Knowledge Box",
+    response_model=ResourcesCreated,
+    response_model_exclude_unset=True,
+    tags=["Resources"],
+)
+@requires(NucliaDBRoles.WRITER)
+@version(1)
+async def create_resources(
+    request: Request,
+    item: CreateResourcesPayload,
+    kbid: str,
+    x_skip_store: bool = SKIP_STORE_DEFAULT,
+    x_synchronous: bool = SYNC_CALL,
+):
+    transaction = get_transaction()
+    processing = get_processing()
+
+    # All the resources are validated before storing or sending anything
+    vectorsets = KnowledgeBoxVectorSets(kbid)
+    messages = [
+        await prepare_resource(request, resource, kbid, vectorsets)
+        for resource in item.resources
+    ]
+    await vectorsets.create_pending()
+    for (writer, toprocess, _), resource in zip(messages, item.resources):
+        await parse_fields(
+            writer=writer,
+            item=resource,
+            toprocess=toprocess,
+            kbid=kbid,
+            uuid=writer.uuid,
+            x_skip_store=x_skip_store,
+        )
+
+    set_info_on_span({"nuclia.kbid": kbid})
+
+    results = await processing.send_batch_to_process(
+        [toprocess for _, toprocess, _ in messages]
+    )
+    if all(isinstance(result, LimitsExceededError) for result in results):
+        raise HTTPException(status_code=402, detail=str(results[0]))
+
+    # Only the pushed resources are committed, the others are reported
+    # with their error so they can be retried
+    writers = []
+    resources = []
+    for (writer, _, partition), result in zip(messages, results):
+        if isinstance(result, Exception):
+            logger.warning(
+                f"Could not send resource {writer.uuid} to process: {result}"
+            )
+            resources.append(ResourceCreated(uuid=writer.uuid, error=str(result)))
+            continue
+        writer.source = BrokerMessage.MessageSource.WRITER
+        set_processing_info(writer, result)
+        writers.append((writer, partition))
+        resources.append(ResourceCreated(seqid=result.seqid, uuid=writer.uuid))
+
+    if x_synchronous:
+        t0 = time()
+    await transaction.commit_many(writers, wait=x_synchronous)
+
+    if x_synchronous:
+        return ResourcesCreated(resources=resources, elapsed=time() - t0)
+    else:
+        return ResourcesCreated(resources=resources)
+
+
+async def prepare_resource(
+    request: Request,
+    item: CreateResourcePayload,
+    kbid: str,
+    vectorsets: KnowledgeBoxVectorSets,
+) -> Tuple[BrokerMessage, PushPayload, int]:
+    """
+    Builds the messages of a new resource without side effects: the fields
+    are stored with `parse_fields` and the vectorsets created with
+    `vectorsets.create_pending` once the payload is valid
+    """
     partitioning = get_partitioning()
 
     # Create resource message
@@ -142,61 +264,12 @@ async def create_resource(
     if item.origin is not None:
         parse_origin(writer.origin, item.origin)
 
-    await parse_fields(
-        writer=writer,
-        item=item,
-        toprocess=toprocess,
-        kbid=kbid,
-        uuid=uuid,
-        x_skip_store=x_skip_store,
-    )
-
     if item.uservectors:
-        vectorsets = await get_vectorsets(kbid)
-        if vectorsets and len(vectorsets.vectorsets):
-            parse_vectors(writer, item.uservectors, vectorsets)
-        else:
-            for vector in item.uservectors:
-                if vector.vectors is not None:
-                    for vectorset, uservector in vector.vectors.items():
-                        if len(uservector) == 0:
-                            raise HTTPException(
-                                status_code=412,
-                                detail=str("Vectorset without vector not allowed"),
-                            )
-                        first_vector = list(uservector.values())[0]
-                        await create_vectorset(
-                            kbid, vectorset, len(first_vector.vector)
-                        )
-            vectorsets = await get_vectorsets(kbid)
-            if vectorsets is None or len(vectorsets.vectorsets) == 0:
-                raise HTTPException(
-                    status_code=412,
-                    detail=str("Vectorset was not able to be created"),
-                )
-            parse_vectors(writer, item.uservectors, vectorsets)
+        await vectorsets.parse(writer, item.uservectors)
 
     set_status(writer.basic, item)
 
-    set_info_on_span({"nuclia.rid": uuid, "nuclia.kbid": kbid})
-
-    try:
-        processing_info = await processing.send_to_process(toprocess, partition)
-    except LimitsExceededError as exc:
-        raise HTTPException(status_code=402, detail=str(exc))
-
-    writer.source = BrokerMessage.MessageSource.WRITER
-    set_processing_info(writer, processing_info)
-    if x_synchronous:
-        t0 = time()
-    await transaction.commit(writer, partition, wait=x_synchronous)
-
-    if x_synchronous:
-        return ResourceCreated(
-            seqid=processing_info.seqid, uuid=uuid, elapsed=time() - t0
-        )
-    else:
-        return ResourceCreated(seqid=processing_info.seqid, uuid=uuid)
+    return writer, toprocess, partition
 
 
 @api.patch(
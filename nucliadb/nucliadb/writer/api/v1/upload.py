@@ -23,7 +23,7 @@ import uuid
 from datetime import datetime
 from hashlib import md5
 from io import BytesIO
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from fastapi import HTTPException
 from fastapi.params import Header
@@ -54,6 +54,7 @@ from nucliadb.writer.resource.basic import parse_basic, set_processing_info
 from nucliadb.writer.resource.field import parse_fields
 from nucliadb.writer.resource.origin import parse_origin
 from nucliadb.writer.tus import TUSUPLOAD, UPLOAD, get_dm, get_storage_manager
+from nucliadb.writer.tus.dm import FileDataMangaer
 from nucliadb.writer.tus.exceptions import (
     HTTPBadRequest,
     HTTPConflict,
@@ -62,6 +63,7 @@ from nucliadb.writer.tus.exceptions import (
     HTTPServiceUnavailable,
     InvalidTUSMetadata,
 )
+from nucliadb.writer.tus.storage import FileStorageManager
 from nucliadb.writer.tus.utils import parse_tus_metadata
 from nucliadb.writer.utilities import get_processing
 from nucliadb_models.resource import NucliaDBRoles
@@ -82,9 +84,12 @@ from .router import KB_PREFIX, RESOURCE_PREFIX, RSLUG_PREFIX, api
 TUS_HEADERS = {
     "Tus-Resumable": "1.0.0",
     "Tus-Version": "1.0.0",
-    "Tus-Extension": "creation-defer-length",
+    "Tus-Extension": "creation-defer-length,concatenation",
 }
 
+# Partial uploads are stored apart until a final upload concatenates them
+KB_TUS_PARTIAL = "kbs/{kbid}/tusupload/partial/{upload_id}"
+
 
 @api.options(
     f"/{KB_PREFIX}/{{kbid}}/{RSLUG_PREFIX}/{{rslug}}/file/{{field}}/{TUSUPLOAD}/{{upload_id}}",
@@ -162,17 +167,29 @@ async def post(
     dm = get_dm()
     storage_manager = get_storage_manager()
 
+    # Concatenation: partial uploads are sent on their own and then
+    # assembled by a final upload that lists them
+    upload_concat = request.headers.get("upload-concat")
+    partial = upload_concat == "partial"
+    partial_dms: List[FileDataMangaer] = []
+    if upload_concat is not None and not partial:
+        if not upload_concat.startswith("final;"):
+            raise HTTPPreconditionFailed(detail="Invalid Upload-Concat header")
+        partial_dms = await load_partial_uploads(kbid, upload_concat[len("final;") :])
+
     if rslug:
         path_rid = await get_rid_from_params_or_raise_error(kbid, slug=rslug)
 
-    implies_resource_creation = path_rid is None
+    implies_resource_creation = path_rid is None and not partial
 
     deferred_length = False
     if request.headers.get("upload-defer-length") == "1":
         deferred_length = True
 
     size = None
-    if "upload-length" in request.headers:
+    if partial_dms:
+        size = sum(partial_dm.size for partial_dm in partial_dms)
+    elif "upload-length" in request.headers:
         size = int(request.headers["upload-length"])
     else:
         if not deferred_length:
@@ -191,18 +208,24 @@ async def post(
     else:
         metadata = {}
 
-    try:
-        path, rid, field = await start_upload_field(
-            kbid, path_rid, field, metadata.get("md5")
-        )
-    except ResourceNotFound:
-        raise HTTPNotFound("Resource is not found or not yet available")
-    except ConflictError:
-        raise HTTPConflict("A resource with the same uploaded file already exists")
-    except IngestNotAvailable:
-        raise HTTPServiceUnavailable("Upload not available right now, try again")
-
-    if implies_resource_creation:
+    if partial:
+        # Partial uploads don't belong to any resource field yet
+        path = KB_TUS_PARTIAL.format(kbid=kbid, upload_id=uuid.uuid4().hex)
+        rid = None
+        field = None
+    else:
+        try:
+            path, rid, field = await start_upload_field(
+                kbid, path_rid, field, metadata.get("md5")
+            )
+        except ResourceNotFound:
+            raise HTTPNotFound("Resource is not found or not yet available")
+        except ConflictError:
+            raise HTTPConflict("A resource with the same uploaded file already exists")
+        except IngestNotAvailable:
+            raise HTTPServiceUnavailable("Upload not available right now, try again")
+
+    if implies_resource_creation or partial:
         # When uploading a file to a new kb resource, we want to  allow multiple
         # concurrent uploads, so upload id will be randmon
         upload_id = uuid.uuid4().hex
@@ -248,6 +271,8 @@ async def post(
         deferred_length=deferred_length,
         offset=0,
         item=creation_payload,
+        partial=partial,
+        kbid=kbid,
     )
 
     if size is not None:
@@ -259,14 +284,33 @@ async def post(
     await dm.save()
 
     location = f"{request['path']}/{upload_id}"
-    return Response(
-        status_code=201,
-        headers={
-            "Location": location,  # noqa
-            "Tus-Resumable": "1.0.0",
-            "Access-Control-Expose-Headers": "Location,Tus-Resumable",
-        },
-    )
+    headers = {
+        "Location": location,  # noqa
+        "Tus-Resumable": "1.0.0",
+        "Access-Control-Expose-Headers": "Location,Tus-Resumable",
+    }
+
+    if partial_dms:
+        # Assemble the partial uploads into the final one
+        read_bytes = await storage_manager.append(
+            dm,
+            storage_manager.iterate_uploads_chunks(
+                [partial_dm.get("path") for partial_dm in partial_dms],
+                kbid,
+                storage_manager.chunk_size,
+            ),
+            0,
+        )
+        await dm.update(offset=read_bytes)
+        headers.update(
+            await finish_upload(request, kbid, dm, storage_manager, rid, field)
+        )
+        headers["Access-Control-Expose-Headers"] += ",Tus-Upload-Finished"
+        for partial_dm in partial_dms:
+            await storage_manager.delete_upload(partial_dm.get("path"), kbid)
+            await partial_dm.finish()
+
+    return Response(status_code=201, headers=headers)
 
 
 @api.head(
@@ -408,49 +452,18 @@ async def patch(
 
     upload_finished = dm.get("size") is not None and dm.offset >= dm.get("size")
 
-    if upload_finished:
-        rid = dm.get("rid", rid)
-        if rid is None:
-            raise AttributeError()
-        field = dm.get("field", field)
-        if field is None:
-            raise AttributeError()
-        path = await storage_manager.finish(dm)
+    if upload_finished and dm.get("partial"):
+        await storage_manager.finish(dm)
+        # Keep the session until a final upload concatenates it
+        await dm.update(finished=True)
+        await dm.save()
         headers["Tus-Upload-Finished"] = "1"
-        headers["NDB-Resource"] = f"/{KB_PREFIX}/{kbid}/resources/{rid}"
-        headers["NDB-Field"] = f"/{KB_PREFIX}/{kbid}/resources/{rid}/field/{field}"
-
-        item_payload = dm.get("item")
-        creation_payload = None
-        if item_payload is not None:
-            if isinstance(item_payload, str):
-                item_payload = item_payload.encode()
-            creation_payload = pickle.loads(base64.b64decode(item_payload))
-        try:
-            seqid = await store_file_on_nuclia_db(
-                size=dm.get("size"),
-                content_type=dm.get("metadata", {}).get("content_type"),
-                override_resource_title=dm.get("metadata", {}).get(
-                    "implies_resource_creation", False
-                ),
-                filename=dm.get("metadata", {}).get("filename"),
-                password=dm.get("metadata", {}).get("password"),
-                language=dm.get("metadata", {}).get("language"),
-                md5=dm.get("metadata", {}).get("md5"),
-                source=storage_manager.storage.source,
-                field=field,
-                rid=rid,
-                kbid=kbid,
-                path=path,
-                request=request,
-                bucket=storage_manager.storage.get_bucket_name(kbid),
-                item=creation_payload,
-                wait_on_commit=x_synchronous,
+    elif upload_finished:
+        headers.update(
+            await finish_upload(
+                request, kbid, dm, storage_manager, rid, field, x_synchronous
             )
-        except LimitsExceededError as exc:
-            raise HTTPException(status_code=402, detail=str(exc))
-
-        headers["NDB-Seq"] = f"{seqid}"
+        )
     else:
         await dm.save()
 
@@ -592,6 +605,85 @@ async def upload(
     return ResourceFileUploaded(seqid=seqid, uuid=rid, field_id=valid_field)
 
 
+async def load_partial_uploads(kbid: str, urls: str) -> List[FileDataMangaer]:
+    partial_dms = []
+    prefix = KB_TUS_PARTIAL.format(kbid=kbid, upload_id="")
+    for url in urls.split():
+        partial_id = url.rstrip("/").split("/")[-1]
+        partial_dm = get_dm()
+        await partial_dm.load(partial_id)
+        if not partial_dm.get("partial") or not partial_dm.get("finished"):
+            raise HTTPPreconditionFailed(
+                detail=f"Upload {partial_id} is not a finished partial upload"
+            )
+        # Upload ids are global, a final upload can only take the
+        # partial uploads of its own knowledge box
+        path = partial_dm.get("path", "")
+        if partial_dm.get("kbid") != kbid or not path.startswith(prefix):
+            raise HTTPPreconditionFailed(
+                detail=f"Upload {partial_id} does not belong to this knowledge box"
+            )
+        partial_dms.append(partial_dm)
+    if len(partial_dms) == 0:
+        raise HTTPPreconditionFailed(detail="No partial uploads to concatenate")
+    return partial_dms
+
+
+async def finish_upload(
+    request: Request,
+    kbid: str,
+    dm: FileDataMangaer,
+    storage_manager: FileStorageManager,
+    rid: Optional[str] = None,
+    field: Optional[str] = None,
+    x_synchronous: bool = False,
+) -> Dict[str, str]:
+    headers = {}
+    rid = dm.get("rid", rid)
+    if rid is None:
+        raise AttributeError()
+    field = dm.get("field", field)
+    if field is None:
+        raise AttributeError()
+    path = await storage_manager.finish(dm)
+    headers["Tus-Upload-Finished"] = "1"
+    headers["NDB-Resource"] = f"/{KB_PREFIX}/{kbid}/resources/{rid}"
+    headers["NDB-Field"] = f"/{KB_PREFIX}/{kbid}/resources/{rid}/field/{field}"
+
+    item_payload = dm.get("item")
+    creation_payload = None
+    if item_payload is not None:
+        if isinstance(item_payload, str):
+            item_payload = item_payload.encode()
+        creation_payload = pickle.loads(base64.b64decode(item_payload))
+    try:
+        seqid = await store_file_on_nuclia_db(
+            size=dm.get("size"),
+            content_type=dm.get("metadata", {}).get("content_type"),
+            override_resource_title=dm.get("metadata", {}).get(
+                "implies_resource_creation", False
+            ),
+            filename=dm.get("metadata", {}).get("filename"),
+            password=dm.get("metadata", {}).get("password"),
+            language=dm.get("metadata", {}).get("language"),
+            md5=dm.get("metadata", {}).get("md5"),
+            source=storage_manager.storage.source,
+            field=field,
+            rid=rid,
+            kbid=kbid,
+            path=path,
+            request=request,
+            bucket=storage_manager.storage.get_bucket_name(kbid),
+            item=creation_payload,
+            wait_on_commit=x_synchronous,
+        )
+    except LimitsExceededError as exc:
+        raise HTTPException(status_code=402, detail=str(exc))
+
+    headers["NDB-Seq"] = f"{seqid}"
+    return headers
+
+
 async def start_upload_field(
     kbid: str,
     rid: Optional[str] = None,
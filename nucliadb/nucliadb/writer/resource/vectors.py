@@ -16,7 +16,7 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
-from typing import Optional
+from typing import Dict, Optional
 
 from fastapi import HTTPException
 from nucliadb_protos.resources_pb2 import UserVectorsWrapper
@@ -78,6 +78,58 @@ async def get_vectorsets(kbid: str) -> Optional[VectorSets]:
         return None
 
 
+class KnowledgeBoxVectorSets:
+    """
+    Asks ingest for the vectorsets of a knowledge box only once while
+    parsing all the resources of a batch. The vectorsets the user vectors
+    would create are only recorded by `parse`, so every payload is checked
+    before any of them is created with `create_pending`
+    """
+
+    def __init__(self, kbid: str):
+        self.kbid = kbid
+        self.vectorsets: Optional[VectorSets] = None
+        self.pending: Dict[str, int] = {}
+
+    async def get(self) -> Optional[VectorSets]:
+        if self.vectorsets is None:
+            self.vectorsets = await get_vectorsets(self.kbid)
+        return self.vectorsets
+
+    def invalidate(self):
+        self.vectorsets = None
+
+    async def parse(self, writer: BrokerMessage, vectors: UserVectorsWrapperPy):
+        kb_vectorsets = await self.get()
+        if kb_vectorsets is None or len(kb_vectorsets.vectorsets) == 0:
+            kb_vectorsets = VectorSets()
+            for vector in vectors:
+                if vector.vectors is not None:
+                    for vectorset, uservector in vector.vectors.items():
+                        if len(uservector) == 0:
+                            raise HTTPException(
+                                status_code=412,
+                                detail=str("Vectorset without vector not allowed"),
+                            )
+                        first_vector = list(uservector.values())[0]
+                        dimension = len(first_vector.vector)
+                        kb_vectorsets.vectorsets[vectorset].dimension = dimension
+                        self.pending[vectorset] = dimension
+            if len(kb_vectorsets.vectorsets) == 0:
+                raise HTTPException(
+                    status_code=412,
+                    detail=str("Vectorset was not able to be created"),
+                )
+            # Next resources of the batch are checked against them
+            self.vectorsets = kb_vectorsets
+        parse_vectors(writer, vectors, kb_vectorsets)
+
+    async def create_pending(self):
+        for vectorset, dimension in self.pending.items():
+            await create_vectorset(self.kbid, vectorset, dimension)
+        self.pending.clear()
+
+
 def parse_vectors(
     writer: BrokerMessage, vectors: UserVectorsWrapperPy, vectorsets: VectorSets
 ):
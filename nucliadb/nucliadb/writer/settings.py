@@ -24,8 +24,12 @@ from pydantic import BaseSettings
 
 class Settings(BaseSettings):
     dm_enabled: bool = True
+    dm_driver: str = "redis"  # redis | maindb | memory
     dm_redis_host: Optional[str] = None
     dm_redis_port: Optional[int] = None
+    dm_ttl: int = 60 * 50 * 5
+    # maindb has no expiration, abandoned sessions are purged periodically
+    dm_purge_interval: int = 60 * 60
 
 
 settings = Settings()
@@ -27,7 +27,7 @@ from httpx import AsyncClient
 from nucliadb_protos.resources_pb2 import FieldType
 from nucliadb_protos.writer_pb2 import BrokerMessage, ResourceFieldId
 
-from nucliadb.writer.api.v1.router import KB_PREFIX, RSLUG_PREFIX
+from nucliadb.writer.api.v1.router import KB_PREFIX, KBS_PREFIX, RSLUG_PREFIX
 from nucliadb.writer.api.v1.upload import maybe_b64decode
 from nucliadb.writer.tus import TUSUPLOAD, UPLOAD
 from nucliadb.writer.utilities import get_processing
@@ -49,7 +49,7 @@ async def test_knowledgebox_file_tus_options(
         assert resp.status_code == 204
         assert resp.headers["tus-resumable"] == "1.0.0"
         assert resp.headers["tus-version"] == "1.0.0"
-        assert resp.headers["tus-extension"] == "creation-defer-length"
+        assert resp.headers["tus-extension"] == "creation-defer-length,concatenation"
 
         resp = await client.options(
             f"/{KB_PREFIX}/{knowledgebox_writer}/resource/xxx/file/xxx/{TUSUPLOAD}"
@@ -57,13 +57,13 @@ async def test_knowledgebox_file_tus_options(
         assert resp.status_code == 204
         assert resp.headers["tus-resumable"] == "1.0.0"
         assert resp.headers["tus-version"] == "1.0.0"
-        assert resp.headers["tus-extension"] == "creation-defer-length"
+        assert resp.headers["tus-extension"] == "creation-defer-length,concatenation"
 
         resp = await client.options(f"/{KB_PREFIX}/{knowledgebox_writer}/{TUSUPLOAD}")
         assert resp.status_code == 204
         assert resp.headers["tus-resumable"] == "1.0.0"
         assert resp.headers["tus-version"] == "1.0.0"
-        assert resp.headers["tus-extension"] == "creation-defer-length"
+        assert resp.headers["tus-extension"] == "creation-defer-length,concatenation"
 
         resp = await client.options(
             f"/{KB_PREFIX}/{knowledgebox_writer}/{TUSUPLOAD}/xxx"
@@ -71,7 +71,120 @@ async def test_knowledgebox_file_tus_options(
         assert resp.status_code == 204
         assert resp.headers["tus-resumable"] == "1.0.0"
         assert resp.headers["tus-version"] == "1.0.0"
-        assert resp.headers["tus-extension"] == "creation-defer-length"
+        assert resp.headers["tus-extension"] == "creation-defer-length,concatenation"
+
+
+@pytest.mark.asyncio
+async def test_knowledgebox_file_tus_upload_concatenation(
+    writer_api, knowledgebox_writer
+):
+    with open(f"{ASSETS_PATH}/image001.jpg", "rb") as f:
+        image = f.read()
+
+    async with writer_api(roles=[NucliaDBRoles.WRITER]) as client:
+        partial_urls = []
+        for chunk in (image[:10000], image[10000:]):
+            resp = await client.post(
+                f"/{KB_PREFIX}/{knowledgebox_writer}/{TUSUPLOAD}",
+                headers={
+                    "tus-resumable": "1.0.0",
+                    "upload-concat": "partial",
+                    "upload-length": f"{len(chunk)}",
+                },
+            )
+            assert resp.status_code == 201
+            url = resp.headers["location"]
+
+            resp = await client.patch(
+                url,
+                data=chunk,
+                headers={"upload-offset": "0", "content-length": f"{len(chunk)}"},
+            )
+            assert resp.status_code == 200
+            assert resp.headers["Tus-Upload-Finished"] == "1"
+            assert "ndb-field" not in resp.headers
+            partial_urls.append(url)
+
+        filename = base64.b64encode(b"image.jpg").decode()
+        resp = await client.post(
+            f"/{KB_PREFIX}/{knowledgebox_writer}/{TUSUPLOAD}",
+            headers={
+                "tus-resumable": "1.0.0",
+                "upload-concat": f"final;{' '.join(partial_urls)}",
+                "upload-metadata": f"filename {filename}",
+                "content-type": "image/jpg",
+            },
+        )
+        assert resp.status_code == 201
+        assert resp.headers["Tus-Upload-Finished"] == "1"
+
+        # Partial uploads are gone once concatenated
+        resp = await client.post(
+            f"/{KB_PREFIX}/{knowledgebox_writer}/{TUSUPLOAD}",
+            headers={
+                "tus-resumable": "1.0.0",
+                "upload-concat": f"final;{' '.join(partial_urls)}",
+            },
+        )
+        assert resp.status_code == 412
+
+    transaction = get_transaction()
+    sub = await transaction.js.pull_subscribe("nucliadb.1", "auto")
+    msgs = await sub.fetch(1)
+    writer = BrokerMessage()
+    writer.ParseFromString(msgs[0].data)
+    await msgs[0].ack()
+
+    field = list(writer.files.keys())[0]
+    assert writer.files[field].file.size == len(image)
+
+    storage = await get_storage()
+    data = await storage.downloadbytes(
+        bucket=writer.files[field].file.bucket_name,
+        key=writer.files[field].file.uri,
+    )
+    assert data.read() == image
+
+
+@pytest.mark.asyncio
+async def test_knowledgebox_file_tus_upload_concatenation_other_kb(
+    writer_api, knowledgebox_writer
+):
+    async with writer_api(roles=[NucliaDBRoles.MANAGER]) as client:
+        resp = await client.post(
+            f"/{KBS_PREFIX}", json={"slug": "kbid2", "title": "Other Knowledge Box"}
+        )
+        assert resp.status_code == 201
+        other_kbid = resp.json()["uuid"]
+
+    async with writer_api(roles=[NucliaDBRoles.WRITER]) as client:
+        resp = await client.post(
+            f"/{KB_PREFIX}/{other_kbid}/{TUSUPLOAD}",
+            headers={
+                "tus-resumable": "1.0.0",
+                "upload-concat": "partial",
+                "upload-length": "4",
+            },
+        )
+        assert resp.status_code == 201
+        url = resp.headers["location"]
+
+        resp = await client.patch(
+            url,
+            data=b"data",
+            headers={"upload-offset": "0", "content-length": "4"},
+        )
+        assert resp.status_code == 200
+
+        # The partial upload of another knowledge box can't be concatenated
+        resp = await client.post(
+            f"/{KB_PREFIX}/{knowledgebox_writer}/{TUSUPLOAD}",
+            headers={
+                "tus-resumable": "1.0.0",
+                "upload-concat": f"final;{url}",
+            },
+        )
+        assert resp.status_code == 412
 
 
 @pytest.mark.asyncio
@@ -34,6 +34,7 @@ from nucliadb.writer.api.v1.router import (
     RESOURCES_PREFIX,
     RSLUG_PREFIX,
 )
+from nucliadb.writer.resource.vectors import get_vectorsets
 from nucliadb.writer.tests.test_fields import (
     TEST_CONVERSATION_PAYLOAD,
     TEST_DATETIMES_PAYLOAD,
@@ -44,8 +45,10 @@ from nucliadb.writer.tests.test_fields import (
     TEST_LINK_PAYLOAD,
     TEST_TEXT_PAYLOAD,
 )
+from nucliadb.writer.utilities import get_processing
 from nucliadb_models.resource import NucliaDBRoles
-from nucliadb_utils.utilities import get_ingest
+from nucliadb_utils.exceptions import LimitsExceededError, SendToProcessError
+from nucliadb_utils.utilities import get_ingest, get_transaction
 
 
 @pytest.mark.asyncio
@@ -205,6 +208,139 @@ async def test_resource_crud(
         assert resp.status_code == 204
 
 
+@pytest.mark.asyncio
+async def test_create_resources_batch(
+    writer_api: Callable[[List[str]], AsyncClient], knowledgebox_writer: str
+):
+    knowledgebox_id = knowledgebox_writer
+    processing = get_processing()
+    async with writer_api([NucliaDBRoles.WRITER]) as client:
+        resp = await client.post(
+            f"/{KB_PREFIX}/{knowledgebox_id}/{RESOURCES_PREFIX}/batch",
+            json={
+                "resources": [
+                    {
+                        "slug": f"batch{i}",
+                        "title": f"My resource {i}",
+                        "texts": {"text1": TEST_TEXT_PAYLOAD},
+                    }
+                    for i in range(3)
+                ]
+            },
+        )
+        assert resp.status_code == 201
+        resources = resp.json()["resources"]
+        assert len(resources) == 3
+        assert len({resource["uuid"] for resource in resources}) == 3
+        assert [call["uuid"] for call in processing.calls[-3:]] == [
+            resource["uuid"] for resource in resources
+        ]
+
+        # The whole batch is rejected if a payload is not valid
+        resp = await client.post(
+            f"/{KB_PREFIX}/{knowledgebox_id}/{RESOURCES_PREFIX}/batch",
+            json={"resources": [{"slug": "batch"}, {"slug": "batch"}]},
+        )
+        assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_create_resources_batch_validates_before_side_effects(
+    writer_api: Callable[[List[str]], AsyncClient], knowledgebox_writer: str
+):
+    knowledgebox_id = knowledgebox_writer
+    processing = get_processing()
+    calls = len(processing.calls)
+
+    def uservectors(vector: List[float]):
+        return [
+            {
+                "vectors": {"base": {"vector1": {"vector": vector}}},
+                "field": {"field_type": "text", "field": "text1"},
+            }
+        ]
+
+    async with writer_api([NucliaDBRoles.WRITER]) as client:
+        resp = await client.post(
+            f"/{KB_PREFIX}/{knowledgebox_id}/{RESOURCES_PREFIX}/batch",
+            json={
+                "resources": [
+                    {"texts": {"text1": TEST_TEXT_PAYLOAD}, "uservectors": vectors}
+                    for vectors in (
+                        uservectors([4.0, 2.0, 3.0]),
+                        uservectors([4.0, 2.0]),
+                    )
+                ]
+            },
+        )
+        assert resp.status_code == 412
+
+    # The vectorset of the first resource was not created
+    vectorsets = await get_vectorsets(knowledgebox_id)
+    assert vectorsets is None or len(vectorsets.vectorsets) == 0
+    assert len(processing.calls) == calls
+
+
+@pytest.mark.asyncio
+async def test_create_resources_batch_partial_push(
+    writer_api: Callable[[List[str]], AsyncClient], knowledgebox_writer: str, mocker
+):
+    knowledgebox_id = knowledgebox_writer
+    processing = get_processing()
+    transaction = get_transaction()
+    send_to_process = processing.send_to_process
+
+    async def push(item: PushPayload, partition: int):
+        if item.slug == "partial1":
+            raise SendToProcessError("500: error")
+        return await send_to_process(item, partition)
+
+    mocker.patch.object(processing, "send_to_process", push)
+    commit_many = mocker.patch.object(
+        transaction,
+        "commit_many",
+        AsyncMock(wraps=transaction.commit_many),
+    )
+
+    async with writer_api([NucliaDBRoles.WRITER]) as client:
+        resp = await client.post(
+            f"/{KB_PREFIX}/{knowledgebox_id}/{RESOURCES_PREFIX}/batch",
+            json={
+                "resources": [
+                    {"slug": f"partial{i}", "texts": {"text1": TEST_TEXT_PAYLOAD}}
+                    for i in range(3)
+                ]
+            },
+        )
+        assert resp.status_code == 201
+        resources = resp.json()["resources"]
+        assert [resource.get("error") for resource in resources] == [
+            None,
+            "500: error",
+            None,
+        ]
+        assert "seqid" not in resources[1]
+
+        # Only the pushed resources are committed
+        writers = commit_many.call_args[0][0]
+        assert [writer.uuid for writer, _ in writers] == [
+            resources[0]["uuid"],
+            resources[2]["uuid"],
+        ]
+
+        # Nothing was pushed, so the whole batch is rejected
+        mocker.patch.object(
+            processing,
+            "send_to_process",
+            AsyncMock(side_effect=LimitsExceededError("limits exceeded")),
+        )
+        resp = await client.post(
+            f"/{KB_PREFIX}/{knowledgebox_id}/{RESOURCES_PREFIX}/batch",
+            json={"resources": [{"slug": "limits"}]},
+        )
+        assert resp.status_code == 402
+
+
 @pytest.mark.asyncio
 async def test_resource_crud_sync(
     writer_api: Callable[[List[str]], AsyncClient], knowledgebox_writer: str
@@ -24,6 +24,7 @@ import pytest
 
 from nucliadb.writer.settings import settings
 from nucliadb.writer.tus import get_dm
+from nucliadb.writer.tus.dm import FileDataMangaer, MaindbFileDataManager
 from nucliadb.writer.tus.exceptions import CloudFileNotFound
 from nucliadb.writer.tus.gcs import GCloudBlobStore, GCloudFileStorageManager
 from nucliadb.writer.tus.local import LocalBlobStore, LocalFileStorageManager
@@ -105,3 +106,57 @@ async def storage_test(storage: BlobStore, file_storage_manager: FileStorageMana
     with pytest.raises(CloudFileNotFound):
         async for data in file_storage_manager.read_range(path, kbid, 1, size):
             assert data == example[1:]
+
+
+@pytest.mark.asyncio
+async def test_memory_dm_expires_sessions():
+    upload_id = uuid.uuid4().hex
+    dm = FileDataMangaer(ttl=-1)
+    await dm.load(upload_id)
+    await dm.update(offset=10)
+    await dm.save()
+
+    dm = FileDataMangaer(ttl=-1)
+    await dm.load(upload_id)
+    assert dm.offset == 0
+
+    dm = FileDataMangaer()
+    await dm.load(upload_id)
+    await dm.update(offset=10)
+    await dm.save()
+
+    dm = FileDataMangaer()
+    await dm.load(upload_id)
+    assert dm.offset == 10
+    await dm.finish()
+
+
+@pytest.mark.asyncio
+async def test_maindb_dm_purges_expired_sessions(writer_api):
+    upload_id = uuid.uuid4().hex
+    dm = MaindbFileDataManager()
+    await dm.load(upload_id)
+    await dm.update(offset=10)
+    await dm.save()
+
+    assert await MaindbFileDataManager().purge_expired() == 0
+    dm = MaindbFileDataManager()
+    await dm.load(upload_id)
+    assert dm.offset == 10
+
+    assert await MaindbFileDataManager(ttl=-1).purge_expired() >= 1
+    dm = MaindbFileDataManager()
+    await dm.load(upload_id)
+    assert dm.offset == 0
+
+
+@pytest.mark.asyncio
+async def test_iterate_chunks():
+    async def stream():
+        for chunk in (b"ab", b"", b"cdefg", b"h"):
+            yield chunk
+
+    chunks = [
+        chunk async for chunk in FileStorageManager(None).iterate_chunks(stream(), 3)
+    ]
+    assert chunks == [b"abc", b"def", b"gh"]
@@ -17,10 +17,18 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
+import asyncio
 from typing import Any, Dict
 
+from redis import asyncio as aioredis
+
+from nucliadb.writer import logger
 from nucliadb.writer.settings import settings as writer_settings
-from nucliadb.writer.tus.dm import FileDataMangaer, RedisFileDataManager
+from nucliadb.writer.tus.dm import (
+    FileDataMangaer,
+    MaindbFileDataManager,
+    RedisFileDataManager,
+)
 from nucliadb.writer.tus.exceptions import ManagerNotAvailable
 from nucliadb.writer.tus.gcs import GCloudBlobStore, GCloudFileStorageManager
 from nucliadb.writer.tus.local import LocalBlobStore, LocalFileStorageManager
@@ -77,21 +85,50 @@ async def initialize():
 
         DRIVER["StorageManager"] = LocalFileStorageManager(storage_backend)
 
+    if writer_settings.dm_enabled and writer_settings.dm_driver == "maindb":
+        DRIVER["DataManagerPurge"] = asyncio.create_task(purge_expired_sessions())
+
 
 async def finalize():
     if DRIVER.get("StorageBackend"):
         await DRIVER["StorageBackend"].finalize()
         DRIVER["StorageBackend"] = None
         DRIVER["StorageManagerKlass"] = None
+    if DRIVER.get("DataManagerRedis"):
+        await DRIVER["DataManagerRedis"].close()
+        DRIVER["DataManagerRedis"] = None
+    if DRIVER.get("DataManagerPurge"):
+        DRIVER["DataManagerPurge"].cancel()
+        DRIVER["DataManagerPurge"] = None
+
+
+async def purge_expired_sessions():
+    dm = MaindbFileDataManager(ttl=writer_settings.dm_ttl)
+    while True:
+        await asyncio.sleep(writer_settings.dm_purge_interval)
+        try:
+            purged = await dm.purge_expired()
+        except Exception:
+            logger.exception("Could not purge the expired upload sessions")
+        else:
+            logger.info(f"Purged {purged} expired upload sessions")
 
 
 def get_dm() -> FileDataMangaer:  # type: ignore
-    if writer_settings.dm_enabled:
-        dm_driver: FileDataMangaer = RedisFileDataManager(
-            f"redis://{writer_settings.dm_redis_host}:{writer_settings.dm_redis_port}"
-        )
+    dm_driver: FileDataMangaer
+    if not writer_settings.dm_enabled or writer_settings.dm_driver == "memory":
+        dm_driver = FileDataMangaer(ttl=writer_settings.dm_ttl)
+    elif writer_settings.dm_driver == "maindb":
+        dm_driver = MaindbFileDataManager(ttl=writer_settings.dm_ttl)
     else:
-        dm_driver = FileDataMangaer()
+        # Connections are shared by all the uploads
+        if DRIVER.get("DataManagerRedis") is None:
+            DRIVER["DataManagerRedis"] = aioredis.from_url(
+                f"redis://{writer_settings.dm_redis_host}:{writer_settings.dm_redis_port}"
+            )
+        dm_driver = RedisFileDataManager(
+            DRIVER["DataManagerRedis"], ttl=writer_settings.dm_ttl
+        )
 
     if dm_driver is None:
         raise AttributeError("DM Not configured")
@@ -18,20 +18,25 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import orjson
 from redis import asyncio as aioredis
 from starlette.requests import Request
 
+from nucliadb.ingest.utils import get_driver
+
 from .exceptions import HTTPPreconditionFailed
 
+TUS_SESSION = "/internal/tusupload/{upload_id}"
+
 
 class NoRedisConfigured(Exception):
     pass
 
 
-DATA: Dict[str, Any] = {}
+# upload id -> (expiration time, session data)
+DATA: Dict[str, Tuple[float, bytes]] = {}
 
 
 class FileDataMangaer:
@@ -40,11 +45,15 @@ class FileDataMangaer:
     key = None
     _ttl = 60 * 50 * 5  # 5 minutes should be plenty of time between activity
 
+    def __init__(self, ttl: Optional[int] = None):
+        if ttl is not None:
+            self._ttl = ttl
+
     async def load(self, key):
         # preload data
         self.key = key
         if self._data is None:
-            data = DATA.get(self.key)
+            data = await self._get(self.key)
             if not data:
                 self._data = {}
             else:
@@ -74,7 +83,7 @@ class FileDataMangaer:
             raise Exception("Not initialized")
         self._data["last_activity"] = time.time()
         value = orjson.dumps(self._data)
-        DATA[self.key] = value
+        await self._set(self.key, value)
 
     async def update(self, **kwargs):
         self._data.update(kwargs)
@@ -86,8 +95,23 @@ class FileDataMangaer:
         if self.key is None:
             raise Exception("Not initialized")
         # and clear the cache key
-        if self.key in DATA:
-            del DATA[self.key]
+        await self._delete(self.key)
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        expiration, value = DATA.get(key, (0, None))
+        if expiration < time.time():
+            DATA.pop(key, None)
+            return None
+        return value
+
+    async def _set(self, key: str, value: bytes):
+        now = time.time()
+        for expired in [k for k, (expiration, _) in DATA.items() if expiration < now]:
+            del DATA[expired]
+        DATA[key] = (now + self._ttl, value)
+
+    async def _delete(self, key: str):
+        DATA.pop(key, None)
 
     @property
     def metadata(self):
@@ -116,29 +140,63 @@ class FileDataMangaer:
 
 
 class RedisFileDataManager(FileDataMangaer):
-    def __init__(self, redis_url: str):
-        self.redis = aioredis.from_url(redis_url)
-
-    async def load(self, key):
-        # preload data
-        self.key = key
-        if self._data is None:
-            data = await self.redis.get(self.key)
-            if not data:
-                self._data = {}
-            else:
-                self._data = orjson.loads(data)
-                self._loaded = True
-
-    async def save(self):
-        if self.key is None:
-            raise Exception("Not initialized")
-        self._data["last_activity"] = time.time()
-        value = orjson.dumps(self._data)
-        await self.redis.set(self.key, value, ex=self._ttl)
-
-    async def _delete_key(self):
-        if self.key is None:
-            raise Exception("Not initialized")
-        # and clear the cache key
-        await self.redis.delete(self.key)
+    def __init__(self, redis: aioredis.Redis, ttl: Optional[int] = None):
+        super().__init__(ttl)
+        self.redis = redis
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    async def _set(self, key: str, value: bytes):
+        await self.redis.set(key, value, ex=self._ttl)
+
+    async def _delete(self, key: str):
+        await self.redis.delete(key)
+
+
+class MaindbFileDataManager(FileDataMangaer):
+    """
+    Keeps the sessions in maindb, which has no expiration, so sessions
+    without activity for longer than the ttl are dropped when loaded or
+    by `purge_expired`
+    """
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        driver = await get_driver()
+        async with driver.transaction() as txn:
+            value = await txn.get(TUS_SESSION.format(upload_id=key))
+        if value is None:
+            return None
+        last_activity = orjson.loads(value).get("last_activity", 0)
+        if last_activity + self._ttl < time.time():
+            await self._delete(key)
+            return None
+        return value
+
+    async def _set(self, key: str, value: bytes):
+        driver = await get_driver()
+        async with driver.transaction() as txn:
+            await txn.set(TUS_SESSION.format(upload_id=key), value)
+            await txn.commit(resource=False)
+
+    async def _delete(self, key: str):
+        driver = await get_driver()
+        async with driver.transaction() as txn:
+            await txn.delete(TUS_SESSION.format(upload_id=key))
+            await txn.commit(resource=False)
+
+    async def purge_expired(self) -> int:
+        """
+        Drops the sessions that are never loaded again, like abandoned uploads
+        """
+        driver = await get_driver()
+        prefix = TUS_SESSION.format(upload_id="")
+        async with driver.transaction() as txn:
+            upload_ids = [
+                key[len(prefix) :] async for key in txn.keys(match=prefix, count=-1)
+            ]
+        purged = 0
+        for upload_id in upload_ids:
+            if await self._get(upload_id) is None:
+                purged += 1
+        return purged
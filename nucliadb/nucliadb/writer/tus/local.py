@@ -63,9 +63,9 @@ class LocalFileStorageManager(FileStorageManager):
     async def iter_data(self, uri, kbid: str, headers=None):
         bucket = self.storage.get_bucket_name(kbid)
         file_path = self.get_file_path(bucket, uri)
-        async with aiofiles.open(file_path) as resp:
+        async with aiofiles.open(file_path, "rb") as resp:
             data = await resp.read(CHUNK_SIZE)
-            while data is not None:
+            while data:
                 yield data
                 data = await resp.read(CHUNK_SIZE)
 
@@ -19,7 +19,7 @@
 #
 from __future__ import annotations
 
-from typing import AsyncIterator, Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from lru import LRU  # type: ignore
 from nucliadb_protos.resources_pb2 import CloudFile
@@ -117,25 +117,39 @@ class FileStorageManager:
         )
 
     async def iterate_body_chunks(self, request, chunk_size):
-        partial = b""
-        remaining = b""
-        async for chunk in request.stream():
-            if len(chunk) == 0:
-                continue
+        async for chunk in self.iterate_chunks(request.stream(), chunk_size):
+            yield chunk
 
-            partial += remaining[:chunk_size]
-            remaining = b""
+    async def iterate_uploads_chunks(
+        self, uris: List[str], kbid: str, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """
+        Data of the uploads stored at `uris`, one after the other
+        """
 
-            wanted = chunk_size - len(partial)
-            partial += chunk[:wanted]
+        async def iter_uploads():
+            for uri in uris:
+                async for chunk in self.iter_data(uri, kbid):
+                    yield chunk
 
-            remaining = chunk[wanted:]
+        async for chunk in self.iterate_chunks(iter_uploads(), chunk_size):
+            yield chunk
 
-            if len(partial) < chunk_size:
+    async def iterate_chunks(
+        self, stream: AsyncIterator[bytes], chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """
+        Regroups the stream in chunks of `chunk_size`, but the last one
+        """
+        partial = b""
+        async for chunk in stream:
+            if len(chunk) == 0:
                 continue
 
-            yield partial
-            partial = b""
+            partial += chunk
+            while len(partial) >= chunk_size:
+                yield partial[:chunk_size]
+                partial = partial[chunk_size:]
 
-        if partial or remaining:
-            yield partial + remaining
+        if partial:
+            yield partial
@@ -57,6 +57,7 @@ setup(
             "nucliadb_purge = nucliadb.purge:purge",
             "ndb_ingest = nucliadb.ingest.app:run",
             "ndb_purge = nucliadb.ingest.purge:run",
+            "ndb_reindex = nucliadb.ingest.reindex:run",
             "nucliadb_one = nucliadb.one:run",
             "extract-openapi-reader = nucliadb.reader.openapi:command_extract_openapi",
             "reader-metrics = nucliadb.reader.run:run_with_metrics",
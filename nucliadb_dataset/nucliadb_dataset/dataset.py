@@ -21,6 +21,8 @@ import base64
 import json
 import os
 import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
 from typing import (
     TYPE_CHECKING,
@@ -36,6 +38,7 @@ from typing import (
 
 import boto3
 import pyarrow as pa  # type: ignore
+from botocore.exceptions import ClientError  # type: ignore
 from google.auth.credentials import AnonymousCredentials  # type: ignore
 from google.cloud import storage  # type: ignore
 from google.oauth2 import service_account  # type: ignore
@@ -54,7 +57,7 @@ from nucliadb_dataset.mapping import (
     batch_to_token_classification_arrow,
     bytes_to_batch,
 )
-from nucliadb_dataset.streamer import Streamer, StreamerAlreadyRunning
+from nucliadb_dataset.streamer import Streamer
 from nucliadb_models.entities import KnowledgeBoxEntities
 from nucliadb_models.labels import KnowledgeBoxLabels
 from nucliadb_sdk.client import NucliaDBClient
@@ -63,6 +66,9 @@ from nucliadb_sdk.utils import get_kb
 
 CHUNK_SIZE = 5 * 1024 * 1024
 
+# Partitions downloaded at the same time
+MAX_WORKERS = 4
+
 if TYPE_CHECKING:  # pragma: no cover
     TaskValue = TaskType.V
 else:
@@ -102,23 +108,75 @@ class NucliaDataset(object):
         self.entities = None
         self.folder = None
 
-    def iter_all_partitions(self, force=False) -> Iterator[Tuple[str, str]]:
+    def iter_all_partitions(
+        self, force=False, max_workers: int = MAX_WORKERS
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Yield the partitions in order while the next ones are downloaded in
+        the background. Each partition file is removed once the consumer
+        asks for the next one.
+        """
         partitions = self.get_partitions()
-        for index, partition in enumerate(partitions):
-            print(f"Reading partition {partition} {index}/{len(partitions)}")
-            filename = self.read_partition(partition, ACTUAL_PARTITION, force)
-            print("done")
+        filenames = [f"{ACTUAL_PARTITION}_{partition}" for partition in partitions]
+        for partition, filename in self._read_partitions(
+            partitions, filenames, force=force, max_workers=max_workers
+        ):
             yield partition, filename
+            os.remove(filename)
 
-    def read_all_partitions(self, force=False, path: Optional[str] = None) -> List[str]:
+    def read_all_partitions(
+        self,
+        force=False,
+        path: Optional[str] = None,
+        max_workers: int = MAX_WORKERS,
+    ) -> List[str]:
         partitions = self.get_partitions()
-        result = []
-        for index, partition in enumerate(partitions):
-            print(f"Reading partition {partition} {index}/{len(partitions)}")
-            filename = self.read_partition(partition, force=force, path=path)
-            result.append(filename)
-            print("done")
-        return result
+        return [
+            filename
+            for _, filename in self._read_partitions(
+                partitions, partitions, force=force, path=path, max_workers=max_workers
+            )
+        ]
+
+    def _read_partitions(
+        self,
+        partitions: List[str],
+        filenames: List[str],
+        force: bool = False,
+        path: Optional[str] = None,
+        max_workers: int = MAX_WORKERS,
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Download up to `max_workers` partitions at the same time, yielding
+        them in order as they are done.
+        """
+        pending: "deque[Tuple[str, Future]]" = deque()
+        todo = iter(list(zip(partitions, filenames)))
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+
+            def submit():
+                for partition, filename in todo:
+                    future = executor.submit(
+                        self.read_partition, partition, filename, force, path
+                    )
+                    pending.append((partition, future))
+                    if len(pending) >= max_workers:
+                        break
+
+            submit()
+            index = 0
+            try:
+                while pending:
+                    partition, future = pending.popleft()
+                    index += 1
+                    print(f"Reading partition {partition} {index}/{len(partitions)}")
+                    filename = future.result()
+                    print("done")
+                    submit()
+                    yield partition, filename
+            finally:
+                for _, future in pending:
+                    future.cancel()
 
     def get_partitions(self):
         raise NotImplementedError()
@@ -173,7 +231,6 @@ class NucliaDBDataset(NucliaDataset):
         self.trainset = trainset
         self.client = client
         self.knowledgebox = KnowledgeBox(self.client)
-        self.streamer = Streamer(self.trainset, self.client)
 
         if self.trainset.type == TaskType.PARAGRAPH_CLASSIFICATION:
             self._configure_paragraph_classification()
@@ -316,11 +373,11 @@ class NucliaDBDataset(NucliaDataset):
         path: Optional[str] = None,
     ):
         """
-        Export an arrow partition from a live NucliaDB and store it locally
-        """
-        if self.streamer.initialized:
-            raise StreamerAlreadyRunning()
+        Export an arrow partition from a live NucliaDB and store it locally.
 
+        A `.tmp` file left behind by an interrupted export is resumed from
+        its last complete record batch, unless `force` is set.
+        """
         if filename is None:
             filename = partition_id
 
@@ -332,23 +389,69 @@ class NucliaDBDataset(NucliaDataset):
         if os.path.exists(filename) and force is False:
             return filename
 
-        self.streamer.initialize(partition_id)
         filename_tmp = f"{filename}.tmp"
+        filename_partial = f"{filename}.partial"
+        if force:
+            for leftover in (filename_tmp, filename_partial):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+        elif os.path.exists(filename_tmp) and not os.path.exists(filename_partial):
+            # If both exist we were interrupted while copying the partial one
+            os.rename(filename_tmp, filename_partial)
+
+        # Every read gets its own stream, so partitions can be read concurrently
+        streamer = Streamer(self.trainset, self.client)
+        streamer.initialize(partition_id)
         print(
-            f"Generating partition {partition_id} from {self.streamer.base_url} at {filename}"
+            f"Generating partition {partition_id} from {streamer.base_url} at {filename}"
         )
-        with open(filename_tmp, "wb") as sink:
-            with pa.ipc.new_stream(sink, self.schema) as writer:
-                for batch in self.streamer:
-                    batch = self._map(batch)
-                    if batch is None:
-                        break
-                    writer.write_batch(batch)
+        try:
+            with open(filename_tmp, "wb") as sink:
+                with pa.ipc.new_stream(sink, self.schema) as writer:
+                    recovered = self._recover_batches(filename_partial, writer)
+                    if recovered:
+                        print(
+                            f"Resuming partition {partition_id} after {recovered} batches"
+                        )
+                    # The stream of a partition is stable, so the batches we
+                    # already have are skipped without decoding them
+                    for index, payload in enumerate(streamer.prefetch()):
+                        if index < recovered:
+                            continue
+                        batch = self._map(payload)
+                        if batch is None:
+                            break
+                        writer.write_batch(batch)
+        finally:
+            streamer.finalize()
         print("-" * 10)
-        self.streamer.finalize()
         os.rename(filename_tmp, filename)
         return filename
 
+    def _recover_batches(self, filename_partial: str, writer) -> int:
+        """
+        Copy the complete record batches of a partially written partition
+        to `writer`, returning how many there were.
+        """
+        recovered = 0
+        if not os.path.exists(filename_partial):
+            return recovered
+        try:
+            with pa.OSFile(filename_partial, "rb") as source:
+                reader = pa.ipc.open_stream(source)
+                if reader.schema.equals(self.schema):
+                    while True:
+                        try:
+                            writer.write_batch(reader.read_next_batch())
+                        except StopIteration:
+                            break
+                        recovered += 1
+        except (pa.ArrowInvalid, OSError):
+            # A truncated batch ends the recovery, the rest is fetched again
+            pass
+        os.remove(filename_partial)
+        return recovered
+
 
 class S3DatasetsClient:
     def __init__(self, settings):
@@ -367,10 +470,21 @@ class S3DatasetsClient:
         files_list = [obj["Key"] for obj in objects.get("Contents", [])]
         return files_list
 
-    def download(self, bucket_name: str, filename: str, file_obj) -> None:
-        obj = self.client.get_object(Bucket=bucket_name, Key=filename)
-        data = obj["Body"]
-        file_obj.write(data.read())
+    def download(
+        self, bucket_name: str, filename: str, file_obj, offset: int = 0
+    ) -> None:
+        kwargs = {}
+        if offset > 0:
+            kwargs["Range"] = f"bytes={offset}-"
+        try:
+            obj = self.client.get_object(Bucket=bucket_name, Key=filename, **kwargs)
+        except ClientError as err:
+            if offset > 0 and err.response["Error"]["Code"] == "InvalidRange":
+                # Everything was already downloaded
+                return
+            raise
+        for chunk in obj["Body"].iter_chunks(CHUNK_SIZE):
+            file_obj.write(chunk)
 
 
 class GCSDatasetsClient:
@@ -394,14 +508,18 @@ class GCSDatasetsClient:
         arrow_files = [blob.name for blob in bucket.list_blobs(prefix=path)]
         return arrow_files
 
-    def download(self, bucket_name: str, filename: str, file_obj) -> None:
+    def download(
+        self, bucket_name: str, filename: str, file_obj, offset: int = 0
+    ) -> None:
         bucket = self.client.bucket(bucket_name)
         blob = bucket.get_blob(filename)
 
         if blob is None:
             raise ValueError(f"File {filename} not found on {bucket_name}")
 
-        blob.download_to_file(file_obj)
+        if offset >= blob.size:
+            return
+        blob.download_to_file(file_obj, start=offset or None)
 
 
 class NucliaCloudDataset(NucliaDataset):
@@ -436,7 +554,10 @@ class NucliaCloudDataset(NucliaDataset):
         path: Optional[str] = None,
     ):
         """
-        Download an pregenerated arrow partition from a bucket and store it locally
+        Download an pregenerated arrow partition from a bucket and store it locally.
+
+        A `.tmp` file left behind by an interrupted download is resumed from
+        where it stopped, unless `force` is set.
         """
         if filename is None:
             filename = partition_id
@@ -450,10 +571,16 @@ class NucliaCloudDataset(NucliaDataset):
             return filename
 
         filename_tmp = f"{filename}.tmp"
+        offset = 0
+        if os.path.exists(filename_tmp) and force is False:
+            offset = os.stat(filename_tmp).st_size
         print(f"Downloading partition {partition_id} from {self.bucket}/{self.key}")
-        with open(filename_tmp, "wb") as downloaded_file:
+        with open(filename_tmp, "ab" if offset else "wb") as downloaded_file:
             self.client.download(
-                self.bucket, f"{self.key}/{partition_id}.arrow", downloaded_file
+                self.bucket,
+                f"{self.key}/{partition_id}.arrow",
+                downloaded_file,
+                offset=offset,
             )
             downloaded_file.flush()
 
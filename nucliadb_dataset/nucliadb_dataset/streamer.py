@@ -17,7 +17,9 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Optional
+import threading
+from queue import Full, Queue
+from typing import Any, Iterator, Optional
 
 import requests
 from nucliadb_protos.dataset_pb2 import TrainSet
@@ -27,6 +29,11 @@ from nucliadb_sdk.client import NucliaDBClient
 
 SIZE_BYTES = 4
 
+# Number of payloads read ahead of the consumer when prefetching
+PREFETCH_SIZE = 10
+
+_END = object()
+
 
 class StreamerAlreadyRunning(Exception):
     pass
@@ -47,6 +54,8 @@ class Streamer:
         return self.resp is not None
 
     def initialize(self, partition_id: str):
+        if self.resp is not None:
+            raise StreamerAlreadyRunning()
         self.resp = self.client.stream_session.post(
             f"{self.base_url}/trainset/{partition_id}",
             data=self.trainset.SerializeToString(),
@@ -76,3 +85,45 @@ class Streamer:
         if payload in [None, b""]:
             raise StopIteration
         return payload
+
+    def prefetch(self, size: int = PREFETCH_SIZE) -> Iterator[bytes]:
+        """
+        Iterate the payloads while a background thread keeps reading up to
+        `size` of them from the network, so the consumer can decode them
+        in parallel.
+        """
+        queue: "Queue[Any]" = Queue(maxsize=size)
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def reader():
+            try:
+                for payload in self:
+                    if not put(payload):
+                        return
+            except Exception as exc:
+                put(exc)
+            else:
+                put(_END)
+
+        thread = threading.Thread(target=reader, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
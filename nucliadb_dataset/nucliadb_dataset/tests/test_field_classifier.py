@@ -151,3 +151,34 @@ def test_datascientist(knowledgebox: KnowledgeBox, temp_folder):
         with pa.memory_map(filename, "rb") as source:
             loaded_array = pa.ipc.open_stream(source).read_all()
             assert len(loaded_array) == 3
+
+
+def test_live_field_classification_resume(
+    knowledgebox: KnowledgeBox, upload_data_field_classification
+):
+    trainset = TrainSet()
+    trainset.type = TaskType.FIELD_CLASSIFICATION
+    trainset.filter.labels.append("labelset1")
+    trainset.batch_size = 1
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        fse = NucliaDBDataset(
+            client=knowledgebox.client,
+            trainset=trainset,
+            base_path=tmpdirname,
+        )
+        partitions = fse.get_partitions()
+        filename = fse.read_partition(partitions[0])
+
+        # Simulate an export interrupted in the middle of the last batch
+        with open(filename, "rb") as complete:
+            data = complete.read()
+        with open(f"{filename}.tmp", "wb") as partial:
+            partial.write(data[: len(data) - 10])
+        os.remove(filename)
+
+        filename = fse.read_partition(partitions[0])
+        assert not os.path.exists(f"{filename}.tmp")
+        with pa.memory_map(filename, "rb") as source:
+            loaded_array = pa.ipc.open_stream(source).read_all()
+            assert len(loaded_array) == 2
@@ -274,6 +274,7 @@ class ResourcePagination(BaseModel):
     page: int
     size: int
     last: bool
+    cursor: Optional[str] = None
 
 
 class ResourceList(BaseModel):
@@ -38,6 +38,8 @@ from nucliadb_models.text import TextField
 from nucliadb_models.utils import FieldIdString, SlugString
 from nucliadb_models.vectors import UserVectorsWrapper
 
+MAX_BATCH_RESOURCES = 100
+
 GENERIC_MIME_TYPE = "application/generic"
 
 
@@ -76,6 +78,24 @@ class CreateResourcePayload(BaseModel):
         return v
 
 
+class CreateResourcesPayload(BaseModel):
+    resources: List[CreateResourcePayload]
+
+    @validator("resources")
+    def resources_check(cls, v):
+        if len(v) == 0:
+            raise ValueError("At least one resource is needed")
+
+        if len(v) > MAX_BATCH_RESOURCES:
+            raise ValueError(f"No more than {MAX_BATCH_RESOURCES} resources allowed")
+
+        slugs = [resource.slug for resource in v if resource.slug is not None]
+        if len(slugs) != len(set(slugs)):
+            raise ValueError("Slugs must be unique")
+
+        return v
+
+
 class UpdateResourcePayload(BaseModel):
     title: Optional[str] = None
     summary: Optional[str] = None
@@ -104,6 +124,13 @@ class ResourceCreated(BaseModel):
     uuid: str
     elapsed: Optional[float] = None
     seqid: Optional[int] = None
+    # Set on a resource of a batch that could not be sent to process
+    error: Optional[str] = None
+
+
+class ResourcesCreated(BaseModel):
+    resources: List[ResourceCreated]
+    elapsed: Optional[float] = None
 
 
 class ResourceUpdated(BaseModel):
@@ -20,7 +20,8 @@
 # We need to pull from jetstream key partition
 
 import asyncio
-from typing import List, Optional
+import time
+from typing import List, Optional, Set
 
 import nats
 from grpc import StatusCode
@@ -29,13 +30,6 @@ from nats.aio.client import Msg
 from nats.aio.subscription import Subscription
 from nucliadb_protos.noderesources_pb2 import Resource, ResourceID, ShardIds
 from nucliadb_protos.nodewriter_pb2 import IndexMessage, OpStatus
-from sentry_sdk import capture_exception
-
-from nucliadb_node import SERVICE_NAME, logger, shadow_shards
-from nucliadb_node.reader import Reader
-from nucliadb_node.sentry import SENTRY
-from nucliadb_node.settings import settings
-from nucliadb_node.writer import Writer
 from nucliadb_telemetry.jetstream import JetStreamContextTelemetry
 from nucliadb_telemetry.utils import get_telemetry
 from nucliadb_utils.settings import indexing_settings
@@ -46,6 +40,37 @@ from nucliadb_utils.utilities import (
     get_storage,
     get_transaction,
 )
+from sentry_sdk import capture_exception
+
+from nucliadb_node import SERVICE_NAME, logger, shadow_shards
+from nucliadb_node.reader import Reader
+from nucliadb_node.sentry import SENTRY
+from nucliadb_node.settings import settings
+from nucliadb_node.writer import Writer
+
+RETRY_DELAY = 2
+# Messages waiting behind a retried one are kept from being redelivered
+HEARTBEAT_INTERVAL = 60
+
+
+class PayloadError(Exception):
+    """
+    The indexing payload of a message could not be downloaded or parsed
+    """
+
+
+class PendingMessage:
+    def __init__(
+        self,
+        msg: Msg,
+        seqid: int,
+        pb: IndexMessage,
+        payload: Optional[asyncio.Task] = None,
+    ):
+        self.msg = msg
+        self.seqid = seqid
+        self.pb = pb
+        self.payload = payload
 
 
 class Worker:
@@ -65,17 +90,31 @@ class Worker:
         self.event = asyncio.Event()
         self.node = node
         self.gc_task = None
+        self.compaction_task: Optional[asyncio.Task] = None
+        self.indexing_task: Optional[asyncio.Task] = None
+        self.cleanup_tasks: Set[asyncio.Task] = set()
+        self.queue: "asyncio.Queue[PendingMessage]" = asyncio.Queue(
+            maxsize=settings.indexing_prefetch
+        )
+        # Received messages that are neither acked nor terminated yet
+        self.pending: Set[PendingMessage] = set()
         self.ssm = shadow_shards.get_manager()
 
     async def finalize(self):
         if self.gc_task:
             self.gc_task.cancel()
+        if self.compaction_task:
+            self.compaction_task.cancel()
         for subscription in self.subscriptions:
             try:
                 await subscription.drain()
             except nats.errors.ConnectionClosedError:
                 pass
         self.subscriptions = []
+        if self.indexing_task:
+            self.indexing_task.cancel()
+        if self.cleanup_tasks:
+            await asyncio.gather(*self.cleanup_tasks, return_exceptions=True)
         transaction_utility = get_transaction()
         if transaction_utility:
             await transaction_utility.finalize()
@@ -126,8 +165,10 @@ class Worker:
             self.js = jetstream
 
         logger.info(f"Nats: Connected to {indexing_settings.index_jetstream_servers}")
+        self.indexing_task = asyncio.create_task(self.indexing_loop())
         await self.subscribe()
         self.gc_task = asyncio.create_task(self.garbage())
+        self.compaction_task = asyncio.create_task(self.compact_shadow_shards())
 
     async def garbage(self) -> None:
         while True:
@@ -147,6 +188,15 @@ class Worker:
                         )
                 await asyncio.sleep(24 * 3660)
 
+    async def compact_shadow_shards(self) -> None:
+        while True:
+            await asyncio.sleep(settings.shadow_shards_compaction_interval)
+            try:
+                dropped = await self.ssm.compact_all()
+                logger.info(f"Compacted shadow shards, dropped {dropped} operations")
+            except Exception:
+                logger.exception("Could not compact shadow shards")
+
     def store_seqid(self, seqid: int):
         if settings.data_path is None:
             raise Exception("We need a DATA_PATH env")
@@ -163,9 +213,10 @@ class Worker:
             return None
 
     async def set_resource(
-        self, pb: IndexMessage, storage: Storage
+        self, pb: IndexMessage, brain: Resource
     ) -> Optional[OpStatus]:
-        brain: Resource = await storage.get_indexing(pb)
+        # The same payload may be shared between all the replicas of a shard
+        brain.shard_id = brain.resource.shard_id = pb.shard
         is_shadow_shard = self.ssm.exists(pb.shard)
         logger.info(
             f"Added [shadow={is_shadow_shard}] {brain.resource.uuid} at {brain.shard_id} otx:{pb.txid}"
@@ -201,57 +252,181 @@ class Worker:
         storage = await get_storage(service_name=SERVICE_NAME)
         self.event.clear()
 
-        status: Optional[OpStatus] = None
+        pb = IndexMessage()
+        pb.ParseFromString(msg.data)
+        payload: Optional[asyncio.Task] = None
+        if pb.typemessage == IndexMessage.TypeMessage.CREATION:
+            # Downloaded and decoded while the previous messages are applied
+            payload = asyncio.create_task(storage.get_indexing(pb))
+        message = PendingMessage(msg, seqid, pb, payload)
+        self.pending.add(message)
+        # Blocks when `indexing_prefetch` messages are already waiting
+        await self.queue.put(message)
+
+    async def indexing_loop(self):
+        storage = await get_storage(service_name=SERVICE_NAME)
+        next_message: Optional[PendingMessage] = None
+        while True:
+            if next_message is None:
+                next_message = await self.queue.get()
+            group = [next_message]
+            next_message = None
+
+            # Consecutive messages for the same shard are applied, checkpointed
+            # and acked together
+            while not self.queue.empty():
+                message = self.queue.get_nowait()
+                if message.pb.shard != group[0].pb.shard:
+                    next_message = message
+                    break
+                group.append(message)
+
+            await self.apply_group(group, storage)
+            if next_message is None and self.queue.empty():
+                self.event.set()
+
+    async def apply_group(self, group: List[PendingMessage], storage: Storage):
+        applied: List[PendingMessage] = []
         async with self.lock:
+            for message in group:
+                if await self.apply(message, storage):
+                    applied.append(message)
+
+        try:
+            self.store_seqid(group[-1].seqid)
+            await asyncio.gather(*[message.msg.ack() for message in applied])
+        except Exception as e:
+            # Not ACKd messages will be redelivered by NATS
+            if SENTRY:
+                capture_exception(e)
+            logger.error(
+                f"An error on subscription_worker. Check sentry for more details."
+            )
+            return
+        finally:
+            self.pending.difference_update(group)
+
+        task = asyncio.create_task(
+            self.delete_indexing(
+                storage,
+                [
+                    message.pb
+                    for message in applied
+                    if message.pb.typemessage == IndexMessage.TypeMessage.CREATION
+                ],
+            )
+        )
+        self.cleanup_tasks.add(task)
+        task.add_done_callback(self.cleanup_tasks.discard)
+
+    async def apply(self, message: PendingMessage, storage: Storage) -> bool:
+        """
+        Returns False if the payload of the message still could not be
+        downloaded or parsed after `indexing_max_retries` retries. It is then
+        terminated, so NATS does not redeliver it. Any other error, like the
+        node writer being unavailable, is retried until it is applied.
+        """
+        # Messages are retried here, instead of waiting for NATS to redeliver
+        # them, so the ones prefetched after it are not applied out of order
+        retries = 0
+        last_heartbeat = 0.0
+        while True:
             try:
-                pb = IndexMessage()
-                pb.ParseFromString(msg.data)
-                if pb.typemessage == IndexMessage.TypeMessage.CREATION:
-                    status = await self.set_resource(pb, storage)
-                elif pb.typemessage == IndexMessage.TypeMessage.DELETION:
-                    status = await self.delete_resource(pb)
-                if status:
-                    self.reader.update(pb.shard, status)
-
-            except AioRpcError as grpc_error:
-                if grpc_error.code() == StatusCode.NOT_FOUND:
-                    logger.error(f"Shard does not exit {pb.shard}")
-                else:
-                    event_id: Optional[str] = None
-                    if SENTRY:
-                        event_id = capture_exception(grpc_error)
-                    logger.error(
-                        f"An error on subscription_worker. Check sentry for more details. Event id: {event_id}"
+                await self.index_message(message)
+                # Do not keep the payload around once applied
+                message.payload = None
+                return True
+            except PayloadError:
+                if retries >= settings.indexing_max_retries:
+                    logger.exception(
+                        f"Skipping message {message.seqid} after {retries} retries"
                     )
-                    raise grpc_error
+                    message.payload = None
+                    try:
+                        await message.msg.term()
+                    except Exception:
+                        logger.warning(f"Could not terminate {message.seqid}")
+                    return False
+            except Exception:
+                logger.warning(f"Retrying message {message.seqid}", exc_info=True)
+            retries += 1
+            await asyncio.sleep(RETRY_DELAY)
+            if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                await self.heartbeat(message)
+                last_heartbeat = time.monotonic()
+            payload = message.payload
+            if (
+                payload is not None
+                and not payload.cancelled()
+                and payload.exception() is not None
+            ):
+                message.payload = asyncio.create_task(storage.get_indexing(message.pb))
 
-            except KeyError as storage_error:
-                if SENTRY:
-                    capture_exception(storage_error)
-                logger.warn(
-                    "Error retrieving the indexing payload we do not block as that means its already deleted"
-                )
-            except Exception as e:
-                event_id = None
+    async def heartbeat(self, message: PendingMessage):
+        """
+        Keeps NATS from redelivering the retried message and the ones
+        received after it while it is retried
+        """
+        for pending in {message, *self.pending}:
+            try:
+                await pending.msg.in_progress()
+            except Exception:
+                logger.warning(f"Could not extend ack wait of {pending.seqid}")
+
+    async def index_message(self, message: PendingMessage):
+        pb = message.pb
+        status: Optional[OpStatus] = None
+        try:
+            if pb.typemessage == IndexMessage.TypeMessage.CREATION:
+                try:
+                    brain: Resource = await message.payload  # type: ignore
+                except KeyError:
+                    raise
+                except Exception as exc:
+                    raise PayloadError(f"Invalid payload for {pb.resource}") from exc
+                status = await self.set_resource(pb, brain)
+            elif pb.typemessage == IndexMessage.TypeMessage.DELETION:
+                status = await self.delete_resource(pb)
+            if status:
+                self.reader.update(pb.shard, status)
+
+        except AioRpcError as grpc_error:
+            if grpc_error.code() == StatusCode.NOT_FOUND:
+                logger.error(f"Shard does not exit {pb.shard}")
+            else:
+                event_id: Optional[str] = None
                 if SENTRY:
-                    event_id = capture_exception(e)
+                    event_id = capture_exception(grpc_error)
                 logger.error(
                     f"An error on subscription_worker. Check sentry for more details. Event id: {event_id}"
                 )
-                raise e
-        try:
-            self.store_seqid(seqid)
-            await msg.ack()
-            self.event.set()
-            await storage.delete_indexing(pb)
+                raise grpc_error
+
+        except KeyError as storage_error:
+            if SENTRY:
+                capture_exception(storage_error)
+            logger.warn(
+                "Error retrieving the indexing payload we do not block as that means its already deleted"
+            )
         except Exception as e:
+            event_id = None
             if SENTRY:
-                capture_exception(e)
+                event_id = capture_exception(e)
             logger.error(
-                f"An error on subscription_worker. Check sentry for more details."
+                f"An error on subscription_worker. Check sentry for more details. Event id: {event_id}"
             )
             raise e
 
+    async def delete_indexing(self, storage: Storage, pbs: List[IndexMessage]):
+        results = await asyncio.gather(
+            *[storage.delete_indexing(pb) for pb in pbs], return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                if SENTRY:
+                    capture_exception(result)
+                logger.error(f"Could not delete indexing payload: {result}")
+
     async def subscribe(self):
         last_seqid = self.load_seqid()
         logger.info(f"Last seqid {last_seqid}")
@@ -279,7 +454,7 @@ class Worker:
                 opt_start_seq=last_seqid,
                 ack_policy=nats.js.api.AckPolicy.EXPLICIT,
                 max_deliver=10000,
-                max_ack_pending=1,
+                max_ack_pending=settings.indexing_prefetch,
                 ack_wait=self.ack_wait,
                 idle_heartbeat=5,
             ),
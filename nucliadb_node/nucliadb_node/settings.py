@@ -32,5 +32,13 @@ class Settings(BaseSettings):
 
     data_path: Optional[str] = None
 
+    # Index messages downloaded ahead of the one being applied
+    indexing_prefetch: int = 10
+    # Retries of an index message whose payload can't be downloaded or parsed
+    # before it is terminated and skipped. Other errors are always retried
+    indexing_max_retries: int = 30
+    # Seconds between compactions of the shadow shard logs
+    shadow_shards_compaction_interval: int = 60 * 60
+
 
 settings = Settings()
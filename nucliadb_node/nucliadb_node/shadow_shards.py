@@ -18,12 +18,25 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 
+import asyncio
 import glob
 import os
+import shutil
+import struct
 import uuid
 from datetime import datetime
 from enum import Enum
-from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple, Union
+from typing import (
+    IO,
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import aiofiles
 from aiofiles import os as aos
@@ -34,6 +47,16 @@ from nucliadb_node import logger
 
 SHADOW_SHARDS_FOLDER = "{data_path}/shadow_shards/"
 
+# Operations are appended to segments of up to SEGMENT_SIZE bytes,
+# and fsynced every FSYNC_BATCH operations
+SEGMENT_SIZE = 64 * 1024 * 1024
+FSYNC_BATCH = 100
+
+# txid, opcode, uuid length, payload length
+LOG_HEADER = struct.Struct(">QBHI")
+# txid, offset of the record in the segment
+INDEX_ENTRY = struct.Struct(">QQ")
+
 MAIN: Dict[str, Any] = {}
 
 
@@ -77,6 +100,219 @@ class OperationCode(str, Enum):
 
 NodeOperation = Tuple[OperationCode, Union[Resource, str]]
 
+OPCODES: List[OperationCode] = [OperationCode.SET, OperationCode.DELETE]
+
+# txid, segment, offset
+LogEntry = Tuple[int, int, int]
+# txid, opcode, uuid, payload
+LogRecord = Tuple[int, OperationCode, str, bytes]
+
+
+def _sync_files(*files: IO[bytes]) -> None:
+    for file in files:
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _write_record(
+    log: IO[bytes],
+    index: IO[bytes],
+    txid: int,
+    opcode: int,
+    uuid: bytes,
+    payload: bytes,
+) -> None:
+    offset = log.tell()
+    log.write(LOG_HEADER.pack(txid, opcode, len(uuid), len(payload)))
+    log.write(uuid)
+    log.write(payload)
+    # Flushed on every append, so readers of the files see the whole record.
+    # Only the fsync is batched.
+    log.flush()
+    index.write(INDEX_ENTRY.pack(txid, offset))
+    index.flush()
+
+
+class ShadowShardLog:
+    """
+    Append-only log with the operations of a shadow shard. It is split in
+    segments (`{n}.log`), each one with an index (`{n}.idx`) holding the txid
+    and offset of its records, so they can be replayed in txid order
+    without scanning the segments.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = asyncio.Lock()
+        self.segment: Optional[int] = None
+        self.log: Optional[IO[bytes]] = None
+        self.index: Optional[IO[bytes]] = None
+        self.unsynced = 0
+
+    def segment_path(self, segment: int, extension: str) -> str:
+        return f"{self.path}/{segment:08d}.{extension}"
+
+    def segments(self) -> List[int]:
+        return sorted(
+            int(os.path.basename(path).split(".")[0])
+            for path in glob.glob(f"{self.path}/*.log")
+        )
+
+    def _open(self, segment: int) -> None:
+        self.segment = segment
+        self.log = open(self.segment_path(segment, "log"), "ab")
+        self.index = open(self.segment_path(segment, "idx"), "ab")
+
+    def _close(self) -> None:
+        if self.log is not None:
+            self.log.close()
+        if self.index is not None:
+            self.index.close()
+        self.segment = self.log = self.index = None
+
+    async def _sync(self) -> None:
+        if self.log is None or self.index is None or self.unsynced == 0:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _sync_files, self.log, self.index)
+        self.unsynced = 0
+
+    async def _append(
+        self, txid: int, opcode: OperationCode, uuid: str, payload: bytes
+    ):
+        if self.log is None:
+            segments = self.segments()
+            self._open(segments[-1] if segments else 0)
+        elif self.log.tell() >= SEGMENT_SIZE:
+            await self._sync()
+            segment = self.segment
+            self._close()
+            self._open(segment + 1)  # type: ignore
+
+        assert self.log is not None and self.index is not None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None,
+            _write_record,
+            self.log,
+            self.index,
+            txid,
+            OPCODES.index(opcode),
+            uuid.encode(),
+            payload,
+        )
+        self.unsynced += 1
+        if self.unsynced >= FSYNC_BATCH:
+            await self._sync()
+
+    async def append(
+        self, txid: int, opcode: OperationCode, uuid: str, payload: bytes = b""
+    ) -> None:
+        async with self.lock:
+            await self._append(txid, opcode, uuid, payload)
+
+    async def flush(self) -> None:
+        async with self.lock:
+            await self._sync()
+
+    async def close(self) -> None:
+        async with self.lock:
+            await self._sync()
+            self._close()
+
+    async def entries(self, segments: List[int]) -> List[LogEntry]:
+        entries: List[LogEntry] = []
+        for segment in segments:
+            async with aiofiles.open(self.segment_path(segment, "idx"), "rb") as f:
+                data = await f.read()
+            # An interrupted write may have left a partial entry at the end
+            data = data[: len(data) - len(data) % INDEX_ENTRY.size]
+            for txid, offset in INDEX_ENTRY.iter_unpack(data):
+                entries.append((txid, segment, offset))
+        # Operations with the same txid keep the order they were appended in
+        entries.sort()
+        return entries
+
+    async def records(
+        self, entries: List[LogEntry], payloads: bool = True
+    ) -> AsyncIterator[LogRecord]:
+        files: Dict[int, Any] = {}
+        try:
+            for txid, segment, offset in entries:
+                if segment not in files:
+                    files[segment] = await aiofiles.open(
+                        self.segment_path(segment, "log"), "rb"
+                    )
+                f = files[segment]
+                await f.seek(offset)
+                header = await f.read(LOG_HEADER.size)
+                if len(header) < LOG_HEADER.size:
+                    logger.warning(f"Truncated record in {self.path} {segment}")
+                    continue
+                _, opcode, uuid_length, payload_length = LOG_HEADER.unpack(header)
+                uuid = await f.read(uuid_length)
+                payload = b""
+                if payloads:
+                    payload = await f.read(payload_length)
+                    if len(payload) < payload_length:
+                        logger.warning(f"Truncated record in {self.path} {segment}")
+                        continue
+                yield txid, OPCODES[opcode], uuid.decode(), payload
+        finally:
+            for f in files.values():
+                await f.close()
+
+    async def replay(self) -> AsyncIterator[LogRecord]:
+        await self.flush()
+        entries = await self.entries(self.segments())
+        async for record in self.records(entries):
+            yield record
+
+    async def compact(self) -> int:
+        """
+        Rewrites the log without the SETs that are superseded by a later SET or
+        DEL of the same uuid. Returns the number of operations dropped.
+        """
+        async with self.lock:
+            await self._sync()
+            self._close()
+            segments = self.segments()
+            if len(segments) == 0:
+                return 0
+
+            entries = await self.entries(segments)
+            operations: List[Tuple[OperationCode, str]] = []
+            last_operation: Dict[str, int] = {}
+            async for _, opcode, uuid, _ in self.records(entries, payloads=False):
+                last_operation[uuid] = len(operations)
+                operations.append((opcode, uuid))
+            superseded = sum(
+                1
+                for position, (opcode, uuid) in enumerate(operations)
+                if opcode == OperationCode.SET and last_operation[uuid] != position
+            )
+            if superseded == 0:
+                return 0
+
+            # New segments are fully written and synced before the old ones
+            # are removed, replay order does not depend on segment numbers
+            self._open(segments[-1] + 1)
+            dropped = 0
+            position = 0
+            async for txid, opcode, uuid, payload in self.records(entries):
+                if opcode == OperationCode.SET and last_operation[uuid] != position:
+                    dropped += 1
+                else:
+                    await self._append(txid, opcode, uuid, payload)
+                position += 1
+            await self._sync()
+            self._close()
+
+            for segment in segments:
+                os.remove(self.segment_path(segment, "log"))
+                os.remove(self.segment_path(segment, "idx"))
+            return dropped
+
 
 class ShadowShardsManager:
     """
@@ -91,6 +327,7 @@ class ShadowShardsManager:
         self._loaded: bool = False
         self._metadata_file: str = "metadata.json"
         self._metadata: ShadowMetadata = ShadowMetadata()
+        self._logs: Dict[str, ShadowShardLog] = {}
 
     @property
     def folder(self) -> str:
@@ -108,6 +345,43 @@ class ShadowShardsManager:
         await self.load_metadata()
         await self.load_shards()
         self._loaded = True
+        for shard_id in self.shards:
+            await self.migrate_legacy_operations(shard_id)
+
+    async def migrate_legacy_operations(self, shard_id: str) -> int:
+        """
+        Moves the operations stored with the previous layout, one
+        `{txid}_{opcode}_{uuid}` file per operation, to the shard log.
+        Returns the number of operations moved.
+        """
+        operations = []
+        for path in glob.glob(f"{self.shard_path(shard_id)}/*_*_*"):
+            try:
+                txid, opcode, rid = os.path.basename(path).split("_")
+                operations.append((int(txid), OperationCode(opcode), rid, path))
+            except ValueError:
+                logger.warning(f"Unknown file in shadow shard {shard_id}: {path}")
+        if len(operations) == 0:
+            return 0
+
+        operations.sort(key=lambda operation: operation[0])
+        log = self.get_log(shard_id)
+        for txid, opcode, rid, path in operations:
+            payload = b""
+            if opcode == OperationCode.SET:
+                async with aiofiles.open(path, mode="rb") as f:
+                    payload = await f.read()
+            await log.append(txid, opcode, rid, payload)
+        await log.flush()
+
+        # Removed once synced to the log. If interrupted before, they are moved
+        # again, and replaying an operation twice in txid order is harmless.
+        for _, _, _, path in operations:
+            await aos.remove(path)
+        logger.info(
+            f"Moved {len(operations)} operations of shadow shard {shard_id} to its log"
+        )
+        return len(operations)
 
     async def load_shards(self):
         self.shards = set()
@@ -163,8 +437,12 @@ class ShadowShardsManager:
         if shard_id not in self.shards:
             raise ShadowShardNotFound()
 
+        log = self._logs.pop(shard_id, None)
+        if log is not None:
+            await log.close()
         shard_path = self.shard_path(shard_id)
-        await aos.rmdir(shard_path)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, shutil.rmtree, shard_path)
 
         self.shards.remove(shard_id)
         self.metadata.shards.pop(shard_id)
@@ -175,66 +453,58 @@ class ShadowShardsManager:
             raise ShadowShardsNotLoaded()
         return shard_id in self.shards
 
-    def get_op_id(self, txid: int, opcode: OperationCode, uuid: str) -> str:
-        return f"{txid}_{opcode}_{uuid}"
-
-    def parse_op_id(self, op_id: str) -> Tuple[int, OperationCode, str]:
-        txid, opcode, uuid = op_id.split("_")
-        return int(txid), OperationCode(opcode), uuid
-
-    async def set_resource(self, brain: Resource, shard_id: str, txid: int) -> None:
+    def get_log(self, shard_id: str) -> ShadowShardLog:
         if not self.loaded:
             raise ShadowShardsNotLoaded()
         if not self.exists(shard_id):
             raise ShadowShardNotFound()
+        if shard_id not in self._logs:
+            self._logs[shard_id] = ShadowShardLog(self.shard_path(shard_id))
+        return self._logs[shard_id]
 
-        op_id = self.get_op_id(txid, OperationCode.SET, brain.resource.uuid)
-        shard_path = self.shard_path(shard_id)
-        async with aiofiles.open(f"{shard_path}/{op_id}", mode="wb") as f:
-            await f.write(brain.SerializeToString())
+    async def set_resource(self, brain: Resource, shard_id: str, txid: int) -> None:
+        log = self.get_log(shard_id)
+        await log.append(
+            txid, OperationCode.SET, brain.resource.uuid, brain.SerializeToString()
+        )
 
     async def delete_resource(self, uuid: str, shard_id: str, txid: int) -> None:
-        if not self.loaded:
-            raise ShadowShardsNotLoaded()
-        if not self.exists(shard_id):
-            raise ShadowShardNotFound()
-
-        op_id = self.get_op_id(txid, OperationCode.DELETE, uuid)
-        shard_path = self.shard_path(shard_id)
-        async with aiofiles.open(f"{shard_path}/{op_id}", mode="x"):
-            pass
+        log = self.get_log(shard_id)
+        await log.append(txid, OperationCode.DELETE, uuid)
 
     async def iter_operations(self, shard_id: str) -> AsyncIterator[NodeOperation]:
         """
-        Iterates the operations stored in the shard folder ordered by transaction id (txid)
+        Iterates the operations stored in the shard log ordered by transaction id (txid)
         """
-        if not self.loaded:
-            raise ShadowShardsNotLoaded()
-        if not self.exists(shard_id):
-            raise ShadowShardNotFound()
-
-        shard_path = self.shard_path(shard_id)
-
-        def get_filename(op_path: str) -> str:
-            return op_path.split("/")[-1]
-
-        def get_txid(op_path: str) -> int:
-            filename = get_filename(op_path)
-            return int(filename.split("_")[0])
-
-        op_paths = glob.glob(f"{shard_path}/*")
-        op_paths_sorted_by_txid = sorted(op_paths, key=lambda p: get_txid(p))
-        for path in op_paths_sorted_by_txid:
-            op_id = get_filename(path)
-            _, opcode, uuid = self.parse_op_id(op_id)
+        log = self.get_log(shard_id)
+        async for _, opcode, uuid, payload in log.replay():
             if opcode == OperationCode.SET:
-                async with aiofiles.open(path, mode="rb") as f:
-                    payload = await f.read()
-                    brain = Resource.FromString(payload)
-                    yield opcode, brain
+                yield opcode, Resource.FromString(payload)
             elif opcode == OperationCode.DELETE:
                 yield opcode, uuid
 
+    async def compact(self, shard_id: str) -> int:
+        """
+        Drops the SET operations of the shard that are superseded by a later
+        operation on the same resource
+        """
+        log = self.get_log(shard_id)
+        return await log.compact()
+
+    async def compact_all(self) -> int:
+        """
+        Compacts the log of every shadow shard. Returns the number of
+        operations dropped.
+        """
+        dropped = 0
+        for shard_id in list(self.shards):
+            try:
+                dropped += await self.compact(shard_id)
+            except ShadowShardNotFound:
+                # Deleted meanwhile
+                continue
+        return dropped
+
 
 def get_data_path() -> str:
     data_path = os.environ.get("DATA_PATH")
@@ -0,0 +1,148 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from grpc import StatusCode
+from grpc.aio import AioRpcError  # type: ignore
+from grpc.aio import Metadata
+from nucliadb_protos.nodewriter_pb2 import IndexMessage
+
+from nucliadb_node import pull
+from nucliadb_node.pull import PayloadError, PendingMessage, Worker
+from nucliadb_node.settings import settings
+
+
+def pending_message(
+    seqid: int, shard: str = "shard", typemessage=IndexMessage.TypeMessage.DELETION
+) -> PendingMessage:
+    pb = IndexMessage(shard=shard, resource=f"rid{seqid}", typemessage=typemessage)
+    msg = MagicMock(ack=AsyncMock(), term=AsyncMock(), in_progress=AsyncMock())
+    return PendingMessage(msg, seqid, pb)
+
+
+@pytest.fixture(scope="function")
+async def worker(data_path, monkeypatch):
+    monkeypatch.setattr(pull, "RETRY_DELAY", 0)
+    worker = Worker(writer=MagicMock(), reader=MagicMock(), node="node")
+    worker.store_seqid = MagicMock()  # type: ignore
+    worker.index_message = AsyncMock()  # type: ignore
+    yield worker
+
+
+@pytest.fixture(scope="function")
+def storage():
+    yield MagicMock(delete_indexing=AsyncMock(), get_indexing=AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_indexing_loop_groups_consecutive_messages_of_a_shard(worker):
+    groups = []
+
+    async def apply_group(group, storage):
+        groups.append([message.seqid for message in group])
+
+    worker.apply_group = apply_group
+    for seqid, shard in [(1, "a"), (2, "a"), (3, "b"), (4, "a")]:
+        worker.queue.put_nowait(pending_message(seqid, shard))
+
+    task = asyncio.create_task(worker.indexing_loop())
+    await asyncio.wait_for(worker.event.wait(), timeout=1)
+    task.cancel()
+
+    assert groups == [[1, 2], [3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_apply_group_applies_in_order_and_acks_together(worker, storage):
+    creation = IndexMessage.TypeMessage.CREATION
+    group = [pending_message(1, typemessage=creation), pending_message(2)]
+    group[0].payload = asyncio.create_task(asyncio.sleep(0))
+
+    await worker.apply_group(group, storage)
+    await asyncio.gather(*worker.cleanup_tasks)
+
+    assert [call.args[0] for call in worker.index_message.call_args_list] == group
+    worker.store_seqid.assert_called_once_with(2)
+    for message in group:
+        message.msg.ack.assert_awaited_once()
+    # Only the payloads of creations are deleted
+    storage.delete_indexing.assert_awaited_once_with(group[0].pb)
+
+
+@pytest.mark.asyncio
+async def test_apply_retries_failing_message(worker, storage):
+    message = pending_message(1)
+    worker.index_message.side_effect = [Exception(), None]
+
+    assert await worker.apply(message, storage) is True
+
+    assert worker.index_message.await_count == 2
+    message.msg.in_progress.assert_awaited_once()
+    message.msg.term.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_apply_group_skips_poison_message(worker, storage, monkeypatch):
+    monkeypatch.setattr(settings, "indexing_max_retries", 2)
+    poison, message = pending_message(1), pending_message(2)
+
+    async def index_message(pending: PendingMessage):
+        if pending is poison:
+            raise PayloadError()
+
+    worker.index_message.side_effect = index_message
+
+    await worker.apply_group([poison, message], storage)
+
+    assert worker.index_message.await_count == 4
+    poison.msg.term.assert_awaited_once()
+    poison.msg.ack.assert_not_awaited()
+    message.msg.ack.assert_awaited_once()
+    worker.store_seqid.assert_called_once_with(2)
+
+
+@pytest.mark.asyncio
+async def test_apply_retries_transient_errors_past_max_retries(
+    worker, storage, monkeypatch
+):
+    monkeypatch.setattr(settings, "indexing_max_retries", 2)
+    monkeypatch.setattr(pull, "HEARTBEAT_INTERVAL", 0)
+    message, waiting = pending_message(1), pending_message(2)
+    worker.pending.update([message, waiting])
+    unavailable = AioRpcError(StatusCode.UNAVAILABLE, Metadata(), Metadata())
+    worker.index_message.side_effect = [unavailable] * 5 + [None]
+
+    assert await worker.apply(message, storage) is True
+
+    assert worker.index_message.await_count == 6
+    message.msg.term.assert_not_awaited()
+    # The message waiting behind it is not redelivered meanwhile
+    assert waiting.msg.in_progress.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_apply_group_forgets_handled_messages(worker, storage):
+    group = [pending_message(1), pending_message(2)]
+    worker.pending.update(group)
+
+    await worker.apply_group(group, storage)
+
+    assert worker.pending == set()
@@ -20,6 +20,7 @@
 import pytest
 from nucliadb_protos.noderesources_pb2 import Resource
 
+from nucliadb_node import shadow_shards
 from nucliadb_node.shadow_shards import (
     OperationCode,
     ShadowShardNotFound,
@@ -168,3 +169,111 @@ async def test_metadata(shadow_folder):
     # Check that deleting the shard cleans up the metadata
     await ssm.delete(shard_1)
     assert ssm.metadata.get_info(shard_1) is None
+
+
+@pytest.mark.asyncio
+async def test_operations_are_segmented(shadow_folder, monkeypatch):
+    monkeypatch.setattr(shadow_shards, "SEGMENT_SIZE", 10)
+    ssm = ShadowShardsManager(shadow_folder)
+    await ssm.load()
+    shard_id = await ssm.create()
+
+    for txid in range(5, 0, -1):
+        await ssm.set_resource(get_brain(f"resource{txid}"), shard_id, txid)
+
+    assert len(ssm.get_log(shard_id).segments()) == 5
+
+    ops = [op async for op in ssm.iter_operations(shard_id)]
+    assert [brain.resource.uuid for _, brain in ops] == [
+        f"resource{txid}" for txid in range(1, 6)
+    ]
+
+    await ssm.delete(shard_id)
+    assert not ssm.exists(shard_id)
+
+
+@pytest.mark.asyncio
+async def test_appended_records_are_flushed(shadow_folder):
+    ssm = ShadowShardsManager(shadow_folder)
+    await ssm.load()
+    shard_id = await ssm.create()
+
+    await ssm.set_resource(get_brain("resource1"), shard_id, 1)
+
+    # Readable from the files before the log is synced
+    log = ssm.get_log(shard_id)
+    assert log.unsynced == 1
+    entries = await log.entries(log.segments())
+    records = [record async for record in log.records(entries, payloads=False)]
+    assert [(txid, opcode, uuid) for txid, opcode, uuid, _ in records] == [
+        (1, OperationCode.SET, "resource1")
+    ]
+
+    await ssm.delete(shard_id)
+
+
+@pytest.mark.asyncio
+async def test_compaction(shadow_folder):
+    ssm = ShadowShardsManager(shadow_folder)
+    await ssm.load()
+    shard_id = await ssm.create()
+
+    await ssm.set_resource(get_brain("resource1"), shard_id, 1)
+    await ssm.set_resource(get_brain("resource2"), shard_id, 2)
+    await ssm.set_resource(get_brain("resource1"), shard_id, 3)
+    await ssm.delete_resource("resource2", shard_id, 4)
+    await ssm.set_resource(get_brain("resource3"), shard_id, 5)
+
+    assert await ssm.compact(shard_id) == 2
+
+    ops = [op async for op in ssm.iter_operations(shard_id)]
+    assert ops == [
+        (OperationCode.SET, get_brain("resource1")),
+        (OperationCode.DELETE, "resource2"),
+        (OperationCode.SET, get_brain("resource3")),
+    ]
+
+    # The log can still be appended after compacting it
+    await ssm.delete_resource("resource3", shard_id, 6)
+    ops = [op async for op in ssm.iter_operations(shard_id)]
+    assert ops[-1] == (OperationCode.DELETE, "resource3")
+
+
+@pytest.mark.asyncio
+async def test_compaction_without_superseded_operations(shadow_folder):
+    ssm = ShadowShardsManager(shadow_folder)
+    await ssm.load()
+    shard_id = await ssm.create()
+
+    await ssm.set_resource(get_brain("resource1"), shard_id, 1)
+    segments = ssm.get_log(shard_id).segments()
+
+    assert await ssm.compact_all() == 0
+    # Nothing to drop, the log is not rewritten
+    assert ssm.get_log(shard_id).segments() == segments
+
+
+@pytest.mark.asyncio
+async def test_legacy_operations_are_migrated(shadow_folder):
+    ssm = ShadowShardsManager(shadow_folder)
+    await ssm.load()
+    shard_id = await ssm.create()
+
+    # One file per operation, as stored by previous versions
+    shard_path = ssm.shard_path(shard_id)
+    with open(f"{shard_path}/2_DEL_resource2", "wb"):
+        pass
+    with open(f"{shard_path}/1_SET_resource1", "wb") as f:
+        f.write(get_brain("resource1").SerializeToString())
+
+    ssm = ShadowShardsManager(shadow_folder)
+    await ssm.load()
+    await ssm.delete_resource("resource1", shard_id, 3)
+
+    ops = [op async for op in ssm.iter_operations(shard_id)]
+    assert ops == [
+        (OperationCode.SET, get_brain("resource1")),
+        (OperationCode.DELETE, "resource2"),
+        (OperationCode.DELETE, "resource1"),
+    ]
+    assert await ssm.migrate_legacy_operations(shard_id) == 0
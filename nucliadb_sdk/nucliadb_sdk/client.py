@@ -19,7 +19,7 @@
 
 import base64
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 import httpx
 import requests
@@ -35,7 +35,9 @@ from nucliadb_models.search import (
 from nucliadb_models.vectors import VectorSet, VectorSets
 from nucliadb_models.writer import (
     CreateResourcePayload,
+    CreateResourcesPayload,
     ResourceCreated,
+    ResourcesCreated,
     UpdateResourcePayload,
 )
 
@@ -43,6 +45,7 @@ RESOURCE_PATH = "/resource/{rid}"
 RESOURCE_PATH_BY_SLUG = "/slug/{slug}"
 SEARCH_PATH = "/search"
 CREATE_RESOURCE_PATH = "/resources"
+CREATE_RESOURCES_BATCH_PATH = "/resources/batch"
 CREATE_VECTORSET = "/vectorset/{vectorset}"
 VECTORSETS = "/vectorsets"
 COUNTER = "/counters"
@@ -298,6 +301,30 @@ class NucliaDBClient:
         else:
             raise HTTPError(f"Status code {response.status_code}: {response.text}")
 
+    def create_resources(
+        self, payloads: List[CreateResourcePayload]
+    ) -> ResourcesCreated:
+        url = CREATE_RESOURCES_BATCH_PATH
+        payload = CreateResourcesPayload(resources=payloads)
+        response: httpx.Response = self.writer_session.post(url, content=payload.json())
+        if response.status_code == 201:
+            return ResourcesCreated.parse_raw(response.content)
+        else:
+            raise HTTPError(f"Status code {response.status_code}: {response.text}")
+
+    async def async_create_resources(
+        self, payloads: List[CreateResourcePayload]
+    ) -> ResourcesCreated:
+        url = CREATE_RESOURCES_BATCH_PATH
+        payload = CreateResourcesPayload(resources=payloads)
+        response: httpx.Response = await self.async_writer_session.post(
+            url, content=payload.json()
+        )
+        if response.status_code == 201:
+            return ResourcesCreated.parse_raw(response.content)
+        else:
+            raise HTTPError(f"Status code {response.status_code}: {response.text}")
+
     def update_resource(self, id: str, payload: UpdateResourcePayload):
         url = RESOURCE_PATH.format(rid=id)
         response: httpx.Response = self.writer_session.post(url, content=payload.json())
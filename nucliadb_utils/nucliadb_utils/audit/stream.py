@@ -18,11 +18,15 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 import asyncio
+import random
+import struct
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 
 import mmh3  # type: ignore
 import nats
+import prometheus_client  # type: ignore
 from nucliadb_protos.audit_pb2 import AuditField, AuditRequest, AuditShardCounter
 from nucliadb_protos.nodereader_pb2 import SearchRequest
 from nucliadb_protos.writer_pb2 import BrokerMessage
@@ -31,6 +35,53 @@ from opentelemetry.trace import get_current_span
 from nucliadb_utils import logger
 from nucliadb_utils.audit.audit import AuditStorage
 
+AUDIT_QUEUE_DEPTH = prometheus_client.Gauge(
+    "nucliadb_audit_queue_depth",
+    "Number of audit messages waiting to be published",
+)
+AUDIT_PUBLISH_LATENCY = prometheus_client.Histogram(
+    "nucliadb_audit_publish_latency_seconds",
+    "Time to publish an audit message and get its ack (in seconds)",
+)
+AUDIT_DROPPED = prometheus_client.Counter(
+    "nucliadb_audit_dropped_total",
+    "Number of audit messages dropped because the queue was full",
+)
+
+# Overflow policies, what to do with new messages when the queue is full
+DROP = "drop"
+# Like drop, but only a sample of the messages is queued once the
+# queue is half full, so it degrades before being full
+SAMPLE = "sample"
+BLOCK = "block"
+
+# Header telling consumers that the message is a batch of length prefixed
+# search AuditRequest messages
+BATCH_HEADER = "X-Audit-Batch"
+
+BATCHED_TYPES = (AuditRequest.SEARCH,)
+
+
+def encode_batch(messages: List[AuditRequest]) -> bytes:
+    payload = b""
+    for message in messages:
+        data = message.SerializeToString()
+        payload += struct.pack(">I", len(data)) + data
+    return payload
+
+
+def decode_batch(payload: bytes) -> List[AuditRequest]:
+    messages = []
+    offset = 0
+    while offset < len(payload):
+        (size,) = struct.unpack_from(">I", payload, offset)
+        offset += 4
+        message = AuditRequest()
+        message.ParseFromString(payload[offset : offset + size])
+        messages.append(message)
+        offset += size
+    return messages
+
 
 class StreamAuditStorage(AuditStorage):
     task: Optional[asyncio.Task] = None
@@ -45,14 +96,26 @@ class StreamAuditStorage(AuditStorage):
         partitions: int,
         seed: int,
         nats_creds: Optional[str] = None,
+        queue_size: int = 10000,
+        overflow_policy: str = DROP,
+        sample_rate: float = 0.1,
+        publish_concurrency: int = 10,
+        search_batch_size: int = 0,
     ):
+        if overflow_policy not in (DROP, SAMPLE, BLOCK):
+            raise ValueError(f"Invalid audit overflow policy: {overflow_policy}")
         self.nats_servers = nats_servers
         self.nats_creds = nats_creds
         self.nats_target = nats_target
         self.partitions = partitions
         self.seed = seed
         self.lock = asyncio.Lock()
-        self.queue = asyncio.Queue()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflow_policy = overflow_policy
+        self.sample_rate = sample_rate
+        self.publish_concurrency = publish_concurrency
+        self.search_batch_size = search_batch_size
+        self.publishing: Set[asyncio.Task] = set()
 
     def get_partition(self, kbid: str):
         return mmh3.hash(kbid, self.seed, signed=False) % self.partitions
@@ -94,23 +157,83 @@ class StreamAuditStorage(AuditStorage):
     async def finalize(self):
         if self.task is not None:
             self.task.cancel()
+        if self.publishing:
+            # Wait for the acks of the messages already sent
+            await asyncio.wait(self.publishing, timeout=5)
         if self.nc:
             await self.nc.flush()
             await self.nc.close()
             self.nc = None
 
     async def run(self):
+        slots = asyncio.Semaphore(self.publish_concurrency)
         while True:
             try:
-                audit = await self.queue.get()
-                await self._send(audit)
+                audits = [await self.queue.get()]
+                if self.search_batch_size > 1:
+                    while (
+                        len(audits) < self.search_batch_size and not self.queue.empty()
+                    ):
+                        audits.append(self.queue.get_nowait())
+                AUDIT_QUEUE_DEPTH.set(self.queue.qsize())
+
+                for messages in self.group(audits):
+                    # Keep up to publish_concurrency messages waiting for their ack
+                    await slots.acquire()
+                    task = asyncio.create_task(self._publish(messages, slots))
+                    self.publishing.add(task)
+                    task.add_done_callback(self.publishing.discard)
             except (asyncio.CancelledError, KeyboardInterrupt, RuntimeError):
                 return
             except Exception:  # pragma: no cover
                 logger.exception("Could not send audit", stack_info=True)
 
+    def group(self, audits: List[AuditRequest]) -> List[List[AuditRequest]]:
+        """
+        Search audits are batched by partition, the rest are sent alone.
+        """
+        groups: List[List[AuditRequest]] = []
+        batches: Dict[int, List[AuditRequest]] = {}
+        for audit in audits:
+            if self.search_batch_size > 1 and audit.type in BATCHED_TYPES:
+                partition = self.get_partition(audit.kbid)
+                if partition not in batches:
+                    batches[partition] = []
+                    groups.append(batches[partition])
+                batches[partition].append(audit)
+            else:
+                groups.append([audit])
+        return groups
+
+    async def _publish(self, messages: List[AuditRequest], slots: asyncio.Semaphore):
+        try:
+            if len(messages) == 1:
+                await self._send(messages[0])
+            else:
+                await self._send_batch(messages)
+        except Exception:
+            logger.exception("Could not send audit", stack_info=True)
+        finally:
+            slots.release()
+
     async def send(self, message: AuditRequest):
-        self.queue.put_nowait(message)
+        if self.overflow_policy == BLOCK:
+            await self.queue.put(message)
+        elif (
+            self.overflow_policy == SAMPLE
+            and self.queue.qsize() >= self.queue.maxsize / 2
+            and random.random() >= self.sample_rate
+        ):
+            AUDIT_DROPPED.inc()
+            return
+        else:
+            try:
+                self.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                AUDIT_DROPPED.inc()
+                logger.debug(f"Audit queue is full, dropping {message.type} message")
+                return
+        AUDIT_QUEUE_DEPTH.set(self.queue.qsize())
 
     async def _send(self, message: AuditRequest):
         if self.js is None:  # pragma: no cover
@@ -118,15 +241,35 @@ class StreamAuditStorage(AuditStorage):
 
         partition = self.get_partition(message.kbid)
 
+        start = time.monotonic()
         res = await self.js.publish(
             self.nats_target.format(partition=partition, type=message.type),
             message.SerializeToString(),
         )
+        AUDIT_PUBLISH_LATENCY.observe(time.monotonic() - start)
         logger.debug(
             f"Pushed message to audit.  kb: {message.kbid}, resource: {message.rid}, partition: {partition}"
         )
         return res.seq
 
+    async def _send_batch(self, messages: List[AuditRequest]):
+        if self.js is None:  # pragma: no cover
+            raise AttributeError()
+
+        partition = self.get_partition(messages[0].kbid)
+
+        start = time.monotonic()
+        res = await self.js.publish(
+            self.nats_target.format(partition=partition, type=messages[0].type),
+            encode_batch(messages),
+            headers={BATCH_HEADER: str(len(messages))},
+        )
+        AUDIT_PUBLISH_LATENCY.observe(time.monotonic() - start)
+        logger.debug(
+            f"Pushed {len(messages)} messages to audit.  partition: {partition}"
+        )
+        return res.seq
+
     async def report(
         self,
         message: BrokerMessage,
@@ -20,7 +20,7 @@
 import asyncio
 import uuid
 from sys import getsizeof
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
 
 import orjson
 
@@ -47,6 +47,10 @@ class Cache:
     def __init__(self, pubsub: Optional[PubSubDriver] = None):
         self.ident = uuid.uuid4().hex
         self.pubsub = pubsub
+        # Loads in flight per key, and times the key was invalidated while
+        # they were loading
+        self._loads: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}
 
     async def initialize(self):
         if self.initialized:
@@ -84,6 +88,33 @@ class Cache:
             logger.debug("Retrieved {} from memory cache".format(key))
             return self._memory_cache[key]
 
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached value, or loads and caches it. A value invalidated
+        while it was being loaded may be stale already, so it is not cached.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+        self._loads[key] = self._loads.get(key, 0) + 1
+        generation = self._generations.get(key, 0)
+        try:
+            value = await loader()
+        finally:
+            invalidated = self._generations.get(key, 0) != generation
+            self._loads[key] -= 1
+            if self._loads[key] == 0:
+                del self._loads[key]
+                self._generations.pop(key, None)
+        if value is not None and not invalidated:
+            await self.set(key, value)
+        return value
+
+    def _invalidate_loads(self, keys: Iterable[str]):
+        for key in keys:
+            if key in self._loads:
+                self._generations[key] = self._generations.get(key, 0) + 1
+
     def get_size(self, value):
         if isinstance(value, list) and len(value) > 0:
             # if its a list, guesss from first gey the length, and
@@ -109,6 +140,7 @@ class Cache:
 
     # Delete a set of objects from cache
     async def mdelete(self, keys: List[str], invalidate: bool = False):
+        self._invalidate_loads(keys)
         for key in keys:
             if key in self._memory_cache:
                 del self._memory_cache[key]
@@ -117,6 +149,7 @@ class Cache:
 
     # Delete a set of objects from cache
     async def delete(self, key: str, invalidate: bool = False):
+        self._invalidate_loads([key])
         if key in self._memory_cache:
             del self._memory_cache[key]
         if invalidate:
@@ -124,6 +157,7 @@ class Cache:
 
     # Clean all cache
     async def clear(self, invalidate: bool = False):
+        self._invalidate_loads(list(self._loads))
         self._memory_cache.clear()
         if invalidate:
             await self.send_invalidation(purge=True)
@@ -141,8 +175,10 @@ class Cache:
             # Skip my messages
             return
         if "purge" in payload and payload["purge"]:
+            self._invalidate_loads(list(self._loads))
             self._memory_cache.clear()
         if "keys" in payload:
+            self._invalidate_loads(payload["keys"])
             for key in payload["keys"]:
                 if key in self._memory_cache:
                     del self._memory_cache[key]
@@ -61,6 +61,10 @@ class StorageSettings(BaseSettings):
     s3_endpoint: Optional[str] = None
     s3_region_name: Optional[str] = None
     s3_bucket: Optional[str] = None
+    s3_upload_concurrency: int = 4
+    s3_upload_memory_budget: int = 40 * 1024 * 1024
+    s3_download_concurrency: int = 4
+    s3_download_range_size: int = 10 * 1024 * 1024
 
     local_files: Optional[str] = None
     upload_token_expiration: Optional[int] = 3
@@ -135,6 +139,12 @@ class AuditSettings(BaseSettings):
     audit_partitions: int = 3
     audit_stream: str = "audit"
     audit_hash_seed: int = 1234
+    audit_queue_size: int = 10000
+    audit_overflow_policy: str = "drop"  # drop | sample | block
+    audit_overflow_sample_rate: float = 0.1
+    audit_publish_concurrency: int = 10
+    # Batch up to this many search audits in a single message, 0 disables it
+    audit_search_batch_size: int = 0
 
 
 audit_settings = AuditSettings()
@@ -70,7 +70,12 @@ class LocalStorageField(StorageField):
         destination_bucket_path = self.storage.get_bucket_path(destination_bucket_name)
         origin_path = f"{origin_bucket_path}/{origin_uri}"
         destination_path = f"{destination_bucket_path}/{destination_uri}"
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
         shutil.copy(origin_path, destination_path)
+        if os.path.exists(self.metadata_key(origin_path)):
+            shutil.copy(
+                self.metadata_key(origin_path), self.metadata_key(destination_path)
+            )
 
     def get_file_path(self, bucket: str, key: str):
         return f"{self.storage.get_bucket_name(bucket)}/{key}"
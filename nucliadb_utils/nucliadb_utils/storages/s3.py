@@ -19,9 +19,11 @@
 #
 from __future__ import annotations
 
+import asyncio
+from collections import deque
 from contextlib import AsyncExitStack
 from datetime import datetime
-from typing import Any, AsyncIterator, Optional
+from typing import Any, AsyncIterator, Deque, Optional, Set
 
 import aiobotocore  # type: ignore
 import aiohttp
@@ -39,12 +41,20 @@ MIN_UPLOAD_SIZE = 5 * 1024 * 1024
 CHUNK_SIZE = MIN_UPLOAD_SIZE
 MAX_RETRIES = 5
 
+UPLOAD_CONCURRENCY = 4
+UPLOAD_MEMORY_BUDGET = 8 * CHUNK_SIZE
+DOWNLOAD_CONCURRENCY = 4
+DOWNLOAD_RANGE_SIZE = 2 * CHUNK_SIZE
+
 RETRIABLE_EXCEPTIONS = (
     botocore.exceptions.ClientError,
     aiohttp.client_exceptions.ClientPayloadError,
     botocore.exceptions.BotoCoreError,
 )
 
+# Errors that fail the same way however many times they are retried
+NOT_RETRIABLE_ERROR_CODES = ("InvalidRange", "PreconditionFailed")
+
 POLICY_DELETE = {
     "Rules": [
         {
@@ -57,10 +67,59 @@ POLICY_DELETE = {
 }
 
 
+def is_not_retriable(exc: Exception) -> bool:
+    return (
+        isinstance(exc, botocore.exceptions.ClientError)
+        and exc.response["Error"]["Code"] in NOT_RETRIABLE_ERROR_CODES
+    )
+
+
+def get_object_size(response: Any) -> Optional[int]:
+    """
+    Total size of the object from a ranged get_object response, None if
+    the range was not honored.
+    """
+    content_range = response.get("ContentRange")
+    if not content_range:
+        return None
+    total = content_range.rsplit("/", 1)[-1]
+    if total == "*":
+        return None
+    return int(total)
+
+
+class MemoryBudget:
+    """
+    Bounds the amount of bytes held by in flight operations.
+
+    A single operation bigger than the whole budget is still allowed
+    to run alone, so we never deadlock on oversized chunks.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int):
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.used == 0 or self.used + size <= self.size
+            )
+            self.used += size
+
+    async def release(self, size: int):
+        async with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+
 class S3StorageField(StorageField):
     storage: S3Storage
 
-    @backoff.on_exception(backoff.expo, RETRIABLE_EXCEPTIONS, max_tries=3)
+    @backoff.on_exception(
+        backoff.expo, RETRIABLE_EXCEPTIONS, max_tries=3, giveup=is_not_retriable
+    )
     async def _download(self, uri, bucket, **kwargs):
         if "headers" in kwargs:
             for key, value in kwargs["headers"].items():
@@ -78,7 +137,24 @@ class S3StorageField(StorageField):
         else:
             bucket = self.field.bucket_name
 
-        downloader = await self._download(uri, bucket, **kwargs)
+        if kwargs.get("headers") or "Range" in kwargs:
+            downloader = await self._download(uri, bucket, **kwargs)
+        else:
+            # Ask for the first range, its response tells us the object size
+            try:
+                downloader = await self._download(
+                    uri, bucket, Range=f"bytes=0-{self.storage.download_range_size - 1}"
+                )
+            except botocore.exceptions.ClientError as ex:
+                if ex.response["Error"]["Code"] != "InvalidRange":
+                    raise
+                # Empty objects can not be requested by range
+                downloader = await self._download(uri, bucket)
+            size = get_object_size(downloader)
+            if size is not None and size > self.storage.download_range_size:
+                async for data in self._iter_ranges(uri, bucket, size, downloader):
+                    yield data
+                return
 
         # we do not want to timeout ever from this...
         # downloader['Body'].set_socket_timeout(999999)
@@ -90,6 +166,59 @@ class S3StorageField(StorageField):
             yield data
             data = await stream.read(CHUNK_SIZE)
 
+    @backoff.on_exception(
+        backoff.expo, RETRIABLE_EXCEPTIONS, max_tries=3, giveup=is_not_retriable
+    )
+    async def _download_range(
+        self, uri: str, bucket: str, etag: str, start: int, end: int
+    ):
+        # Fails if the object changed since the first range was downloaded
+        downloader = await self.storage._s3aioclient.get_object(
+            Bucket=bucket, Key=uri, Range=f"bytes={start}-{end - 1}", IfMatch=etag
+        )
+        return await downloader["Body"].read()
+
+    async def _iter_ranges(self, uri: str, bucket: str, size: int, first: Any):
+        """
+        Yield the first range response and download the rest of the object
+        with concurrent ranged requests, in order. At most
+        download_concurrency ranges are kept in memory. All of them must
+        belong to the same version of the object as the first one.
+        """
+        etag = first["ETag"]
+        range_size = self.storage.download_range_size
+        ranges = (
+            (start, min(start + range_size, size))
+            for start in range(range_size, size, range_size)
+        )
+        pending: Deque[asyncio.Task] = deque()
+
+        def schedule():
+            while len(pending) < self.storage.download_concurrency:
+                next_range = next(ranges, None)
+                if next_range is None:
+                    return
+                pending.append(
+                    asyncio.create_task(
+                        self._download_range(uri, bucket, etag, *next_range)
+                    )
+                )
+
+        try:
+            schedule()
+            stream = first["Body"]
+            data = await stream.read(CHUNK_SIZE)
+            while data:
+                yield data
+                data = await stream.read(CHUNK_SIZE)
+            while pending:
+                data = await pending.popleft()
+                schedule()
+                yield data
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def read_range(self, start: int, end: int) -> AsyncIterator[bytes]:
         """
         Iterate through ranges of data
@@ -155,24 +284,56 @@ class S3StorageField(StorageField):
         )
 
     async def append(self, cf: CloudFile, iterable: AsyncIterator) -> int:
+        """
+        Upload every chunk as a part of the multipart upload, keeping
+        up to upload_concurrency parts in flight as long as they fit
+        in the upload memory budget.
+        """
         size = 0
         if self.field is None:
             raise AttributeError("No field configured")
-        async for chunk in iterable:
-            size += len(chunk)
-            part = await self._upload_part(cf, chunk)
-            self.field.parts.append(part["ETag"])
-            self.field.offset += 1
+        budget = MemoryBudget(self.storage.upload_memory_budget)
+        slots = asyncio.Semaphore(self.storage.upload_concurrency)
+        tasks: Set[asyncio.Task] = set()
+
+        async def upload_part(part_number: int, chunk: bytes):
+            try:
+                part = await self._upload_part(cf, chunk, part_number)
+                self.field.parts[part_number - 1] = part["ETag"]
+            finally:
+                await budget.release(len(chunk))
+                slots.release()
+
+        try:
+            async for chunk in iterable:
+                size += len(chunk)
+                await slots.acquire()
+                await budget.acquire(len(chunk))
+                # Fail early if any part upload failed
+                for task in [task for task in tasks if task.done()]:
+                    tasks.discard(task)
+                    task.result()
+                part_number = self.field.offset
+                self.field.parts.append("")
+                self.field.offset += 1
+                tasks.add(asyncio.create_task(upload_part(part_number, chunk)))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
         return size
 
     @backoff.on_exception(backoff.expo, RETRIABLE_EXCEPTIONS, max_tries=3)
-    async def _upload_part(self, cf: CloudFile, data: bytes):
+    async def _upload_part(
+        self, cf: Optional[CloudFile], data: bytes, part_number: Optional[int] = None
+    ):
         if self.field is None:
             raise AttributeError("No field configured")
         return await self.storage._s3aioclient.upload_part(
             Bucket=self.field.bucket_name,
             Key=self.field.upload_uri,
-            PartNumber=self.field.offset,
+            PartNumber=part_number or self.field.offset,
             UploadId=self.field.resumable_uri,
             Body=data,
         )
@@ -298,6 +459,10 @@ class S3Storage(Storage):
         region_name: Optional[str] = None,
         max_pool_connections: int = 30,
         bucket: Optional[str] = None,
+        upload_concurrency: int = UPLOAD_CONCURRENCY,
+        upload_memory_budget: int = UPLOAD_MEMORY_BUDGET,
+        download_concurrency: int = DOWNLOAD_CONCURRENCY,
+        download_range_size: int = DOWNLOAD_RANGE_SIZE,
     ):
         self.source = CloudFile.S3
         self.deadletter_bucket = deadletter_bucket
@@ -318,6 +483,10 @@ class S3Storage(Storage):
         )
         self._exit_stack = AsyncExitStack()
         self.bucket = bucket
+        self.upload_concurrency = upload_concurrency
+        self.upload_memory_budget = upload_memory_budget
+        self.download_concurrency = download_concurrency
+        self.download_range_size = download_range_size
 
     def get_bucket_name(self, kbid: str):
         if self.bucket is None:
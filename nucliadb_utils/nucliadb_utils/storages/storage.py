@@ -193,17 +193,42 @@ class Storage:
         bytes_buffer.flush()
         return pb
 
-    async def delete_indexing(self, payload: IndexMessage):
-        if self.indexing_bucket is None:
-            raise AttributeError()
-
+    def indexing_key(self, payload: IndexMessage) -> str:
         if payload.txid == 0 and payload.reindex_id != "":
-            # Deleting a reindexing payload
+            # Reindexing payload
             txid = payload.reindex_id
         else:
             txid = str(payload.txid)
+        return INDEXING.format(node=payload.node, shard=payload.shard, txid=txid)
+
+    async def copy_indexing(
+        self, payload: IndexMessage, node: str, shard: str
+    ) -> IndexMessage:
+        """
+        Copies an already uploaded indexing payload to another node and shard,
+        on the storage side, so it's not uploaded again
+        """
+        if self.indexing_bucket is None:
+            raise AttributeError()
+        response = IndexMessage()
+        response.CopyFrom(payload)
+        response.node = node
+        response.shard = shard
+        origin_key = self.indexing_key(payload)
+        destination_key = self.indexing_key(response)
+        destination = self.field_klass(
+            storage=self, bucket=self.indexing_bucket, fullkey=destination_key
+        )
+        await destination.copy(
+            origin_key, destination_key, self.indexing_bucket, self.indexing_bucket
+        )
+        return response
+
+    async def delete_indexing(self, payload: IndexMessage):
+        if self.indexing_bucket is None:
+            raise AttributeError()
 
-        key = INDEXING.format(node=payload.node, shard=payload.shard, txid=txid)
+        key = self.indexing_key(payload)
         await self.delete_upload(key, self.indexing_bucket)
 
     def needs_move(self, file: CloudFile, kbid: str) -> bool:
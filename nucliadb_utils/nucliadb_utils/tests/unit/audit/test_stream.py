@@ -24,7 +24,11 @@ from nucliadb_protos.audit_pb2 import AuditRequest, AuditShardCounter
 from nucliadb_protos.nodereader_pb2 import SearchRequest
 from nucliadb_protos.writer_pb2 import BrokerMessage
 
-from nucliadb_utils.audit.stream import StreamAuditStorage
+from nucliadb_utils.audit.stream import (
+    BATCH_HEADER,
+    StreamAuditStorage,
+    decode_batch,
+)
 
 
 @pytest.fixture()
@@ -115,3 +119,45 @@ async def test_suggest(audit_storage: StreamAuditStorage, nats):
 
     await wait_for_queue(audit_storage)
     nats.jetstream().publish.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_overflow_drops_messages():
+    aud = StreamAuditStorage(
+        nats_servers=["nats://localhost:4222"],
+        nats_target="test",
+        partitions=1,
+        seed=1,
+        queue_size=1,
+    )
+    await aud.send(AuditRequest(kbid="kbid1"))
+    await aud.send(AuditRequest(kbid="kbid2"))
+
+    assert aud.queue.qsize() == 1
+    assert aud.queue.get_nowait().kbid == "kbid1"
+
+
+@pytest.mark.asyncio
+async def test_search_audits_are_batched(nats):
+    aud = StreamAuditStorage(
+        nats_servers=["nats://localhost:4222"],
+        nats_target="test",
+        partitions=1,
+        seed=1,
+        search_batch_size=10,
+    )
+    for _ in range(3):
+        await aud.search("kbid", "user", 0, "origin", SearchRequest(), -1, 1)
+    await aud.visited("kbid", "uuid", "user", "origin")
+
+    with patch("nucliadb_utils.audit.stream.nats.connect", return_value=nats):
+        await aud.initialize()
+        await wait_for_queue(aud)
+        await aud.finalize()
+
+    publish = nats.jetstream().publish
+    assert publish.call_count == 2
+    batch, single = publish.call_args_list
+    assert batch.kwargs["headers"] == {BATCH_HEADER: "3"}
+    assert len(decode_batch(batch.args[1])) == 3
+    assert AuditRequest.FromString(single.args[1]).type == AuditRequest.VISITED
@@ -0,0 +1,154 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+import asyncio
+from unittest.mock import MagicMock
+
+import botocore.exceptions
+import pytest
+from nucliadb_protos.resources_pb2 import CloudFile
+
+from nucliadb_utils.storages.s3 import MemoryBudget, S3Storage, S3StorageField
+
+
+class FakeBody:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def read(self, size: int = -1):
+        if size < 0:
+            size = len(self.data)
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+def client_error(code: str):
+    return botocore.exceptions.ClientError({"Error": {"Code": code}}, "GetObject")
+
+
+class FakeS3Client:
+    def __init__(self, data: bytes = b""):
+        self.data = data
+        self.etag = "etag-1"
+        self.running = 0
+        self.max_running = 0
+        self.gets = 0
+
+    async def upload_part(self, PartNumber, Body, **kwargs):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        # Later parts finish first
+        await asyncio.sleep(0.01 / PartNumber)
+        self.running -= 1
+        return {"ETag": f"etag-{PartNumber}-{Body.decode()}"}
+
+    async def get_object(self, Range=None, IfMatch=None, **kwargs):
+        self.gets += 1
+        if IfMatch is not None and IfMatch != self.etag:
+            raise client_error("PreconditionFailed")
+        if Range is None:
+            return {"Body": FakeBody(self.data), "ETag": self.etag}
+        if not self.data:
+            raise client_error("InvalidRange")
+        start, end = map(int, Range[len("bytes=") :].split("-"))
+        data = self.data[start : end + 1]
+        return {
+            "Body": FakeBody(data),
+            "ContentRange": f"bytes {start}-{start + len(data) - 1}/{len(self.data)}",
+            "ETag": self.etag,
+        }
+
+
+@pytest.fixture
+def storage():
+    storage = S3Storage(
+        bucket="test-{kbid}",
+        upload_concurrency=3,
+        download_concurrency=2,
+        download_range_size=4,
+    )
+    yield storage
+
+
+@pytest.mark.asyncio
+async def test_append_uploads_parts_in_parallel(storage: S3Storage):
+    storage._s3aioclient = FakeS3Client()
+    field = CloudFile(bucket_name="bucket", upload_uri="key", resumable_uri="id")
+    field.offset = 1
+    sfield = S3StorageField(storage, "bucket", "key", field)
+
+    async def chunks():
+        for index in range(6):
+            yield str(index).encode()
+
+    assert await sfield.append(field, chunks()) == 6
+    assert storage._s3aioclient.max_running == 3
+    assert field.offset == 7
+    assert list(field.parts) == [f"etag-{index + 1}-{index}" for index in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_iter_data_downloads_ranges_in_order(storage: S3Storage):
+    data = bytes(range(30))
+    storage._s3aioclient = FakeS3Client(data)
+    sfield = S3StorageField(storage, "bucket", "key", MagicMock(bucket_name="bucket"))
+
+    assert b"".join([chunk async for chunk in sfield.iter_data()]) == data
+
+
+@pytest.mark.asyncio
+async def test_iter_data_fails_if_object_changes(storage: S3Storage):
+    client = storage._s3aioclient = FakeS3Client(bytes(range(30)))
+    sfield = S3StorageField(storage, "bucket", "key", MagicMock(bucket_name="bucket"))
+
+    chunks = sfield.iter_data()
+    await chunks.__anext__()
+    # Overwritten after the first range was downloaded
+    client.etag = "etag-2"
+    with pytest.raises(botocore.exceptions.ClientError):
+        async for _ in chunks:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_iter_data_empty_object_is_not_retried(storage: S3Storage):
+    client = storage._s3aioclient = FakeS3Client(b"")
+    sfield = S3StorageField(storage, "bucket", "key", MagicMock(bucket_name="bucket"))
+
+    assert [chunk async for chunk in sfield.iter_data()] == []
+    # The ranged request and the plain one
+    assert client.gets == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_budget():
+    budget = MemoryBudget(10)
+    await budget.acquire(6)
+    acquire = asyncio.create_task(budget.acquire(6))
+    await asyncio.sleep(0)
+    assert not acquire.done()
+
+    await budget.release(6)
+    await acquire
+    assert budget.used == 6
+
+    # Oversized operations run alone
+    await budget.release(6)
+    await budget.acquire(20)
+    assert budget.used == 20
@@ -121,6 +121,24 @@ class TestStorage:
 
         storage.delete_upload.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_copy_indexing(self, storage: StorageTest):
+        field = MagicMock(copy=AsyncMock())
+        storage.field_klass = MagicMock(return_value=field)
+        im = IndexMessage(node="node", shard="shard", txid=1)
+
+        copied = await storage.copy_indexing(im, "node2", "shard2")
+
+        assert copied.node == "node2"
+        assert copied.shard == "shard2"
+        assert copied.txid == 1
+        field.copy.assert_awaited_once_with(
+            "index/node/shard/1",
+            "index/node2/shard2/1",
+            "indexing_bucket",
+            "indexing_bucket",
+        )
+
     @pytest.mark.asyncio
     async def test_download_pb(self, storage: StorageTest):
         assert isinstance(
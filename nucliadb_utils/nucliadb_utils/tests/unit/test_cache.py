@@ -0,0 +1,44 @@
+# Copyright (C) 2021 Bosutech XXI S.L.
+#
+# nucliadb is offered under the AGPL v3.0 and as commercial software.
+# For commercial licensing, contact us at info@nuclia.com.
+#
+# AGPL:
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from nucliadb_utils.cache import memcache
+from nucliadb_utils.cache.utility import Cache
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_skips_values_invalidated_while_loading():
+    cache = Cache()
+    cache._memory_cache = memcache.get_memory_cache()
+
+    async def load():
+        # Invalidated by a commit while it was being read
+        await cache.delete("/kbs/kbid/config")
+        return b"stale"
+
+    assert await cache.get_or_load("/kbs/kbid/config", load) == b"stale"
+    assert await cache.get("/kbs/kbid/config") is None
+
+    loader = AsyncMock(return_value=b"config")
+    assert await cache.get_or_load("/kbs/kbid/config", loader) == b"config"
+    assert await cache.get_or_load("/kbs/kbid/config", loader) == b"config"
+    loader.assert_awaited_once()
@@ -20,9 +20,10 @@
 from unittest import mock
 
 import pytest
+from nucliadb_protos.writer_pb2 import Notification
 
 from nucliadb_utils.cache.nats import NatsPubsub
-from nucliadb_utils.transaction import TransactionUtility, WaitFor
+from nucliadb_utils.transaction import CommitWaiters, TransactionUtility, WaitFor
 
 
 @pytest.mark.asyncio
@@ -47,3 +48,43 @@ async def test_transaction_commit():
     # Unsubscribing twice with the same request_id should raise KeyError
     with pytest.raises(KeyError):
         await txn.stop_waiting(kbid, request_id=request_id)
+
+
+@pytest.mark.asyncio
+async def test_commit_waiters_share_subscription():
+    pubsub = mock.AsyncMock(parse=lambda data: data)
+    waiters = CommitWaiters(pubsub, "notify.{kbid}", linger=0)
+
+    foo = await waiters.add("kbid", WaitFor(uuid="foo", seq=1), "request1")
+    bar = await waiters.add("kbid", WaitFor(uuid="bar"), "request2")
+    pubsub.subscribe.assert_awaited_once()
+
+    waiters.received("kbid", Notification(uuid="foo", seqid=2).SerializeToString())
+    assert not foo.is_set()
+    waiters.received("kbid", Notification(uuid="foo", seqid=1).SerializeToString())
+    assert foo.is_set()
+    assert not bar.is_set()
+
+    waiters.remove("kbid", "request1")
+    await waiters.cleanup_once()
+    pubsub.unsubscribe.assert_not_awaited()
+
+    waiters.remove("kbid", "request2")
+    await waiters.cleanup_once()
+    pubsub.unsubscribe.assert_awaited_once()
+    assert waiters.kbs == {}
+
+    await waiters.finalize()
+
+
+@pytest.mark.asyncio
+async def test_commit_waiters_remove_stale():
+    pubsub = mock.AsyncMock(parse=lambda data: data)
+    waiters = CommitWaiters(pubsub, "notify.{kbid}", max_waiting_time=0)
+
+    await waiters.add("kbid", WaitFor(uuid="foo"), "request1")
+    await waiters.cleanup_once()
+    with pytest.raises(KeyError):
+        waiters.remove("kbid", "request1")
+
+    await waiters.finalize()
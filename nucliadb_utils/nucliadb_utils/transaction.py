@@ -18,10 +18,11 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 import asyncio
+import time
 import uuid
 from asyncio import Event
 from functools import partial
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 import nats
 from nats.aio.client import Client
@@ -43,6 +44,155 @@ class WaitFor:
         self.seq = seq
 
 
+# Time we keep the notification subscription of a KB without waiters
+NOTIFY_LINGER = 60.0
+# Waiters not removed after this time are considered stale
+MAX_WAITING_TIME = 120.0
+
+
+class KnowledgeBoxWaiters:
+    def __init__(self):
+        self.waiters: Dict[str, Tuple[WaitFor, Event, float]] = {}
+        self.by_uuid: Dict[str, Set[str]] = {}
+        self.subscribed = False
+        self.idle_since = time.monotonic()
+
+    def add(self, request_id: str, waiting_for: WaitFor) -> Event:
+        event = Event()
+        self.waiters[request_id] = (waiting_for, event, time.monotonic())
+        self.by_uuid.setdefault(waiting_for.uuid, set()).add(request_id)
+        return event
+
+    def remove(self, request_id: str):
+        waiting_for, _, _ = self.waiters.pop(request_id)
+        request_ids = self.by_uuid[waiting_for.uuid]
+        request_ids.discard(request_id)
+        if len(request_ids) == 0:
+            del self.by_uuid[waiting_for.uuid]
+        if len(self.waiters) == 0:
+            self.idle_since = time.monotonic()
+
+    def notify(self, notification: Notification):
+        for request_id in self.by_uuid.get(notification.uuid, ()):
+            waiting_for, event, _ = self.waiters[request_id]
+            if waiting_for.seq is None or notification.seqid == waiting_for.seq:
+                event.set()
+
+    def stale(self, max_waiting_time: float) -> List[str]:
+        now = time.monotonic()
+        return [
+            request_id
+            for request_id, (_, _, created) in self.waiters.items()
+            if now - created >= max_waiting_time
+        ]
+
+
+class CommitWaiters:
+    """
+    Routes the commit notifications of each KB to the requests waiting
+    for them.
+
+    There is a single pubsub subscription per KB, shared by all its
+    waiters and kept for `linger` seconds once the last one is gone,
+    so synchronous writes do not subscribe and unsubscribe every time.
+    """
+
+    def __init__(
+        self,
+        pubsub: PubSubDriver,
+        notify_subject: str,
+        linger: float = NOTIFY_LINGER,
+        max_waiting_time: float = MAX_WAITING_TIME,
+    ):
+        self.pubsub = pubsub
+        self.notify_subject = notify_subject
+        self.linger = linger
+        self.max_waiting_time = max_waiting_time
+        self.kbs: Dict[str, KnowledgeBoxWaiters] = {}
+        self.lock = asyncio.Lock()
+        self.cleanup_task: Optional[asyncio.Task] = None
+
+    def subscription_id(self, kbid: str) -> str:
+        return f"{self.notify_subject.format(kbid=kbid)}-waiters"
+
+    def received(self, kbid: str, raw_data: bytes):
+        kb = self.kbs.get(kbid)
+        if kb is None:
+            return
+        data = self.pubsub.parse(raw_data)
+        pb = Notification()
+        pb.ParseFromString(data)
+        kb.notify(pb)
+
+    async def async_received(self, kbid: str, raw_data: bytes):
+        self.received(kbid, raw_data)
+
+    async def add(self, kbid: str, waiting_for: WaitFor, request_id: str) -> Event:
+        async with self.lock:
+            kb = self.kbs.get(kbid)
+            if kb is None:
+                kb = self.kbs[kbid] = KnowledgeBoxWaiters()
+            if not kb.subscribed:
+                await self.pubsub.subscribe(
+                    # Sync callbacks may be run in a thread by the driver
+                    handler=partial(
+                        self.async_received
+                        if self.pubsub.async_callback
+                        else self.received,
+                        kbid,
+                    ),
+                    key=self.notify_subject.format(kbid=kbid),
+                    subscription_id=self.subscription_id(kbid),
+                )
+                kb.subscribed = True
+            if self.cleanup_task is None or self.cleanup_task.done():
+                self.cleanup_task = asyncio.create_task(self.cleanup())
+            return kb.add(request_id, waiting_for)
+
+    def remove(self, kbid: str, request_id: str):
+        kb = self.kbs.get(kbid)
+        if kb is None or request_id not in kb.waiters:
+            raise KeyError(f"No waiter at {request_id}")
+        kb.remove(request_id)
+
+    async def cleanup(self):
+        while len(self.kbs) > 0:
+            await asyncio.sleep(min(self.linger, self.max_waiting_time))
+            try:
+                await self.cleanup_once()
+            except Exception:
+                logger.exception("Error cleaning commit waiters")
+
+    async def cleanup_once(self):
+        async with self.lock:
+            now = time.monotonic()
+            for kbid, kb in list(self.kbs.items()):
+                for request_id in kb.stale(self.max_waiting_time):
+                    logger.warning(f"Removing stale commit waiter {request_id}")
+                    kb.remove(request_id)
+                if len(kb.waiters) == 0 and now - kb.idle_since >= self.linger:
+                    await self._unsubscribe(kbid, kb)
+
+    async def _unsubscribe(self, kbid: str, kb: KnowledgeBoxWaiters):
+        del self.kbs[kbid]
+        if kb.subscribed:
+            await self.pubsub.unsubscribe(
+                key=self.notify_subject.format(kbid=kbid),
+                subscription_id=self.subscription_id(kbid),
+            )
+
+    async def finalize(self):
+        if self.cleanup_task is not None:
+            self.cleanup_task.cancel()
+            self.cleanup_task = None
+        async with self.lock:
+            for kbid, kb in list(self.kbs.items()):
+                try:
+                    await self._unsubscribe(kbid, kb)
+                except Exception:
+                    logger.warning("Could not unsubscribe", exc_info=True)
+
+
 class LocalTransactionUtility:
     async def commit(
         self, writer: BrokerMessage, partition: int, wait: bool = False
@@ -57,6 +207,20 @@ class LocalTransactionUtility:
         await ingest.ProcessMessage(iterator(writer))  # type: ignore
         return 0
 
+    async def commit_many(
+        self, writers: List[Tuple[BrokerMessage, int]], wait: bool = False
+    ) -> List[int]:
+        from nucliadb_utils.utilities import get_ingest
+
+        ingest = get_ingest()
+
+        async def iterator(writers):
+            for writer, _ in writers:
+                yield writer
+
+        await ingest.ProcessMessage(iterator(writers))  # type: ignore
+        return [0] * len(writers)
+
     async def finalize(self):
         pass
 
@@ -82,6 +246,7 @@ class TransactionUtility:
         self.nats_index_target = nats_index_target
         self.notify_subject = notify_subject
         self.pubsub: Optional[PubSubDriver] = None
+        self.waiters: Optional[CommitWaiters] = None
 
     async def disconnected_cb(self):
         logger.info("Got disconnected from NATS!")
@@ -100,15 +265,10 @@ class TransactionUtility:
         logger.info("Connection is closed on NATS")
 
     async def stop_waiting(self, kbid: str, request_id: str):
-        if self.pubsub is None:
-            logger.warn("No PubSub configured")
+        if self.waiters is None:
+            logger.warn("Not waiting for commits")
             return
-        if self.notify_subject is None:
-            logger.warn("No subject defined")
-            return
-        await self.pubsub.unsubscribe(
-            key=self.notify_subject.format(kbid=kbid), subscription_id=request_id
-        )
+        self.waiters.remove(kbid, request_id)
 
     async def wait_for_commited(
         self, kbid: str, waiting_for: WaitFor, request_id: str
@@ -121,24 +281,9 @@ class TransactionUtility:
             logger.warn("No PubSub configured")
             return None
 
-        def received(waiting_for: WaitFor, event: Event, raw_data: bytes):
-            if self.pubsub is None:
-                return None
-            data = self.pubsub.parse(raw_data)
-            pb = Notification()
-            pb.ParseFromString(data)
-            if pb.uuid == waiting_for.uuid:
-                if waiting_for.seq is None or pb.seqid == waiting_for.seq:
-                    event.set()
-
-        waiting_event = Event()
-        partial_received = partial(received, waiting_for, waiting_event)
-        await self.pubsub.subscribe(
-            handler=partial_received,
-            key=self.notify_subject.format(kbid=kbid),
-            subscription_id=request_id,
-        )
-        return waiting_event
+        if self.waiters is None:
+            self.waiters = CommitWaiters(self.pubsub, self.notify_subject)
+        return await self.waiters.add(kbid, waiting_for, request_id)
 
     async def initialize(self, service_name: Optional[str] = None):
         if self.notify_subject is not None:
@@ -172,6 +317,9 @@ class TransactionUtility:
             self.js = jetstream
 
     async def finalize(self):
+        if self.waiters is not None:
+            await self.waiters.finalize()
+            self.waiters = None
         if self.nc:
             await self.nc.flush()
             await self.nc.close()
@@ -210,3 +358,17 @@ class TransactionUtility:
             f" - Pushed message to ingest.  kb: {writer.kbid}, resource: {writer.uuid}, nucliadb seqid: {res.seq}, partition: {partition}"
         )
         return res.seq
+
+    async def commit_many(
+        self, writers: List[Tuple[BrokerMessage, int]], wait: bool = False
+    ) -> List[int]:
+        """
+        Publishes all the messages without waiting for the previous
+        acknowledgement, sequences are returned in the same order
+        """
+        return await asyncio.gather(
+            *[
+                self.commit(writer, partition, wait=wait)
+                for writer, partition in writers
+            ]
+        )
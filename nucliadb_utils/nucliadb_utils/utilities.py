@@ -97,6 +97,10 @@ async def get_storage(
             region_name=storage_settings.s3_region_name,
             max_pool_connections=storage_settings.s3_max_pool_connections,
             bucket=storage_settings.s3_bucket,
+            upload_concurrency=storage_settings.s3_upload_concurrency,
+            upload_memory_budget=storage_settings.s3_upload_memory_budget,
+            download_concurrency=storage_settings.s3_download_concurrency,
+            download_range_size=storage_settings.s3_download_range_size,
         )
         set_utility(Utility.STORAGE, s3util)
         await s3util.initialize()
@@ -248,6 +252,11 @@ async def start_audit_utility():
             nats_target=audit_settings.audit_jetstream_target,
             partitions=audit_settings.audit_partitions,
             seed=audit_settings.audit_hash_seed,
+            queue_size=audit_settings.audit_queue_size,
+            overflow_policy=audit_settings.audit_overflow_policy,
+            sample_rate=audit_settings.audit_overflow_sample_rate,
+            publish_concurrency=audit_settings.audit_publish_concurrency,
+            search_batch_size=audit_settings.audit_search_batch_size,
         )
         logger.info(
             f"Configuring stream audit log {audit_settings.audit_jetstream_target}"